@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+ViralForge AI Content Pipeline Benchmark
+Measures latency and throughput of the content generation paths against the
+fake OpenAI backend, sweeping concurrency, piece count and content type.
+
+Usage:
+    python benchmarks/content_pipeline.py --concurrency 1,4,16 --counts 10,50
+    python benchmarks/content_pipeline.py --content-types facts,memes --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add the parent directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the content generation pipeline")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--counts", default="10,50", help="Comma-separated piece counts")
+    parser.add_argument("--content-types", default="facts,trivia,memes,quotes,location_content",
+                        help="Comma-separated content types")
+    parser.add_argument("--platforms", default="instagram,tiktok", help="Platforms for platform-specific adaptation")
+    parser.add_argument("--fused", action="store_true", help="Use fused single-call generation")
+    parser.add_argument("--latency-median-ms", type=float, default=100.0, help="Fake chat latency median")
+    parser.add_argument("--latency-p99-ms", type=float, default=600.0, help="Fake chat latency p99")
+    parser.add_argument("--image-latency-median-ms", type=float, default=500.0, help="Fake image latency median")
+    parser.add_argument("--image-latency-p99-ms", type=float, default=2000.0, help="Fake image latency p99")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of fake calls failing with 429")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the fake backend")
+    parser.add_argument("--with-rate-limits", action="store_true",
+                        help="Keep the configured AI_RPM_LIMITS/AI_TPM_LIMITS (disabled by default)")
+    parser.add_argument("--output", default="benchmarks/results/content_pipeline.json",
+                        help="Where to write machine-readable results")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace):
+    """Point the application at the fake backend before it is imported"""
+    os.environ["MOCK_API_CALLS"] = "True"
+    os.environ["AI_CACHE_ENABLED"] = "False"
+    os.environ["FUSED_GENERATION_ENABLED"] = str(args.fused)
+    os.environ["FAKE_API_LATENCY_MEDIAN_MS"] = str(args.latency_median_ms)
+    os.environ["FAKE_API_LATENCY_P99_MS"] = str(args.latency_p99_ms)
+    os.environ["FAKE_IMAGE_LATENCY_MEDIAN_MS"] = str(args.image_latency_median_ms)
+    os.environ["FAKE_IMAGE_LATENCY_P99_MS"] = str(args.image_latency_p99_ms)
+    os.environ["FAKE_API_ERROR_RATE"] = str(args.error_rate)
+    os.environ["FAKE_API_RATE_LIMIT_RATE"] = str(args.rate_limit_rate)
+    os.environ["FAKE_API_SEED"] = str(args.seed)
+    if not args.with_rate_limits:
+        os.environ["AI_RPM_LIMITS"] = "{}"
+        os.environ["AI_TPM_LIMITS"] = "{}"
+
+    # Required settings that the benchmark does not use
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/viralforge_benchmark.db")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent.parent,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+async def bench_pieces(generator, fake_client, content_type, count: int, concurrency: int) -> Dict[str, Any]:
+    """generate_content_piece latency and bulk throughput through the bounded worker pool"""
+    latencies: List[float] = []
+    original = generator.generate_content_piece
+
+    async def timed_piece(**kwargs):
+        started = time.perf_counter()
+        try:
+            return await original(**kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    generator.generate_content_piece = timed_piece
+    fake_client.reset_stats()
+    pieces, errors = [], 0
+
+    started = time.perf_counter()
+    try:
+        async for result in generator.stream_content_pieces(
+            count=count,
+            content_types=[content_type],
+            max_concurrency=concurrency
+        ):
+            if isinstance(result, dict):
+                pieces.append(result)
+            else:
+                errors += 1
+    finally:
+        del generator.generate_content_piece
+    wall = time.perf_counter() - started
+
+    api_calls = sum(value for key, value in fake_client.calls.items() if ":" not in key)
+    return {
+        "scenario": "generate_content_piece",
+        "content_type": content_type.value,
+        "count": count,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "pieces_per_second": round(len(pieces) / wall, 3) if wall else 0.0,
+        "latency": latency_summary(latencies),
+        "api_calls": dict(fake_client.calls),
+        "api_calls_per_piece": round(api_calls / count, 2) if count else 0.0,
+        "errors": errors,
+        "peak_rss_mb": peak_rss_mb(),
+        "_pieces": pieces
+    }
+
+
+async def bench_multiple(generator, fake_client, content_types, count: int, concurrency: int) -> Dict[str, Any]:
+    """End-to-end generate_multiple_content_pieces"""
+    fake_client.reset_stats()
+    started = time.perf_counter()
+    pieces = await generator.generate_multiple_content_pieces(
+        count=count,
+        content_types=content_types,
+        max_concurrency=concurrency
+    )
+    wall = time.perf_counter() - started
+
+    api_calls = sum(value for key, value in fake_client.calls.items() if ":" not in key)
+    return {
+        "scenario": "generate_multiple_content_pieces",
+        "content_type": "mixed",
+        "count": count,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "pieces_per_second": round(len(pieces) / wall, 3) if wall else 0.0,
+        "api_calls": dict(fake_client.calls),
+        "api_calls_per_piece": round(api_calls / count, 2) if count else 0.0,
+        "errors": count - len(pieces),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+async def bench_platform(generator, fake_client, pieces, platforms: List[str], concurrency: int) -> Dict[str, Any]:
+    """generate_platform_specific_content for every piece and platform"""
+    fake_client.reset_stats()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def adapt(piece, target_platform):
+        async with semaphore:
+            started = time.perf_counter()
+            await generator.generate_platform_specific_content(piece, target_platform)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[adapt(piece, target) for piece in pieces for target in platforms])
+    wall = time.perf_counter() - started
+
+    adaptations = len(pieces) * len(platforms)
+    api_calls = sum(value for key, value in fake_client.calls.items() if ":" not in key)
+    return {
+        "scenario": "generate_platform_specific_content",
+        "content_type": "mixed",
+        "count": adaptations,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "adaptations_per_second": round(adaptations / wall, 3) if wall else 0.0,
+        "latency": latency_summary(latencies),
+        "api_calls": dict(fake_client.calls),
+        "api_calls_per_adaptation": round(api_calls / adaptations, 2) if adaptations else 0.0,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from src.core.config import ContentType, get_settings
+    from src.core.database import create_tables
+    from src.content_pipeline.generator import get_content_generator
+
+    create_tables()  # API usage rows are flushed here during the run
+
+    settings = get_settings()
+    generator = get_content_generator()
+    fake_client = generator.openai_service.client
+
+    concurrency_levels = [int(value) for value in args.concurrency.split(",")]
+    counts = [int(value) for value in args.counts.split(",")]
+    content_types = [ContentType(value.strip()) for value in args.content_types.split(",")]
+    platforms = [value.strip() for value in args.platforms.split(",")]
+
+    results = []
+    for count in counts:
+        for concurrency in concurrency_levels:
+            sample_pieces = []
+            for content_type in content_types:
+                result = await bench_pieces(generator, fake_client, content_type, count, concurrency)
+                sample_pieces.extend(result.pop("_pieces"))
+                results.append(result)
+                print(
+                    f"{result['scenario']:<36} {content_type.value:<17} n={count:<4} c={concurrency:<3} "
+                    f"p50={result['latency']['p50_ms']:>8}ms p99={result['latency']['p99_ms']:>8}ms "
+                    f"{result['pieces_per_second']:>7}/s calls/piece={result['api_calls_per_piece']}"
+                )
+
+            result = await bench_multiple(generator, fake_client, content_types, count, concurrency)
+            results.append(result)
+            print(
+                f"{result['scenario']:<36} {'mixed':<17} n={count:<4} c={concurrency:<3} "
+                f"wall={result['wall_seconds']:>7}s {result['pieces_per_second']:>7}/s"
+            )
+
+            result = await bench_platform(generator, fake_client, sample_pieces[:count], platforms, concurrency)
+            results.append(result)
+            print(
+                f"{result['scenario']:<36} {'mixed':<17} n={result['count']:<4} c={concurrency:<3} "
+                f"p50={result['latency']['p50_ms']:>8}ms p99={result['latency']['p99_ms']:>8}ms "
+                f"calls/adaptation={result['api_calls_per_adaptation']}"
+            )
+
+    return {
+        "benchmark": "content_pipeline",
+        "app_version": settings.APP_VERSION,
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "fused": args.fused,
+            "rate_limits": args.with_rate_limits,
+            "latency_median_ms": args.latency_median_ms,
+            "latency_p99_ms": args.latency_p99_ms,
+            "image_latency_median_ms": args.image_latency_median_ms,
+            "image_latency_p99_ms": args.image_latency_p99_ms,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "seed": args.seed
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results
+    }
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+
+    report = asyncio.run(run(args))
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+ViralForge AI Serialization Benchmark
+Compares encode/decode time and payload size of the json, vf-msgpack and
+vf-orjson serializers (through kombu, as Celery uses them) for real content
+pieces produced by the pipeline against the fake OpenAI backend.
+
+Usage:
+    python benchmarks/serialization.py --pieces 20 --rounds 200
+    python benchmarks/serialization.py --batch-size 50 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add the parent directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark Celery message and payload serializers")
+    parser.add_argument("--pieces", type=int, default=20, help="Content pieces to generate as sample data")
+    parser.add_argument("--batch-size", type=int, default=20, help="Pieces in the batch-result payload")
+    parser.add_argument("--rounds", type=int, default=200, help="Timed encode/decode rounds per payload")
+    parser.add_argument("--output", default="benchmarks/results/serialization.json",
+                        help="Where to write machine-readable results")
+    return parser.parse_args()
+
+
+def configure_environment():
+    """Point the application at an instant fake backend before it is imported"""
+    os.environ["MOCK_API_CALLS"] = "True"
+    os.environ["AI_CACHE_ENABLED"] = "False"
+    os.environ["FAKE_API_LATENCY_MEDIAN_MS"] = "0"
+    os.environ["FAKE_API_LATENCY_P99_MS"] = "0"
+    os.environ["FAKE_IMAGE_LATENCY_MEDIAN_MS"] = "0"
+    os.environ["FAKE_IMAGE_LATENCY_P99_MS"] = "0"
+    os.environ["AI_RPM_LIMITS"] = "{}"
+    os.environ["AI_TPM_LIMITS"] = "{}"
+
+    # Required settings that the benchmark does not use
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/viralforge_benchmark.db")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent.parent,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+async def generate_pieces(count: int) -> List[Dict[str, Any]]:
+    from src.core.database import create_tables
+    from src.content_pipeline.generator import ContentGenerationFailure, get_content_generator
+
+    create_tables()  # API usage rows are flushed here during generation
+
+    pieces = []
+    async for result in get_content_generator().stream_content_pieces(count=count):
+        if not isinstance(result, ContentGenerationFailure):
+            pieces.append(result)
+    return pieces
+
+
+def build_payloads(pieces: List[Dict[str, Any]], batch_size: int) -> Dict[str, Any]:
+    """Payload shapes that travel through Celery and the caches"""
+    from src.core.models import ContentStatus, ContentType, Platform
+
+    batch = [pieces[i % len(pieces)] for i in range(batch_size)]
+    typed = {
+        **pieces[0],
+        "content_type": ContentType(pieces[0]["content_type"]),
+        "status": ContentStatus.GENERATED,
+        "platforms": [Platform.INSTAGRAM, Platform.TIKTOK],
+        "generated_at": datetime.utcnow(),
+        "scheduled_for": datetime.utcnow()
+    }
+    return {
+        "content_piece": pieces[0],
+        "batch_result": {"status": "batch_completed", "generated": len(batch), "results": batch},
+        "typed_piece": typed,
+        "task_message": [
+            [{"topic": piece["title"], "content_type": piece["content_type"], "location": piece["location"]}
+             for piece in batch],
+            {"aggregate": True},
+            {"callbacks": None, "errbacks": None, "chain": None, "chord": None}
+        ]
+    }
+
+
+def time_calls(func: Callable[[], Any], rounds: int) -> float:
+    """Median microseconds per call"""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1_000_000, 1)
+
+
+def bench_serializer(name: str, payload: Any, rounds: int) -> Dict[str, Any]:
+    from kombu.serialization import dumps, loads
+
+    try:
+        content_type, content_encoding, body = dumps(payload, serializer=name)
+        decoded = loads(body, content_type, content_encoding)
+    except Exception as e:
+        return {"serializer": name, "supported": False, "error": f"{type(e).__name__}: {e}"}
+
+    body_bytes = body if isinstance(body, bytes) else body.encode("utf-8")
+    return {
+        "serializer": name,
+        "supported": True,
+        "round_trips_types": decoded == payload,
+        "encode_us": time_calls(lambda: dumps(payload, serializer=name), rounds),
+        "decode_us": time_calls(lambda: loads(body, content_type, content_encoding), rounds),
+        "size_bytes": len(body_bytes),
+        "zlib_size_bytes": len(zlib.compress(body_bytes))
+    }
+
+
+def main():
+    args = parse_args()
+    configure_environment()
+
+    from src.core.config import get_settings
+    from src.core.serialization import available_serializers, register_serializers
+
+    register_serializers()
+    pieces = asyncio.run(generate_pieces(args.pieces))
+    payloads = build_payloads(pieces, args.batch_size)
+
+    results = []
+    for payload_name, payload in payloads.items():
+        for serializer in available_serializers():
+            result = {"payload": payload_name, **bench_serializer(serializer, payload, args.rounds)}
+            results.append(result)
+            if result["supported"]:
+                print(
+                    f"{payload_name:<15} {serializer:<11} encode={result['encode_us']:>8}us "
+                    f"decode={result['decode_us']:>8}us size={result['size_bytes']:>7}B "
+                    f"zlib={result['zlib_size_bytes']:>6}B types={'kept' if result['round_trips_types'] else 'lost'}"
+                )
+            else:
+                print(f"{payload_name:<15} {serializer:<11} unsupported ({result['error']})")
+
+    report = {
+        "benchmark": "serialization",
+        "app_version": get_settings().APP_VERSION,
+        "git_commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"pieces": len(pieces), "batch_size": args.batch_size, "rounds": args.rounds},
+        "results": results
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
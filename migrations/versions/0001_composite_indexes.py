@@ -0,0 +1,73 @@
+"""
+Composite indexes for the canonical queries
+
+Tables are created by create_tables() (scripts/setup.py), which also
+builds these indexes from the models; this migration brings databases
+created before them up to date, so every step checks first.
+On Postgres the indexes are built CONCURRENTLY outside the migration
+transaction so live tables are not locked for writes.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_content_items_user_id_status_created_at", "content_items", ["user_id", "status", "created_at"]),
+    ("ix_media_assets_content_item_id", "media_assets", ["content_item_id"]),
+    ("ix_posts_status_scheduled_at", "posts", ["status", "scheduled_at"]),
+    ("ix_post_analytics_post_id_last_updated", "post_analytics", ["post_id", "last_updated"]),
+    ("ix_api_usage_service_name_date", "api_usage", ["service_name", "date"]),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if "posts" not in tables:
+        # Empty database: create_tables() builds the current schema
+        return
+
+    # Added with the ETA post scheduler
+    if "schedule_version" not in {column["name"] for column in inspector.get_columns("posts")}:
+        with op.batch_alter_table("posts") as batch:
+            batch.add_column(sa.Column("schedule_version", sa.Integer(), server_default="0", nullable=False))
+
+    missing = [
+        (name, table, columns)
+        for name, table, columns in INDEXES
+        if table in tables and name not in _existing_indexes(inspector, table)
+    ]
+    if not missing:
+        return
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns in missing:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        for name, table, columns in missing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for name, table, _ in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,81 @@
+"""
+Hourly and daily analytics rollup tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("analytics_rollups_hourly", "analytics_rollups_daily")
+
+PLATFORMS = ("INSTAGRAM", "TIKTOK")
+CONTENT_TYPES = ("FACTS", "TRIVIA", "MEMES", "QUOTES", "LOCATION_CONTENT")
+
+
+def _rollup_columns():
+    return [
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("content_item_id", sa.Integer()),
+        sa.Column("social_account_id", sa.Integer()),
+        sa.Column("platform", sa.Enum(*PLATFORMS, name="platform", create_type=False)),
+        sa.Column("content_type", sa.Enum(*CONTENT_TYPES, name="contenttype", create_type=False)),
+        *[
+            sa.Column(metric, sa.Integer(), nullable=False, server_default="0")
+            for metric in (
+                "views", "likes", "comments", "shares", "saves",
+                "reach", "impressions", "engagements", "snapshots"
+            )
+        ],
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ]
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if "posts" not in tables:
+        # Empty database: create_tables() builds the current schema
+        return
+
+    for table in ROLLUP_TABLES:
+        if table in tables:
+            continue
+        op.create_table(
+            table,
+            *_rollup_columns(),
+            sa.UniqueConstraint("post_id", "bucket_start", name=f"uq_{table}_post_id_bucket_start")
+        )
+        op.create_index(f"ix_{table}_bucket_start", table, ["bucket_start"])
+
+    if "analytics_rollup_state" not in tables:
+        op.create_table(
+            "analytics_rollup_state",
+            sa.Column("name", sa.String(100), primary_key=True),
+            sa.Column("last_source_id", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    # Seed the watermark so concurrent first rollups lock a row instead of racing to insert it
+    state = sa.table("analytics_rollup_state", sa.column("name", sa.String), sa.column("last_source_id", sa.Integer))
+    bind = op.get_bind()
+    if bind.execute(sa.select(state.c.name).where(state.c.name == "post_analytics")).first() is None:
+        bind.execute(state.insert().values(name="post_analytics", last_source_id=0))
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "analytics_rollup_state" in tables:
+        op.drop_table("analytics_rollup_state")
+    for table in ROLLUP_TABLES:
+        if table in tables:
+            op.drop_table(table)
@@ -0,0 +1,30 @@
+"""
+PUBLISHING content status for posts claimed by publish_post
+
+The value is added to the Postgres enum type; SQLite stores enums as
+plain strings and needs no change.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block before Postgres 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE contentstatus ADD VALUE IF NOT EXISTS 'PUBLISHING' AFTER 'SCHEDULED'")
+
+
+def downgrade():
+    # Postgres cannot drop a value from an enum type; an unused one is harmless
+    pass
@@ -0,0 +1,355 @@
+"""
+Completion cache for AI service responses
+
+Identical requests (same model, messages and sampling parameters) are served
+from cache instead of going back to the provider. Three tiers are available:
+an in-process LRU, a local SQLite file and Redis. The persistent tiers are
+always fronted by the in-process LRU.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..core.config import get_settings, CacheBackend
+from ..core.serialization import dumps_payload, loads_payload
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def make_cache_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    """Build a canonical hash of model + messages + sampling parameters"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """Hit/miss/eviction counters for a cache tier"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class CompletionCache:
+    """Base class for completion cache tiers"""
+
+    name = "base"
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {self.name: self.stats.as_dict()}
+
+    def _expires_at(self) -> float:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else 0.0
+
+
+class MemoryCache(CompletionCache):
+    """In-process LRU cache with TTL"""
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at and expires_at < time.time():
+            del self._entries[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self._entries[key] = (self._expires_at(), value)
+        self._entries.move_to_end(key)
+        self.stats.sets += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def clear(self):
+        self._entries.clear()
+
+
+class SQLiteCache(CompletionCache):
+    """Local disk cache backed by SQLite, evicting least recently used rows"""
+
+    name = "sqlite"
+
+    # Expired and overflowing rows are trimmed every this many writes, so the
+    # table may briefly hold up to this many rows over max_entries
+    trim_every = 100
+
+    def __init__(self, ttl_seconds: int, max_entries: int, path: str):
+        super().__init__(ttl_seconds, max_entries)
+        self.path = path
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_completions_accessed_at ON completions (accessed_at)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a connection that is closed afterwards"""
+        with closing(sqlite3.connect(self.path, timeout=5)) as conn, conn:
+            yield conn
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at and expires_at < now:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self.stats.evictions += 1
+                return None
+            conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(value)
+
+    def _set(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), self._expires_at(), now)
+            )
+            self._writes += 1
+            if self._writes % self.trim_every == 1:
+                self._trim(conn, now)
+
+    def _trim(self, conn: sqlite3.Connection, now: float):
+        """Drop expired rows, then the least recently used ones beyond max_entries"""
+        conn.execute("DELETE FROM completions WHERE expires_at > 0 AND expires_at < ?", (now,))
+        overflow = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self.stats.evictions += overflow
+
+    def _clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM completions")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = await asyncio.to_thread(self._get, key)
+        except Exception as e:
+            logger.error(f"SQLite cache read failed: {e}")
+            self.stats.errors += 1
+            value = None
+
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        try:
+            await asyncio.to_thread(self._set, key, value)
+            self.stats.sets += 1
+        except Exception as e:
+            logger.error(f"SQLite cache write failed: {e}")
+            self.stats.errors += 1
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+
+class RedisCache(CompletionCache):
+    """Shared cache in Redis; TTL is native and size is bounded by an LRU index"""
+
+    name = "redis"
+
+    def __init__(self, ttl_seconds: int, max_entries: int, url: str, prefix: str = "viralforge:completions"):
+        super().__init__(ttl_seconds, max_entries)
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+        self.index_key = f"{prefix}:lru"
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.redis.get(self._key(key))
+            if raw is None:
+                self.stats.misses += 1
+                return None
+            await self.redis.zadd(self.index_key, {key: time.time()})
+            self.stats.hits += 1
+            return loads_payload(raw)
+        except Exception as e:
+            logger.error(f"Redis cache read failed: {e}")
+            self.stats.errors += 1
+            self.stats.misses += 1
+            return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(self._key(key), dumps_payload(value), ex=self.ttl_seconds or None)
+                pipe.zadd(self.index_key, {key: time.time()})
+                pipe.zcard(self.index_key)
+                results = await pipe.execute()
+            self.stats.sets += 1
+
+            overflow = results[-1] - self.max_entries
+            if overflow > 0:
+                stale = await self.redis.zpopmin(self.index_key, overflow)
+                if stale:
+                    await self.redis.delete(*[self._key(member.decode()) for member, _ in stale])
+                    self.stats.evictions += len(stale)
+        except Exception as e:
+            logger.error(f"Redis cache write failed: {e}")
+            self.stats.errors += 1
+
+    async def clear(self):
+        members = await self.redis.zrange(self.index_key, 0, -1)
+        if members:
+            await self.redis.delete(*[self._key(member.decode()) for member in members])
+        await self.redis.delete(self.index_key)
+
+
+class TieredCache(CompletionCache):
+    """In-process LRU in front of a persistent tier"""
+
+    name = "tiered"
+
+    def __init__(self, local: MemoryCache, remote: CompletionCache):
+        super().__init__(remote.ttl_seconds, remote.max_entries)
+        self.local = local
+        self.remote = remote
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self.local.get(key)
+        if value is None:
+            value = await self.remote.get(key)
+            if value is not None:
+                await self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        await self.local.set(key, value)
+        await self.remote.set(key, value)
+
+    async def clear(self):
+        await self.local.clear()
+        await self.remote.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.local.get_stats(), **self.remote.get_stats()}
+
+
+class NullCache(CompletionCache):
+    """Cache that never stores anything (caching disabled)"""
+
+    name = "disabled"
+
+    def __init__(self):
+        super().__init__(0, 0)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        pass
+
+    async def clear(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {}
+
+
+def create_completion_cache() -> CompletionCache:
+    """Build the completion cache configured in settings"""
+    if not settings.AI_CACHE_ENABLED:
+        return NullCache()
+
+    ttl = settings.AI_CACHE_TTL_SECONDS
+    local = MemoryCache(ttl, settings.AI_CACHE_MEMORY_MAX_ENTRIES)
+
+    try:
+        if settings.AI_CACHE_BACKEND == CacheBackend.SQLITE:
+            return TieredCache(local, SQLiteCache(ttl, settings.AI_CACHE_MAX_ENTRIES, settings.AI_CACHE_SQLITE_PATH))
+        if settings.AI_CACHE_BACKEND == CacheBackend.REDIS:
+            return TieredCache(local, RedisCache(ttl, settings.AI_CACHE_MAX_ENTRIES, settings.REDIS_URL))
+    except Exception as e:
+        logger.error(f"Failed to initialize {settings.AI_CACHE_BACKEND.value} completion cache, using memory: {e}")
+
+    return local
@@ -0,0 +1,289 @@
+"""
+Fake OpenAI backend for local runs, load tests and benchmarks
+
+FakeAsyncOpenAI is a drop-in for the parts of openai.AsyncOpenAI that
+OpenAIService uses (chat completions, streaming, DALL-E images). It returns
+schema-valid responses for every content prompt, samples latency from a
+log-normal distribution fitted to a median and p99, and can inject 5xx
+errors and 429s so tail latency and retry behaviour can be reproduced
+without network access or spend.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import openai
+from openai.types import CompletionUsage, Image, ImagesResponse
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+from ..core.config import get_settings
+
+settings = get_settings()
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z_P99 = 2.3263
+
+_CONTENT_TEMPLATES = {
+    "facts": lambda topic: {
+        "title": f"You won't believe this about {topic}",
+        "script": f"Here is a fact about {topic} that most people never hear. " * 3,
+        "fact": f"A surprising fact about {topic}.",
+        "description": f"A fascinating fact about {topic}",
+        "sources": ["https://example.com/source"]
+    },
+    "trivia": lambda topic: {
+        "title": f"Can you answer this {topic} question?",
+        "question": f"What is the most surprising thing about {topic}?",
+        "answer": f"The answer about {topic}, with an explanation.",
+        "script": f"Time for some {topic} trivia. Think you know the answer? " * 3,
+        "description": f"Trivia about {topic}"
+    },
+    "memes": lambda topic: {
+        "title": f"When {topic} hits different",
+        "script": f"Nobody: ... Me dealing with {topic}: " * 3,
+        "concept": f"Split-screen reaction shot about {topic}",
+        "description": f"A relatable meme about {topic}",
+        "humor_type": "observational"
+    },
+    "quotes": lambda topic: {
+        "title": f"On {topic}",
+        "quote": f"Every step toward {topic} is a step toward yourself.",
+        "author": "Original",
+        "script": f"Let this thought about {topic} sink in. " * 3,
+        "description": f"An inspiring quote about {topic}",
+        "context": f"Reflections on {topic}"
+    },
+    "location_content": lambda topic: {
+        "title": f"The secret side of {topic}",
+        "script": f"Most visitors miss this about {topic}. " * 3,
+        "location_fact": f"A little-known fact about {topic}.",
+        "description": f"Local insight: {topic}",
+        "travel_tip": "Go early in the morning to avoid crowds."
+    }
+}
+
+
+class FakeLatency:
+    """Log-normal latency sampler parameterised by median and p99 (milliseconds)"""
+
+    def __init__(self, median_ms: float, p99_ms: float, rng: random.Random):
+        self.median_ms = max(median_ms, 0.0)
+        self.sigma = math.log(max(p99_ms, median_ms, 1e-3) / max(median_ms, 1e-3)) / _Z_P99
+        self.rng = rng
+
+    def sample(self) -> float:
+        """Latency in seconds"""
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(self.rng.gauss(0.0, self.sigma)) / 1000.0
+
+
+class FakeAsyncOpenAI:
+    """In-process stand-in for openai.AsyncOpenAI"""
+
+    def __init__(
+        self,
+        latency_median_ms: float = 400.0,
+        latency_p99_ms: float = 2500.0,
+        image_latency_median_ms: float = 4000.0,
+        image_latency_p99_ms: float = 12000.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.rng = random.Random(seed)
+        self.chat_latency = FakeLatency(latency_median_ms, latency_p99_ms, self.rng)
+        self.image_latency = FakeLatency(image_latency_median_ms, image_latency_p99_ms, self.rng)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.calls: Counter = Counter()
+
+        self.chat = _FakeChat(self)
+        self.images = _FakeImages(self)
+
+    def reset_stats(self):
+        self.calls.clear()
+
+    async def _simulate(self, endpoint: str, latency: FakeLatency) -> float:
+        """Count the call, wait for the sampled latency and inject failures"""
+        self.calls[endpoint] += 1
+        delay = latency.sample()
+
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            # Real 429s come back fast
+            await asyncio.sleep(min(delay, 0.05))
+            self.calls[f"{endpoint}:429"] += 1
+            retry_after = max(1, int(self.rng.uniform(1, 5)))
+            raise openai.RateLimitError(
+                "Rate limit reached (fake backend)",
+                response=_fake_response(429, endpoint, {"retry-after": str(retry_after)}),
+                body=None
+            )
+
+        await asyncio.sleep(delay)
+
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.calls[f"{endpoint}:500"] += 1
+            raise openai.InternalServerError(
+                "Internal server error (fake backend)",
+                response=_fake_response(500, endpoint),
+                body=None
+            )
+
+        return delay
+
+
+class _FakeChat:
+    def __init__(self, client: FakeAsyncOpenAI):
+        self.completions = _FakeChatCompletions(client)
+
+
+class _FakeChatCompletions:
+    def __init__(self, client: FakeAsyncOpenAI):
+        self.client = client
+
+    async def create(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        stream: bool = False,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ):
+        content = _fake_chat_content(messages, response_format)
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages) // 4
+        completion_tokens = len(content) // 4
+
+        if stream:
+            return self._stream(model, content)
+
+        await self.client._simulate("chat.completions", self.client.chat_latency)
+        return ChatCompletion(
+            id=f"chatcmpl-fake-{uuid.uuid4().hex[:12]}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason="stop",
+                    message=ChatCompletionMessage(role="assistant", content=content)
+                )
+            ],
+            usage=CompletionUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
+
+    async def _stream(self, model: str, content: str) -> AsyncIterator[ChatCompletionChunk]:
+        # Time to first token is a fraction of the sampled latency; the rest is spread over the chunks
+        total = self.client.chat_latency.sample()
+        self.client.calls["chat.completions"] += 1
+        await asyncio.sleep(total * 0.2)
+
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        per_piece = total * 0.8 / len(pieces)
+        chunk_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+
+        for piece in pieces:
+            yield ChatCompletionChunk(
+                id=chunk_id,
+                object="chat.completion.chunk",
+                created=int(time.time()),
+                model=model,
+                choices=[ChunkChoice(index=0, delta=ChoiceDelta(content=piece), finish_reason=None)]
+            )
+            await asyncio.sleep(per_piece)
+
+
+class _FakeImages:
+    def __init__(self, client: FakeAsyncOpenAI):
+        self.client = client
+
+    async def generate(self, prompt: str, model: str = "dall-e-3", size: str = "1024x1024", **kwargs: Any) -> ImagesResponse:
+        await self.client._simulate("images.generate", self.client.image_latency)
+        image_id = uuid.uuid4().hex
+        return ImagesResponse(
+            created=int(time.time()),
+            data=[
+                Image(
+                    url=f"https://fake-images.viralforge.local/{model}/{size}/{image_id}.png",
+                    revised_prompt=prompt[:1000]
+                )
+            ]
+        )
+
+
+def _fake_response(status_code: int, endpoint: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    request = httpx.Request("POST", f"https://fake.openai.local/v1/{endpoint.replace('.', '/')}")
+    return httpx.Response(status_code, request=request, headers=headers or {})
+
+
+def _fake_chat_content(messages: List[Dict[str, Any]], response_format: Optional[Dict[str, Any]]) -> str:
+    """Produce a response shaped like what each OpenAIService prompt asks for"""
+    system = next((str(m.get("content", "")) for m in messages if m.get("role") == "system"), "")
+    prompt = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+
+    content_match = re.search(r"Create (\w+) content about: (.+)", prompt)
+    if content_match:
+        content_type, topic = content_match.group(1), content_match.group(2).strip()
+        template = _CONTENT_TEMPLATES.get(content_type, _CONTENT_TEMPLATES["facts"])
+        content = template(topic)
+
+        if '"captions"' in prompt:
+            platforms = re.findall(r'"(\w+)": "\w+ caption', prompt) or ["instagram", "tiktok"]
+            return json.dumps({
+                "content": content,
+                "hashtags": _fake_hashtags(topic, 20),
+                "captions": {platform: f"Wait for it... {content['title']}\n\nFollow for more!" for platform in platforms},
+                "image_prompt": f"Vibrant, high-contrast vertical illustration of {topic}, no text"
+            })
+        return json.dumps(content)
+
+    hashtag_match = re.search(r"Generate (\d+) relevant hashtags", prompt)
+    if hashtag_match:
+        return "\n".join(f"#{tag}" for tag in _fake_hashtags(prompt, int(hashtag_match.group(1))))
+
+    if "visual prompts" in system:
+        return "Vibrant, high-contrast vertical illustration, cinematic lighting, no text overlays"
+
+    if "caption" in prompt:
+        return "Wait for it... 👀\n\nYou'll want to save this one.\n\nFollow for more!"
+
+    if response_format and response_format.get("type") == "json_object":
+        return json.dumps({"result": "ok"})
+
+    return "Fake response."
+
+
+def _fake_hashtags(seed_text: str, count: int) -> List[str]:
+    words = [word.lower() for word in re.findall(r"[A-Za-z]{4,}", seed_text)][:5]
+    base = words + ["viral", "fyp", "didyouknow", "explore", "trending", "learnontiktok", "facts", "mindblown"]
+    return [f"{tag}{i // len(base) or ''}" for i, tag in enumerate(base * (count // len(base) + 1))][:count]
+
+
+def create_fake_openai_client(seed: Optional[int] = None) -> FakeAsyncOpenAI:
+    """Build a fake client configured from settings"""
+    return FakeAsyncOpenAI(
+        latency_median_ms=settings.FAKE_API_LATENCY_MEDIAN_MS,
+        latency_p99_ms=settings.FAKE_API_LATENCY_P99_MS,
+        image_latency_median_ms=settings.FAKE_IMAGE_LATENCY_MEDIAN_MS,
+        image_latency_p99_ms=settings.FAKE_IMAGE_LATENCY_P99_MS,
+        error_rate=settings.FAKE_API_ERROR_RATE,
+        rate_limit_rate=settings.FAKE_API_RATE_LIMIT_RATE,
+        seed=seed if seed is not None else settings.FAKE_API_SEED
+    )
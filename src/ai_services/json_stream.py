@@ -0,0 +1,164 @@
+"""
+Incremental parsing of streamed JSON completions
+
+Extracts top-level string fields from a JSON object while it is still being
+generated, so partial values (e.g. the title, then the script) can be shown
+before the completion finishes.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+class IncrementalJSONFieldParser:
+    """
+    Streaming scanner for the top-level string fields of a JSON object.
+
+    feed() returns events as text arrives:
+    - {"event": "field_delta", "field": name, "delta": text}
+    - {"event": "field", "field": name, "value": full_text}
+
+    Nested values and non-string fields are skipped; call result() at the end
+    to parse the complete document.
+    """
+
+    def __init__(self):
+        self.buffer: List[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_is_key = False
+        self.expecting_key = False
+        self.current_key: Optional[str] = None
+        self.raw_string: List[str] = []
+        self.emitted = ""
+        self.fields: Dict[str, str] = {}
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of the completion and return any new field events"""
+        events: List[Dict[str, Any]] = []
+        self.buffer.append(chunk)
+
+        for char in chunk:
+            if self.in_string:
+                self._feed_string_char(char, events)
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_is_key = self.depth == 1 and self.expecting_key
+                self.raw_string = []
+                self.emitted = ""
+            elif char in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.expecting_key = True
+            elif char in "}]":
+                self.depth -= 1
+            elif self.depth == 1 and char == ":":
+                self.expecting_key = False
+            elif self.depth == 1 and char == ",":
+                self.expecting_key = True
+                self.current_key = None
+
+        if self._streaming_value():
+            self._emit_delta(events, closed=False)
+
+        return events
+
+    def _feed_string_char(self, char: str, events: List[Dict[str, Any]]):
+        if self.escape:
+            self.escape = False
+            self.raw_string.append(char)
+            return
+
+        if char == "\\":
+            self.escape = True
+            self.raw_string.append(char)
+            return
+
+        if char != '"':
+            self.raw_string.append(char)
+            return
+
+        # Closing quote
+        if self.string_is_key:
+            self.current_key = self._decode("".join(self.raw_string))
+        elif self._streaming_value():
+            self._emit_delta(events, closed=True)
+            value = self._decode("".join(self.raw_string))
+            self.fields[self.current_key] = value
+            events.append({"event": "field", "field": self.current_key, "value": value})
+        self.in_string = False
+
+    def _streaming_value(self) -> bool:
+        """Whether the open string is the value of a top-level field"""
+        return (
+            self.in_string
+            and not self.string_is_key
+            and self.depth == 1
+            and self.current_key is not None
+            and not self.expecting_key
+        )
+
+    def _emit_delta(self, events: List[Dict[str, Any]], closed: bool):
+        raw = "".join(self.raw_string)
+        if not closed:
+            raw = self._complete_escapes(raw)
+
+        decoded = self._decode(raw)
+        if decoded is None or len(decoded) <= len(self.emitted):
+            return
+
+        events.append({
+            "event": "field_delta",
+            "field": self.current_key,
+            "delta": decoded[len(self.emitted):]
+        })
+        self.emitted = decoded
+
+    @staticmethod
+    def _complete_escapes(raw: str) -> str:
+        """Drop a trailing escape sequence that has not fully arrived yet"""
+        backslash = raw.rfind("\\")
+        if backslash == -1:
+            return raw
+
+        # Count consecutive backslashes to tell "\\" apart from an open escape
+        start = backslash
+        while start > 0 and raw[start - 1] == "\\":
+            start -= 1
+        if (backslash - start + 1) % 2 == 0:
+            return raw
+
+        tail = raw[backslash:]
+        incomplete = len(tail) < 2 or (tail[1] == "u" and len(tail) < 6)
+        # A high surrogate needs its low surrogate before it can be decoded
+        if not incomplete and tail[1] == "u" and 0xD800 <= int(tail[2:6], 16) <= 0xDBFF:
+            incomplete = len(tail) < 12
+        if incomplete:
+            return IncrementalJSONFieldParser._complete_escapes(raw[:backslash])
+        return raw
+
+    @staticmethod
+    def _decode(raw: str) -> Optional[str]:
+        try:
+            return json.loads(f'"{raw}"')
+        except (json.JSONDecodeError, ValueError):
+            return None
+
+    def text(self) -> str:
+        """Full text received so far"""
+        return "".join(self.buffer)
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Parse the complete document (None if it is not a JSON object)"""
+        text = self.text()
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            data = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
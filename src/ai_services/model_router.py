@@ -0,0 +1,323 @@
+"""
+Model router: picks a provider and model per call type
+
+Each call type ("script", "hashtags", "image", ...) has an ordered list of
+"provider:model" candidates in AI_ROUTES. Candidates are ranked by rolling
+latency, error rate and price; a failing call moves on to the next healthy
+candidate, and a per-route circuit breaker takes a degraded provider out of
+rotation until a probe request succeeds again.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from ..core.config import get_settings
+from .providers import Provider
+from .resilience import DeadlineExceeded, is_retryable, remaining_time, status_code_of
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Weight of the newest sample in the rolling averages
+EWMA_ALPHA = 0.2
+
+# How much a 100% error rate inflates a route's effective latency
+ERROR_PENALTY = 4.0
+
+# Besides transient errors, a bad key, missing access or unknown model fails over;
+# other client errors (e.g. a rejected prompt) would fail on any route and are raised
+FAILOVER_STATUS_CODES = {401, 403, 404}
+
+
+class NoRouteAvailable(Exception):
+    """Every candidate for a call type is unconfigured or has an open circuit"""
+
+    # Treated like a provider 503 so the resilience layer retries after backoff
+    status_code = 503
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after repeated failures -> half-open probe after a cool-down
+
+    A probe that reports no outcome within `probe_timeout` is considered lost
+    and the next request may probe again, so a lost probe cannot leave the
+    circuit half-open for good.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float, probe_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self.times_opened = 0
+
+    def is_available(self) -> bool:
+        """Whether a request may be sent now (without claiming the probe slot)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.recovery_seconds
+        return time.monotonic() - self.probe_started_at >= self.probe_timeout
+
+    def allow(self) -> bool:
+        """Claim permission to send a request; an expired open circuit admits one probe"""
+        if self.state != self.CLOSED and self.is_available():
+            self.state = self.HALF_OPEN
+            self.probe_started_at = time.monotonic()
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.trip()
+
+    def record_abandoned(self):
+        """A request ended without an outcome (cancelled, deadline); an unfinished probe re-opens the circuit"""
+        if self.state == self.HALF_OPEN:
+            self.trip()
+
+    def trip(self):
+        if self.state != self.OPEN:
+            self.times_opened += 1
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+
+class Route:
+    """One provider/model candidate with its health statistics"""
+
+    def __init__(self, provider: Provider, model: str, price: float, breaker: CircuitBreaker):
+        self.provider = provider
+        self.model = model
+        self.price = price
+        self.breaker = breaker
+
+        self.calls = 0
+        self.failures = 0
+        self.error_rate = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider.name}:{self.model}"
+
+
+class ModelRouter:
+    """Ranks candidate routes per call type and fails over between them"""
+
+    def __init__(
+        self,
+        providers: Dict[str, Provider],
+        routes: Dict[str, List[str]],
+        pricing: Dict[str, float],
+        request_timeout: float,
+        cost_weight: float,
+        failure_threshold: int,
+        error_rate_threshold: float,
+        recovery_seconds: float,
+        min_samples: int = 10
+    ):
+        self.request_timeout = request_timeout
+        self.cost_weight = cost_weight
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+
+        # Health is shared by every call type using a route; latency is per call type
+        self._routes: Dict[str, Route] = {}
+        self._candidates: Dict[str, List[Route]] = {}
+        self._latency: Dict[str, float] = {}
+
+        for call_type, candidates in routes.items():
+            self._candidates[call_type] = []
+            for candidate in candidates:
+                provider_name, _, model = candidate.partition(":")
+                provider = providers.get(provider_name)
+                if provider is None or not model:
+                    logger.debug(f"Skipping route {candidate} for {call_type}: provider not configured")
+                    continue
+                route = self._routes.get(candidate)
+                if route is None:
+                    route = self._routes[candidate] = Route(
+                        provider=provider,
+                        model=model,
+                        price=pricing.get(model, 0.0),
+                        # An attempt never outlives request_timeout, so an older probe was lost
+                        breaker=CircuitBreaker(failure_threshold, recovery_seconds, probe_timeout=2 * request_timeout)
+                    )
+                self._candidates[call_type].append(route)
+
+    def candidates(self, call_type: str) -> List[Route]:
+        """Configured routes for a call type, in preference order"""
+        routes = self._candidates.get(call_type)
+        if routes is None:
+            routes = self._candidates.get("default", [])
+        return routes
+
+    def score(self, call_type: str, route: Route) -> Optional[float]:
+        """Effective cost in seconds (None until the route has latency samples)"""
+        latency = self._latency.get(f"{call_type}|{route.key}")
+        if latency is None:
+            return None
+        return latency * (1 + ERROR_PENALTY * route.error_rate) + self.cost_weight * route.price
+
+    def rank(self, call_type: str, streaming: bool = False) -> List[Route]:
+        """
+        Candidates ordered best first.
+
+        Routes with samples are ordered by score; routes without samples keep
+        their configured order behind them, so a fallback only takes traffic
+        once it has proven itself during a failover.
+        """
+        routes = [
+            route for route in self.candidates(call_type)
+            if not streaming or route.provider.supports_streaming
+        ]
+        positions = {route.key: index for index, route in enumerate(routes)}
+
+        def sort_key(route: Route):
+            score = self.score(call_type, route)
+            return (score is None, score or 0.0, positions[route.key])
+
+        # The configured first choice is never ranked below an unproven route
+        ranked = sorted(routes, key=sort_key)
+        if routes and self.score(call_type, routes[0]) is None:
+            ranked.remove(routes[0])
+            ranked.insert(0, routes[0])
+        return ranked
+
+    def preferred_model(self, call_type: str) -> Optional[str]:
+        """Model the next healthy call of this type would go to"""
+        for route in self.rank(call_type):
+            if route.breaker.is_available():
+                return route.model
+        return None
+
+    def attempt_timeout(self, call_type: str) -> float:
+        """Time budget for one routed attempt, allowing a failover to every candidate"""
+        return self.request_timeout * max(1, len(self.candidates(call_type)))
+
+    async def execute(
+        self,
+        call_type: str,
+        func: Callable[[Route], Awaitable[T]],
+        streaming: bool = False
+    ) -> T:
+        """
+        Run `func(route)` on the best available route, failing over to the
+        next candidate on transient, auth or unknown-model errors. Raises the
+        last error if every route fails.
+        """
+        last_error: Optional[Exception] = None
+
+        for route in self.rank(call_type, streaming=streaming):
+            if not route.breaker.allow():
+                continue
+
+            timeout = self.request_timeout
+            remaining = remaining_time()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"Deadline passed before {call_type} could be routed")
+                timeout = min(timeout, remaining)
+
+            started = time.monotonic()
+            recorded = False
+            try:
+                result = await asyncio.wait_for(func(route), timeout=timeout)
+                self._record_success(call_type, route, time.monotonic() - started)
+                recorded = True
+                return result
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if not (
+                    is_retryable(e)
+                    or status_code_of(e) in FAILOVER_STATUS_CODES
+                    or isinstance(e, NotImplementedError)
+                ):
+                    # The provider answered; the request itself was bad
+                    route.breaker.record_success()
+                    recorded = True
+                    raise
+                self._record_failure(route)
+                recorded = True
+                last_error = e
+                logger.warning(f"{call_type} via {route.key} failed ({type(e).__name__}: {e}), failing over")
+                continue
+            finally:
+                if not recorded:
+                    # Cancelled (hedge loser, stage cancellation) or out of deadline
+                    route.breaker.record_abandoned()
+
+        if last_error is not None:
+            raise last_error
+        raise NoRouteAvailable(f"No available route for {call_type}")
+
+    def _record_success(self, call_type: str, route: Route, latency: float):
+        route.calls += 1
+        route.error_rate *= 1 - EWMA_ALPHA
+        route.breaker.record_success()
+
+        key = f"{call_type}|{route.key}"
+        previous = self._latency.get(key)
+        self._latency[key] = latency if previous is None else previous + EWMA_ALPHA * (latency - previous)
+
+    def _record_failure(self, route: Route):
+        route.calls += 1
+        route.failures += 1
+        route.error_rate += EWMA_ALPHA * (1 - route.error_rate)
+        route.breaker.record_failure()
+        if route.calls >= self.min_samples and route.error_rate >= self.error_rate_threshold:
+            route.breaker.trip()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "routes": {
+                key: {
+                    "state": route.breaker.state,
+                    "calls": route.calls,
+                    "failures": route.failures,
+                    "error_rate": round(route.error_rate, 3),
+                    "times_opened": route.breaker.times_opened
+                }
+                for key, route in self._routes.items()
+            },
+            "latency_ms": {
+                key: round(latency * 1000, 1)
+                for key, latency in self._latency.items()
+            },
+            "preferred": {
+                call_type: self.preferred_model(call_type)
+                for call_type in self._candidates
+            }
+        }
+
+
+def create_model_router(providers: Dict[str, Provider]) -> ModelRouter:
+    """Build the model router from settings"""
+    return ModelRouter(
+        providers=providers,
+        routes=settings.AI_ROUTES,
+        pricing=settings.AI_MODEL_PRICING,
+        request_timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+        cost_weight=settings.AI_ROUTING_COST_WEIGHT,
+        failure_threshold=settings.AI_CIRCUIT_FAILURE_THRESHOLD,
+        error_rate_threshold=settings.AI_CIRCUIT_ERROR_RATE,
+        recovery_seconds=settings.AI_CIRCUIT_RECOVERY_SECONDS
+    )
@@ -1,16 +1,28 @@
 """
 OpenAI service integration for content generation and DALL-E image creation
+
+Calls are routed per call type through the model router, so cheap stages can
+run on a smaller model and a degraded provider fails over to another.
 """
 
 import openai
 import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import json
 
 from ..core.config import get_settings
 from ..core.models import ContentType
+from .cache import create_completion_cache, make_cache_key
+from .rate_limiter import create_rate_limiter, estimate_tokens
+from .resilience import create_resilient_caller
+from ..core.singleflight import create_singleflight
+from ..core.async_runtime import get_http_client
+from .json_stream import IncrementalJSONFieldParser
+from .model_router import create_model_router
+from .providers import create_providers
+from .usage_recorder import get_usage_recorder, PER_UNIT_MODELS
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +38,25 @@ class OpenAIService:
     """OpenAI integration service for content generation"""
     
     def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        if settings.MOCK_API_CALLS:
+            from .fake_openai import create_fake_openai_client
+            
+            logger.warning("MOCK_API_CALLS enabled - using the fake OpenAI backend")
+            self.client = create_fake_openai_client()
+        else:
+            # Retries are handled by self.resilience, which also knows about deadlines
+            self.client = openai.AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                max_retries=0,
+                timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+                http_client=get_http_client()
+            )
+        self.providers = create_providers(self.client)
+        self.router = create_model_router(self.providers)
+        self.cache = create_completion_cache()
+        self.rate_limiter = create_rate_limiter()
+        self.resilience = create_resilient_caller()
+        self.singleflight = create_singleflight("completions")
     
     async def generate_content_script(
         self,
@@ -40,13 +70,131 @@ class OpenAIService:
         Generate content script using GPT-4
         """
         try:
-            # Build the prompt based on content type
+            messages, params = self._build_script_request(
+                content_type, topic, target_audience, duration_seconds, location
+            )
+            
+            content_text = await self._chat_completion(
+                call_type="script",
+                messages=messages,
+                operation_type=content_type.value,
+                **params
+            )
+            
+            return self._parse_script_response(content_text, content_type, topic)
+            
+        except Exception as e:
+            logger.error(f"Failed to generate content script: {e}")
+            raise
+    
+    async def stream_content_script(
+        self,
+        content_type: ContentType,
+        topic: str,
+        target_audience: Dict[str, Any],
+        duration_seconds: int = 30,
+        location: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream content script generation.
+        
+        Yields "field_delta" / "field" events for top-level string fields
+        (title first, then script) as tokens arrive, followed by a "complete"
+        event carrying the same dict generate_content_script would return.
+        """
+        messages, params = self._build_script_request(
+            content_type, topic, target_audience, duration_seconds, location
+        )
+        cache_key = make_cache_key("script", messages, params)
+        
+        try:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                content_data = self._parse_script_response(cached["content"], content_type, topic)
+                for field, value in content_data.items():
+                    if isinstance(value, str):
+                        yield {"event": "field", "field": field, "value": value}
+                yield {"event": "complete", "content": content_data}
+                return
+            
+            estimated_tokens = estimate_tokens(messages, params["max_tokens"])
+            
+            async def open_stream(route):
+                await self.rate_limiter.acquire(route.model, estimated_tokens)
+                deltas = await route.provider.stream_chat(route.model, messages, **params)
+                return route, deltas
+            
+            # Only opening the stream is retried; once tokens flow a failure is final
+            route, deltas = await self.resilience.call(
+                f"{content_type.value}_stream",
+                lambda: self.router.execute("script", open_stream, streaming=True),
+                hedge=False,
+                timeout=self.router.attempt_timeout("script")
+            )
+            
+            parser = IncrementalJSONFieldParser()
+            async for delta in deltas:
+                for event in parser.feed(delta):
+                    yield event
+            
+            content_text = parser.text()
+            # Streamed responses carry no usage block, so use the estimate
+            total_tokens = estimate_tokens(messages) + len(content_text) // 4
+            await self.rate_limiter.settle(route.model, estimated_tokens, total_tokens)
+            await self.cache.set(cache_key, {"content": content_text, "total_tokens": total_tokens})
+            await self._track_api_usage(route.model, total_tokens, content_type.value, route.provider.name)
+            
+            yield {
+                "event": "complete",
+                "content": self._parse_script_response(content_text, content_type, topic)
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to stream content script: {e}")
+            raise
+    
+    async def generate_fused_content(
+        self,
+        content_type: ContentType,
+        topic: str,
+        target_audience: Dict[str, Any],
+        duration_seconds: int = 30,
+        location: Optional[str] = None,
+        platforms: Optional[List[str]] = None,
+        max_hashtags: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Generate script, hashtags, per-platform captions and the image prompt
+        in a single structured completion.
+        
+        Returns a dict with "content", "hashtags", "captions" and "image_prompt";
+        any field that is missing or fails validation is None so the caller can
+        fall back to the single-purpose method for it.
+        """
+        platforms = platforms or ["instagram", "tiktok"]
+        
+        try:
             prompt = self._build_content_prompt(
                 content_type, topic, target_audience, duration_seconds, location
             )
+            caption_fields = ", ".join(
+                f'"{platform}": "{platform} caption with a hook in the first line and a call-to-action"'
+                for platform in platforms
+            )
+            prompt += f"""
+            
+            Additionally, in the same response, produce the assets for publishing this content.
+            Return a single JSON object with exactly these keys:
+            {{
+                "content": <the JSON object described above>,
+                "hashtags": [up to {max_hashtags} relevant hashtags without the # sign, mix of popular and niche],
+                "captions": {{{caption_fields}}},
+                "image_prompt": "Detailed DALL-E prompt for a 9:16 image complementing the content, no text overlays, vibrant, safe for all audiences"
+            }}
+            """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
+            response_text = await self._chat_completion(
+                call_type="fused",
                 messages=[
                     {
                         "role": "system",
@@ -57,35 +205,23 @@ class OpenAIService:
                         "content": prompt
                     }
                 ],
-                max_tokens=800,
+                operation_type=f"{content_type.value}_fused",
+                max_tokens=1600,
                 temperature=0.8,
-                top_p=0.9
+                top_p=0.9,
+                response_format={"type": "json_object"}
             )
             
-            content_text = response.choices[0].message.content
-            
-            # Parse structured response if JSON format
             try:
-                content_data = json.loads(content_text)
+                data = json.loads(response_text)
             except json.JSONDecodeError:
-                # Fallback to plain text
-                content_data = {
-                    "script": content_text,
-                    "title": topic,
-                    "description": f"AI-generated {content_type.value} content"
-                }
-            
-            # Track API usage
-            await self._track_api_usage(
-                "gpt-4o",
-                response.usage.total_tokens,
-                content_type.value
-            )
+                logger.warning("Fused generation returned invalid JSON, falling back per field")
+                data = {}
             
-            return content_data
+            return self._validate_fused_response(data, platforms, max_hashtags)
             
         except Exception as e:
-            logger.error(f"Failed to generate content script: {e}")
+            logger.error(f"Failed to generate fused content: {e}")
             raise
     
     async def generate_image_prompt(
@@ -114,8 +250,8 @@ class OpenAIService:
             Provide only the DALL-E prompt, no additional text.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
+            image_prompt = await self._chat_completion(
+                call_type="image_prompt",
                 messages=[
                     {
                         "role": "system",
@@ -126,11 +262,12 @@ class OpenAIService:
                         "content": prompt
                     }
                 ],
+                operation_type="image_prompt",
                 max_tokens=200,
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return image_prompt.strip()
             
         except Exception as e:
             logger.error(f"Failed to generate image prompt: {e}")
@@ -143,26 +280,31 @@ class OpenAIService:
         quality: str = "hd"
     ) -> Dict[str, Any]:
         """
-        Generate image using DALL-E 3
+        Generate image using DALL-E 3 (or the next route in AI_ROUTES["image"])
         """
         try:
-            response = await self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size=size,
-                quality=quality,
-                n=1
+            async def request(route):
+                await self.rate_limiter.acquire(route.model)
+                return await route.provider.generate_image(route.model, prompt, size, quality)
+            
+            result = await self.resilience.call(
+                "image_generation",
+                lambda: self.router.execute("image", request),
+                hedge=False,
+                timeout=self.router.attempt_timeout("image")
             )
             
             image_data = {
-                "url": response.data[0].url,
-                "revised_prompt": response.data[0].revised_prompt,
+                "url": result.url,
+                "revised_prompt": result.revised_prompt,
                 "size": size,
-                "quality": quality
+                "quality": quality,
+                "model": result.model,
+                "provider": result.provider
             }
             
             # Track API usage
-            await self._track_api_usage("dall-e-3", 1, "image_generation")
+            await self._track_api_usage(result.model, 1, "image_generation", result.provider)
             
             return image_data
             
@@ -195,8 +337,8 @@ class OpenAIService:
             Return only the hashtags, one per line.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
+            hashtags_text = await self._chat_completion(
+                call_type="hashtags",
                 messages=[
                     {
                         "role": "system",
@@ -207,11 +349,11 @@ class OpenAIService:
                         "content": prompt
                     }
                 ],
+                operation_type="hashtags",
                 max_tokens=400,
                 temperature=0.6
             )
             
-            hashtags_text = response.choices[0].message.content
             hashtags = [
                 tag.strip().replace("#", "")
                 for tag in hashtags_text.split("\n")
@@ -254,8 +396,8 @@ class OpenAIService:
             Return only the caption text.
             """
             
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
+            caption = await self._chat_completion(
+                call_type="caption",
                 messages=[
                     {
                         "role": "system",
@@ -266,16 +408,164 @@ class OpenAIService:
                         "content": prompt
                     }
                 ],
+                operation_type="caption",
                 max_tokens=300,
                 temperature=0.7
             )
             
-            return response.choices[0].message.content.strip()
+            return caption.strip()
             
         except Exception as e:
             logger.error(f"Failed to generate caption: {e}")
             return content[:200] + "..."
     
+    async def _chat_completion(
+        self,
+        call_type: str,
+        messages: List[Dict[str, str]],
+        operation_type: str,
+        **params: Any
+    ) -> str:
+        """
+        Run a chat completion, serving identical requests from the completion cache
+        or joining an identical request that is still in flight
+        
+        The model router picks the provider and model for `call_type` (see
+        AI_ROUTES) and fails over between them. Provider calls go through the
+        resilience layer: transient errors are retried with backoff, the
+        pipeline deadline applies, and operations in AI_HEDGE_OPERATIONS are
+        hedged.
+        """
+        cache_key = make_cache_key(call_type, messages, params)
+        
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Completion cache hit - Call: {call_type}, Operation: {operation_type}")
+            return cached["content"]
+        
+        estimated_tokens = estimate_tokens(messages, params.get("max_tokens", 0))
+        
+        async def request(route):
+            await self.rate_limiter.acquire(route.model, estimated_tokens)
+            return await route.provider.chat(route.model, messages, **params)
+        
+        async def fetch():
+            result = await self.resilience.call(
+                operation_type,
+                lambda: self.router.execute(call_type, request),
+                timeout=self.router.attempt_timeout(call_type)
+            )
+            await self.rate_limiter.settle(result.model, estimated_tokens, result.total_tokens)
+            
+            await self.cache.set(cache_key, {
+                "content": result.content,
+                "total_tokens": result.total_tokens,
+                "model": result.model
+            })
+            
+            # Track API usage
+            await self._track_api_usage(result.model, result.total_tokens, operation_type, result.provider)
+            
+            return result.content
+        
+        # Identical requests already in flight share that call instead of starting another
+        return await self.singleflight.do(cache_key, fetch)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get completion cache hit/miss counters"""
+        return self.cache.get_stats()
+    
+    def _validate_fused_response(
+        self,
+        data: Any,
+        platforms: List[str],
+        max_hashtags: int
+    ) -> Dict[str, Any]:
+        """Keep only the fused response fields that match the expected schema"""
+        validated = {"content": None, "hashtags": None, "captions": None, "image_prompt": None}
+        if not isinstance(data, dict):
+            return validated
+        
+        content = data.get("content")
+        if (
+            isinstance(content, dict)
+            and isinstance(content.get("script"), str) and content["script"].strip()
+            and isinstance(content.get("title"), str) and content["title"].strip()
+        ):
+            validated["content"] = content
+        
+        hashtags = data.get("hashtags")
+        if isinstance(hashtags, list):
+            cleaned = [
+                tag.strip().lstrip("#").replace(" ", "")
+                for tag in hashtags
+                if isinstance(tag, str) and tag.strip().lstrip("#")
+            ]
+            if cleaned:
+                validated["hashtags"] = cleaned[:max_hashtags]
+        
+        captions = data.get("captions")
+        if isinstance(captions, dict):
+            cleaned = {
+                platform: captions[platform].strip()
+                for platform in platforms
+                if isinstance(captions.get(platform), str) and captions[platform].strip()
+            }
+            if cleaned:
+                validated["captions"] = cleaned
+        
+        image_prompt = data.get("image_prompt")
+        if isinstance(image_prompt, str) and image_prompt.strip():
+            validated["image_prompt"] = image_prompt.strip()
+        
+        return validated
+    
+    def _build_script_request(
+        self,
+        content_type: ContentType,
+        topic: str,
+        target_audience: Dict[str, Any],
+        duration_seconds: int,
+        location: Optional[str] = None
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Build the messages and sampling parameters for script generation"""
+        prompt = self._build_content_prompt(
+            content_type, topic, target_audience, duration_seconds, location
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": self._get_system_prompt(content_type)
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        params = {
+            "max_tokens": 800,
+            "temperature": 0.8,
+            "top_p": 0.9
+        }
+        return messages, params
+    
+    def _parse_script_response(
+        self,
+        content_text: str,
+        content_type: ContentType,
+        topic: str
+    ) -> Dict[str, Any]:
+        """Parse structured response if JSON format"""
+        try:
+            return json.loads(content_text)
+        except json.JSONDecodeError:
+            # Fallback to plain text
+            return {
+                "script": content_text,
+                "title": topic,
+                "description": f"AI-generated {content_type.value} content"
+            }
+    
     def _build_content_prompt(
         self,
         content_type: ContentType,
@@ -410,13 +700,20 @@ class OpenAIService:
         self,
         service: str,
         tokens_or_units: int,
-        operation_type: str
+        operation_type: str,
+        provider: str = "openai"
     ):
         """Track API usage for cost monitoring"""
         try:
-            # This would typically save to database
-            # For now, just log the usage
-            logger.info(f"OpenAI API usage - Service: {service}, Units: {tokens_or_units}, Operation: {operation_type}")
+            is_per_unit = service in PER_UNIT_MODELS
+            get_usage_recorder().record(
+                service_name=provider,
+                endpoint=service,
+                operation=operation_type,
+                tokens=0 if is_per_unit else tokens_or_units,
+                units=tokens_or_units if is_per_unit else 0
+            )
+            logger.debug(f"AI API usage - Provider: {provider}, Service: {service}, Units: {tokens_or_units}, Operation: {operation_type}")
         except Exception as e:
             logger.error(f"Failed to track API usage: {e}")
 
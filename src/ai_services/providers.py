@@ -0,0 +1,236 @@
+"""
+AI provider backends behind a common interface
+
+Each provider turns the OpenAI-style chat messages and image requests used
+by OpenAIService into its own API calls and normalises the response, so the
+model router can move a call between providers without the caller noticing.
+"""
+
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..core.async_runtime import get_http_client
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ChatResult:
+    """Normalised chat completion result"""
+
+    def __init__(self, content: str, total_tokens: int, provider: str, model: str):
+        self.content = content
+        self.total_tokens = total_tokens
+        self.provider = provider
+        self.model = model
+
+
+class ImageResult:
+    """Normalised image generation result"""
+
+    def __init__(self, url: str, revised_prompt: Optional[str], provider: str, model: str):
+        self.url = url
+        self.revised_prompt = revised_prompt
+        self.provider = provider
+        self.model = model
+
+
+class Provider:
+    """Base class for AI providers"""
+
+    name = "base"
+    supports_streaming = False
+
+    async def chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> ChatResult:
+        raise NotImplementedError(f"{self.name} does not support chat completions")
+
+    async def stream_chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> AsyncIterator[str]:
+        """Open a streamed completion; the returned iterator yields text deltas"""
+        raise NotImplementedError(f"{self.name} does not support streaming")
+
+    async def generate_image(self, model: str, prompt: str, size: str, quality: str) -> ImageResult:
+        raise NotImplementedError(f"{self.name} does not support image generation")
+
+
+class OpenAIProvider(Provider):
+    """OpenAI chat completions and DALL-E (or the fake backend with MOCK_API_CALLS)"""
+
+    name = "openai"
+    supports_streaming = True
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> ChatResult:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **params
+        )
+        return ChatResult(
+            content=response.choices[0].message.content,
+            total_tokens=response.usage.total_tokens if response.usage else 0,
+            provider=self.name,
+            model=model
+        )
+
+    async def stream_chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            **params
+        )
+        return self._iter_deltas(stream)
+
+    @staticmethod
+    async def _iter_deltas(stream: Any) -> AsyncIterator[str]:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def generate_image(self, model: str, prompt: str, size: str, quality: str) -> ImageResult:
+        response = await self.client.images.generate(
+            model=model,
+            prompt=prompt,
+            size=size,
+            quality=quality,
+            n=1
+        )
+        return ImageResult(
+            url=response.data[0].url,
+            revised_prompt=response.data[0].revised_prompt,
+            provider=self.name,
+            model=model
+        )
+
+
+class AnthropicProvider(Provider):
+    """Anthropic Claude via the Messages API"""
+
+    name = "anthropic"
+
+    def __init__(self, api_key: str):
+        import anthropic
+
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            max_retries=0,
+            timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+            http_client=get_http_client()
+        )
+        # Older SDKs only expose the Messages API under beta
+        self.messages = getattr(self.client, "messages", None) or self.client.beta.messages
+
+    async def chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> ChatResult:
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        conversation = [
+            {"role": m["role"], "content": m["content"]}
+            for m in messages
+            if m["role"] != "system"
+        ]
+
+        # No JSON mode; prefilling the reply with "{" keeps the output a bare object
+        json_mode = (params.get("response_format") or {}).get("type") == "json_object"
+        if json_mode:
+            conversation.append({"role": "assistant", "content": "{"})
+
+        request: Dict[str, Any] = {
+            "model": model,
+            "messages": conversation,
+            "max_tokens": params.get("max_tokens") or 1024
+        }
+        if system:
+            request["system"] = system
+        for key in ("temperature", "top_p"):
+            if key in params:
+                request[key] = params[key]
+
+        response = await self.messages.create(**request)
+
+        content = "".join(block.text for block in response.content if getattr(block, "text", None))
+        if json_mode:
+            content = "{" + content
+        return ChatResult(
+            content=content,
+            total_tokens=response.usage.input_tokens + response.usage.output_tokens,
+            provider=self.name,
+            model=model
+        )
+
+
+class StabilityProvider(Provider):
+    """
+    Stability AI text-to-image (REST API)
+
+    Images come back as data URLs, which do not fit MediaAsset.file_url and
+    bloat the payloads kept in Redis, so this provider is left out of the
+    default "image" route until images are uploaded to media storage.
+    """
+
+    name = "stability"
+    base_url = "https://api.stability.ai/v1/generation"
+
+    # Dimensions SDXL accepts, as (width, height)
+    SDXL_DIMENSIONS = [
+        (1024, 1024), (1152, 896), (896, 1152), (1216, 832), (832, 1216),
+        (1344, 768), (768, 1344), (1536, 640), (640, 1536)
+    ]
+
+    def __init__(self, api_key: str):
+        self.client = get_http_client()
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Accept": "application/json"
+        }
+
+    async def generate_image(self, model: str, prompt: str, size: str, quality: str) -> ImageResult:
+        width, height = self._closest_dimensions(size)
+        response = await self.client.post(
+            f"{self.base_url}/{model}/text-to-image",
+            headers=self.headers,
+            json={
+                "text_prompts": [{"text": prompt[:2000]}],
+                "width": width,
+                "height": height,
+                "steps": 50 if quality == "hd" else 30,
+                "samples": 1
+            }
+        )
+        response.raise_for_status()
+        artifact = response.json()["artifacts"][0]
+
+        # The API returns image bytes rather than a hosted URL
+        return ImageResult(
+            url=f"data:image/png;base64,{artifact['base64']}",
+            revised_prompt=prompt,
+            provider=self.name,
+            model=model
+        )
+
+    def _closest_dimensions(self, size: str) -> Tuple[int, int]:
+        """Supported dimensions with the aspect ratio nearest to `size` (e.g. "1024x1792")"""
+        width, height = (int(value) for value in size.lower().split("x"))
+        ratio = width / height
+        return min(self.SDXL_DIMENSIONS, key=lambda dims: abs(dims[0] / dims[1] - ratio))
+
+
+def create_providers(openai_client: Any) -> Dict[str, Provider]:
+    """Build the providers that are configured (an API key is set)"""
+    providers: Dict[str, Provider] = {"openai": OpenAIProvider(openai_client)}
+
+    if settings.MOCK_API_CALLS:
+        # Only the OpenAI-compatible fake exists; keep other providers offline
+        return providers
+
+    if settings.ANTHROPIC_API_KEY:
+        try:
+            providers["anthropic"] = AnthropicProvider(settings.ANTHROPIC_API_KEY)
+        except ImportError:
+            logger.warning("ANTHROPIC_API_KEY is set but the anthropic package is not installed")
+
+    if settings.STABILITY_API_KEY:
+        providers["stability"] = StabilityProvider(settings.STABILITY_API_KEY)
+
+    return providers
@@ -0,0 +1,269 @@
+"""
+RPM/TPM-aware rate limiting for AI provider calls
+
+Each model gets two token buckets: one for requests per minute and one for
+estimated tokens per minute. Callers wait for capacity instead of failing.
+The local limiter is per-process; the Redis limiter shares one budget across
+every API and Celery worker process.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from ..core.config import get_settings, RateLimitBackend
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity did not free up within the maximum wait"""
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: int = 0) -> int:
+    """Rough token estimate for a chat request (about 4 characters per token)"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized for one minute of budget"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)"""
+        self._refill()
+        # Requests larger than the whole bucket are let through once it is full
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Base class for per-model RPM/TPM limiters"""
+
+    def __init__(
+        self,
+        rpm_limits: Dict[str, int],
+        tpm_limits: Dict[str, int],
+        max_wait_seconds: float
+    ):
+        self.rpm_limits = rpm_limits
+        self.tpm_limits = tpm_limits
+        self.max_wait_seconds = max_wait_seconds
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+
+    async def acquire(self, model: str, tokens: int = 0):
+        """Wait until one request and `tokens` tokens are available for `model`"""
+        if model not in self.rpm_limits and model not in self.tpm_limits:
+            return
+
+        started = time.monotonic()
+        throttled = False
+        while True:
+            wait = await self._try_acquire(model, tokens)
+            if wait <= 0:
+                break
+
+            throttled = True
+            elapsed = time.monotonic() - started
+            if elapsed + wait > self.max_wait_seconds:
+                raise RateLimitTimeout(
+                    f"Rate limit capacity for {model} not available within {self.max_wait_seconds}s"
+                )
+            await asyncio.sleep(wait)
+
+        if throttled:
+            waited = time.monotonic() - started
+            self.waits += 1
+            self.total_wait_seconds += waited
+            logger.debug(f"Rate limiter waited {waited:.2f}s for {model}")
+
+    async def settle(self, model: str, estimated_tokens: int, actual_tokens: int):
+        """Correct the token budget once the real usage is known"""
+        if model in self.tpm_limits and actual_tokens:
+            await self._adjust_tokens(model, estimated_tokens - actual_tokens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend_name,
+            "waits": self.waits,
+            "total_wait_seconds": round(self.total_wait_seconds, 3)
+        }
+
+    async def _try_acquire(self, model: str, tokens: int) -> float:
+        raise NotImplementedError
+
+    async def _adjust_tokens(self, model: str, delta: int):
+        raise NotImplementedError
+
+
+class LocalRateLimiter(RateLimiter):
+    """In-process token buckets"""
+
+    backend_name = "local"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._request_buckets = {model: TokenBucket(limit) for model, limit in self.rpm_limits.items()}
+        self._token_buckets = {model: TokenBucket(limit) for model, limit in self.tpm_limits.items()}
+
+    async def _try_acquire(self, model: str, tokens: int) -> float:
+        request_bucket = self._request_buckets.get(model)
+        token_bucket = self._token_buckets.get(model)
+
+        wait = max(
+            request_bucket.wait_time(1) if request_bucket else 0.0,
+            token_bucket.wait_time(tokens) if token_bucket and tokens else 0.0
+        )
+        if wait > 0:
+            return wait
+
+        if request_bucket:
+            request_bucket.take(1)
+        if token_bucket and tokens:
+            token_bucket.take(tokens)
+        return 0.0
+
+    async def _adjust_tokens(self, model: str, delta: int):
+        bucket = self._token_buckets.get(model)
+        if bucket is None:
+            return
+        if delta > 0:
+            bucket.give(delta)
+        else:
+            bucket.take(-delta)
+
+
+# Atomically refills and takes from the request and token buckets of a model.
+# Uses the Redis server clock so every worker agrees on the refill time.
+# KEYS: request bucket, token bucket
+# ARGV: rpm limit (0 = none), tpm limit (0 = none), tokens requested
+# Returns the number of milliseconds to wait, or 0 when capacity was taken.
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local function refill(key, limit)
+    local state = redis.call('HMGET', key, 'level', 'updated_at')
+    local level = tonumber(state[1]) or limit
+    local updated_at = tonumber(state[2]) or now
+    level = math.min(limit, level + (now - updated_at) * limit / 60)
+    return level
+end
+
+local function wait_for(level, amount, limit)
+    amount = math.min(amount, limit)
+    if level >= amount then
+        return 0
+    end
+    return (amount - level) / (limit / 60)
+end
+
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local tokens = tonumber(ARGV[3])
+
+local request_level = 0
+local token_level = 0
+local wait = 0
+
+if rpm > 0 then
+    request_level = refill(KEYS[1], rpm)
+    wait = math.max(wait, wait_for(request_level, 1, rpm))
+end
+if tpm > 0 and tokens > 0 then
+    token_level = refill(KEYS[2], tpm)
+    wait = math.max(wait, wait_for(token_level, tokens, tpm))
+end
+
+if wait > 0 then
+    return math.ceil(wait * 1000)
+end
+
+if rpm > 0 then
+    redis.call('HSET', KEYS[1], 'level', request_level - 1, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+end
+if tpm > 0 and tokens > 0 then
+    redis.call('HSET', KEYS[2], 'level', token_level - tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[2], 120)
+end
+return 0
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Token buckets shared across processes through Redis"""
+
+    backend_name = "redis"
+
+    def __init__(self, *args, url: str, prefix: str = "viralforge:ratelimit", **kwargs):
+        super().__init__(*args, **kwargs)
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+        self._acquire = self.redis.register_script(_ACQUIRE_SCRIPT)
+        self._fallback: Optional[LocalRateLimiter] = None
+
+    def _keys(self, model: str) -> List[str]:
+        return [f"{self.prefix}:{model}:requests", f"{self.prefix}:{model}:tokens"]
+
+    async def _try_acquire(self, model: str, tokens: int) -> float:
+        try:
+            wait_ms = await self._acquire(
+                keys=self._keys(model),
+                args=[self.rpm_limits.get(model, 0), self.tpm_limits.get(model, 0), tokens]
+            )
+            return int(wait_ms) / 1000.0
+        except Exception as e:
+            # Keep throttling locally rather than firing unthrottled requests
+            logger.error(f"Redis rate limiter unavailable, using local buckets: {e}")
+            if self._fallback is None:
+                self._fallback = LocalRateLimiter(self.rpm_limits, self.tpm_limits, self.max_wait_seconds)
+            return await self._fallback._try_acquire(model, tokens)
+
+    async def _adjust_tokens(self, model: str, delta: int):
+        try:
+            await self.redis.hincrbyfloat(self._keys(model)[1], "level", delta)
+        except Exception as e:
+            logger.error(f"Failed to settle token usage for {model}: {e}")
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter configured in settings"""
+    kwargs = {
+        "rpm_limits": settings.AI_RPM_LIMITS,
+        "tpm_limits": settings.AI_TPM_LIMITS,
+        "max_wait_seconds": settings.AI_RATE_LIMIT_MAX_WAIT_SECONDS
+    }
+
+    if settings.AI_RATE_LIMIT_BACKEND == RateLimitBackend.REDIS:
+        try:
+            return RedisRateLimiter(url=settings.REDIS_URL, **kwargs)
+        except Exception as e:
+            logger.error(f"Failed to initialize Redis rate limiter, using local buckets: {e}")
+
+    return LocalRateLimiter(**kwargs)
@@ -0,0 +1,330 @@
+"""
+Resilience layer for AI provider calls
+
+- Classified retries: 429s, 5xx errors, timeouts and connection errors are
+  retried with full-jitter exponential backoff; a Retry-After header sets
+  the minimum wait. Other errors (bad request, auth, content policy) fail
+  at once.
+- Deadlines: `with deadline(seconds)` bounds everything awaited inside it,
+  including tasks started from it, so a pipeline finishes or fails in
+  predictable time.
+- Hedging: for cheap, idempotent operations a duplicate request is sent
+  when the first one runs past that operation's p95 latency, and whichever
+  answers first wins.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+
+import httpx
+import openai
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Absolute monotonic time by which the current pipeline must finish
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("ai_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The pipeline deadline passed before the call could complete"""
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """
+    Bound all AI calls made inside the block to `seconds` from now.
+
+    Nested deadlines can only shorten the outer one. Tasks created inside
+    the block inherit it through the context.
+    """
+    expires_at = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        expires_at = min(expires_at, outer)
+    token = _deadline.set(expires_at)
+    try:
+        yield expires_at
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline (None if there is none)"""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def _connection_errors() -> tuple:
+    errors = [openai.APIConnectionError, httpx.TransportError, asyncio.TimeoutError]
+    try:
+        import anthropic
+        errors.append(anthropic.APIConnectionError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+_CONNECTION_ERRORS = _connection_errors()
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error (OpenAI, Anthropic or raw httpx)"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient: 429, 5xx, timeout or connection failure"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+    status_code = status_code_of(error)
+    if status_code is None:
+        return False
+    return status_code in (408, 409, 429) or status_code >= 500
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested wait from Retry-After / retry-after-ms headers"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff that honours Retry-After"""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # Spread retries slightly so callers told the same Retry-After don't stampede
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per operation"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, operation: str, seconds: float):
+        samples = self._samples.get(operation)
+        if samples is None:
+            samples = self._samples[operation] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, operation: str, pct: float) -> Optional[float]:
+        """Latency percentile in seconds (None until min_samples are recorded)"""
+        samples = self._samples.get(operation)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[index]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            operation: {
+                "samples": len(samples),
+                "p50_ms": round((self.percentile(operation, 50) or 0) * 1000, 1),
+                "p95_ms": round((self.percentile(operation, 95) or 0) * 1000, 1)
+            }
+            for operation, samples in self._samples.items()
+        }
+
+
+class ResilientCaller:
+    """Runs provider calls with timeouts, classified retries, deadlines and hedging"""
+
+    def __init__(
+        self,
+        retry_policy: RetryPolicy,
+        request_timeout: float,
+        hedge_operations: List[str],
+        latency_tracker: LatencyTracker
+    ):
+        self.retry_policy = retry_policy
+        self.request_timeout = request_timeout
+        self.hedge_operations = set(hedge_operations)
+        self.latency_tracker = latency_tracker
+
+        self.retries = 0
+        self.retries_exhausted = 0
+        self.deadlines_exceeded = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    async def call(
+        self,
+        operation: str,
+        func: Callable[[], Awaitable[T]],
+        hedge: Optional[bool] = None,
+        timeout: Optional[float] = None
+    ) -> T:
+        """
+        Await `func()` until it succeeds, retrying transient errors.
+
+        `func` must start a fresh request each time it is called. With `hedge`
+        (default: operation is in AI_HEDGE_OPERATIONS) a second request is
+        raced against a slow first one. `timeout` bounds each attempt
+        (default: AI_REQUEST_TIMEOUT_SECONDS).
+        """
+        if hedge is None:
+            hedge = operation in self.hedge_operations
+        if timeout is None:
+            timeout = self.request_timeout
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self._check_deadline(operation)
+            try:
+                if hedge:
+                    return await self._hedged(operation, func, timeout)
+                return await self._attempt(operation, func, timeout)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.retry_policy.max_attempts:
+                    self.retries_exhausted += 1
+                    logger.error(f"{operation} failed after {attempt} attempts: {e}")
+                    raise
+
+                delay = self.retry_policy.backoff(attempt, e)
+                remaining = remaining_time()
+                if remaining is not None and delay >= remaining:
+                    self.deadlines_exceeded += 1
+                    raise DeadlineExceeded(
+                        f"{operation} cannot be retried before the deadline ({remaining:.1f}s left)"
+                    ) from e
+
+                self.retries += 1
+                logger.warning(
+                    f"{operation} attempt {attempt} failed ({type(e).__name__}: {e}), "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, operation: str, func: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """One request, bounded by the attempt timeout and the deadline"""
+        remaining = remaining_time()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(func(), timeout=timeout)
+        except asyncio.TimeoutError:
+            if remaining is not None and timeout == remaining:
+                self.deadlines_exceeded += 1
+                raise DeadlineExceeded(f"{operation} did not finish before the deadline")
+            raise
+        self.latency_tracker.record(operation, time.monotonic() - started)
+        return result
+
+    async def _hedged(self, operation: str, func: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """Race a second request against a first one that passed its p95 latency"""
+        hedge_after = self.latency_tracker.percentile(operation, 95)
+        if hedge_after is None:
+            return await self._attempt(operation, func, timeout)
+
+        primary = asyncio.ensure_future(self._attempt(operation, func, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        self.hedges_sent += 1
+        logger.debug(f"Hedging {operation} after {hedge_after * 1000:.0f}ms")
+        secondary = asyncio.ensure_future(self._attempt(operation, func, timeout))
+        pending = {primary, secondary}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self.hedges_won += 1
+                        return task.result()
+                if not pending:
+                    # Both failed; surface the primary's error to the retry loop
+                    return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _check_deadline(self, operation: str):
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            self.deadlines_exceeded += 1
+            raise DeadlineExceeded(f"Deadline passed before {operation} could start")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "retries_exhausted": self.retries_exhausted,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "latency": self.latency_tracker.get_stats()
+        }
+
+
+def create_resilient_caller() -> ResilientCaller:
+    """Build the resilient caller from settings"""
+    return ResilientCaller(
+        retry_policy=RetryPolicy(
+            max_attempts=settings.AI_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.AI_RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.AI_RETRY_MAX_DELAY_SECONDS
+        ),
+        request_timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+        hedge_operations=settings.AI_HEDGE_OPERATIONS,
+        latency_tracker=LatencyTracker(min_samples=settings.AI_HEDGE_MIN_SAMPLES)
+    )
@@ -0,0 +1,216 @@
+"""
+Buffered API usage recorder
+
+Usage is aggregated in memory per service, endpoint and time bucket, and
+written to the api_usage table in batches from a background thread - on a
+timer, when enough records are pending, and on shutdown. Generation calls
+never wait on the database.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Models billed per generated unit (image) rather than per 1K tokens
+PER_UNIT_MODELS = {"dall-e-2", "dall-e-3", "stable-diffusion-xl-1024-v1-0"}
+
+BucketKey = Tuple[str, str, int]
+
+
+class UsageRecorder:
+    """Aggregates API usage in memory and flushes it to APIUsage rows in batches"""
+
+    def __init__(
+        self,
+        flush_interval_seconds: float,
+        flush_max_pending: int,
+        bucket_seconds: int,
+        pricing: Dict[str, float]
+    ):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_max_pending = flush_max_pending
+        self.bucket_seconds = bucket_seconds
+        self.pricing = pricing
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[BucketKey, Dict[str, Any]] = {}
+        self._pending = 0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self.flushed_rows = 0
+        self.flush_errors = 0
+
+    def estimate_cost(self, endpoint: str, tokens: int = 0, units: float = 0) -> float:
+        """Estimated USD cost from the configured price table"""
+        price = self.pricing.get(endpoint, 0.0)
+        if endpoint in PER_UNIT_MODELS:
+            return units * price
+        return tokens / 1000 * price
+
+    def record(
+        self,
+        service_name: str,
+        endpoint: str,
+        operation: str,
+        tokens: int = 0,
+        units: float = 0
+    ):
+        """Add one API call to the in-memory aggregate (never blocks on I/O)"""
+        self._ensure_started()
+
+        bucket_start = int(time.time()) // self.bucket_seconds * self.bucket_seconds
+        key = (service_name, endpoint, bucket_start)
+        cost = self.estimate_cost(endpoint, tokens, units)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = {
+                    "requests_count": 0,
+                    "tokens_used": 0,
+                    "data_processed": 0.0,
+                    "estimated_cost": 0.0,
+                    "operations": {}
+                }
+            bucket["requests_count"] += 1
+            bucket["tokens_used"] += tokens
+            bucket["data_processed"] += units
+            bucket["estimated_cost"] += cost
+            bucket["operations"][operation] = bucket["operations"].get(operation, 0) + 1
+            self._pending += 1
+            should_flush = self._pending >= self.flush_max_pending
+
+        if should_flush:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write all pending aggregates to the database; returns rows written"""
+        with self._lock:
+            buckets, self._buckets = self._buckets, {}
+            self._pending = 0
+
+        if not buckets:
+            return 0
+
+        try:
+            self._write(buckets)
+            self.flushed_rows += len(buckets)
+            return len(buckets)
+        except Exception as e:
+            self.flush_errors += 1
+            logger.error(f"Failed to flush {len(buckets)} API usage rows: {e}")
+            self._requeue(buckets)
+            return 0
+
+    def _write(self, buckets: Dict[BucketKey, Dict[str, Any]]):
+        from ..core.database import SessionLocal
+        from ..core.models import APIUsage
+
+        db = SessionLocal()
+        try:
+            db.add_all([
+                APIUsage(
+                    service_name=service_name,
+                    endpoint=endpoint,
+                    requests_count=bucket["requests_count"],
+                    tokens_used=bucket["tokens_used"],
+                    data_processed=bucket["data_processed"],
+                    estimated_cost=round(bucket["estimated_cost"], 6),
+                    currency="USD",
+                    date=datetime.fromtimestamp(bucket_start, tz=timezone.utc),
+                    extra_metadata={
+                        "bucket_seconds": self.bucket_seconds,
+                        "operations": bucket["operations"]
+                    }
+                )
+                for (service_name, endpoint, bucket_start), bucket in buckets.items()
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _requeue(self, buckets: Dict[BucketKey, Dict[str, Any]]):
+        """Merge unwritten aggregates back so the next flush retries them"""
+        with self._lock:
+            for key, failed in buckets.items():
+                bucket = self._buckets.setdefault(key, {
+                    "requests_count": 0,
+                    "tokens_used": 0,
+                    "data_processed": 0.0,
+                    "estimated_cost": 0.0,
+                    "operations": {}
+                })
+                for field in ("requests_count", "tokens_used", "data_processed", "estimated_cost"):
+                    bucket[field] += failed[field]
+                for operation, count in failed["operations"].items():
+                    bucket["operations"][operation] = bucket["operations"].get(operation, 0) + count
+
+    def _ensure_started(self):
+        """Start the flush thread lazily, once per process (safe across fork)"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="usage-recorder", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        """Start periodic flushing"""
+        self._ensure_started()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop periodic flushing and write everything still buffered"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending_calls = self._pending
+            pending_rows = len(self._buckets)
+        return {
+            "pending_calls": pending_calls,
+            "pending_rows": pending_rows,
+            "flushed_rows": self.flushed_rows,
+            "flush_errors": self.flush_errors
+        }
+
+
+# Global recorder instance
+usage_recorder = UsageRecorder(
+    flush_interval_seconds=settings.USAGE_FLUSH_INTERVAL_SECONDS,
+    flush_max_pending=settings.USAGE_FLUSH_MAX_PENDING,
+    bucket_seconds=settings.USAGE_BUCKET_SECONDS,
+    pricing=settings.AI_MODEL_PRICING
+)
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """Get the usage recorder instance"""
+    return usage_recorder
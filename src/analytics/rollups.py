@@ -0,0 +1,352 @@
+"""
+Incrementally maintained analytics rollups
+
+PostAnalytics rows are cumulative snapshots of a post's metrics. The rollup
+reads snapshots past a watermark (the last PostAnalytics id folded in, kept
+in analytics_rollup_state), turns each one into the increase since the
+post's previous snapshot, and adds those increases to hourly and daily rows
+per post with an upsert. Watermark and rollup rows are committed together,
+and the watermark row is locked for each batch, so a crashed or overlapping
+run never counts a snapshot twice.
+
+Ids are handed out before commit, so a snapshot can become visible after a
+higher id was already folded in. Only snapshots older than
+ANALYTICS_ROLLUP_SETTLE_SECONDS are folded, stopping at the first newer one;
+the window must exceed the longest transaction that inserts snapshots
+(collect_post_metrics inserts and commits in one statement).
+
+Dashboards then aggregate a few hundred rollup rows instead of every
+snapshot ever taken.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.models import (
+    AnalyticsRollupDaily, AnalyticsRollupHourly, AnalyticsRollupState,
+    ContentItem, Post, PostAnalytics
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Cumulative PostAnalytics columns rolled up as increases
+METRICS = ("views", "likes", "comments", "shares", "saves", "reach", "impressions")
+ENGAGEMENT_METRICS = ("likes", "comments", "shares", "saves")
+
+ROLLUP_MODELS = {
+    "hour": AnalyticsRollupHourly,
+    "day": AnalyticsRollupDaily,
+}
+
+# Columns dashboards may group rollups by
+DIMENSIONS = ("post_id", "social_account_id", "platform", "content_type")
+
+WATERMARK_NAME = "post_analytics"
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Aware UTC datetime (naive values, e.g. from SQLite, are taken as UTC)"""
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the UTC hour or day containing `moment` (naive values are taken as UTC)"""
+    moment = _as_utc(moment)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _insert(db: Session, model):
+    """Dialect INSERT supporting ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Analytics rollups need ON CONFLICT support, not available for {dialect}")
+    return insert(model)
+
+
+def _upsert_statement(db: Session, model):
+    """INSERT ... ON CONFLICT (post_id, bucket_start) that adds to the existing row"""
+    statement = _insert(db, model)
+    additive = METRICS + ("engagements", "snapshots")
+    return statement.on_conflict_do_update(
+        index_elements=[model.post_id, model.bucket_start],
+        set_={
+            **{column: getattr(model, column) + getattr(statement.excluded, column) for column in additive},
+            "updated_at": func.now()
+        }
+    )
+
+
+class AnalyticsRollup:
+    """Folds new PostAnalytics snapshots into the hourly and daily rollup tables"""
+
+    def __init__(self, batch_size: int = 5000, settle_seconds: float = 120.0):
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+
+    def run(self, db: Session) -> Dict[str, Any]:
+        """
+        Roll up every snapshot past the watermark, one transaction per batch.
+
+        Returns the number of snapshots processed and the new watermark.
+        """
+        processed = 0
+        batches = 0
+        while True:
+            # Re-read under lock each batch so overlapping runs continue from each other's watermark
+            state = self._lock_watermark(db)
+            watermark = state.last_source_id
+
+            loaded = self._load_snapshots(db, watermark)
+            snapshots = self._settled(loaded)
+            if not snapshots:
+                db.commit()
+                break
+
+            try:
+                hourly, daily = self._fold(db, snapshots, watermark)
+                db.execute(_upsert_statement(db, AnalyticsRollupHourly), list(hourly.values()))
+                db.execute(_upsert_statement(db, AnalyticsRollupDaily), list(daily.values()))
+                watermark = snapshots[-1].id
+                state.last_source_id = watermark
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to roll up {len(snapshots)} analytics snapshots after id {watermark}: {e}")
+                raise
+
+            processed += len(snapshots)
+            batches += 1
+            if len(snapshots) < len(loaded) or len(loaded) < self.batch_size:
+                break
+
+        if processed:
+            logger.info(f"Rolled up {processed} analytics snapshots in {batches} batches, watermark {watermark}")
+        return {"snapshots": processed, "batches": batches, "watermark": watermark}
+
+    def _lock_watermark(self, db: Session) -> AnalyticsRollupState:
+        state = db.get(AnalyticsRollupState, WATERMARK_NAME, with_for_update=True)
+        if state is None:
+            # Seeded by migration 0002; databases built by create_tables() get it on the first run
+            db.execute(
+                _insert(db, AnalyticsRollupState)
+                .values(name=WATERMARK_NAME, last_source_id=0)
+                .on_conflict_do_nothing(index_elements=[AnalyticsRollupState.name])
+            )
+            state = db.get(AnalyticsRollupState, WATERMARK_NAME, with_for_update=True, populate_existing=True)
+        return state
+
+    def _settled(self, snapshots: List[Any]) -> List[Any]:
+        """Leading snapshots created at least settle_seconds ago; ids past them may not be visible yet"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds)
+        for index, snapshot in enumerate(snapshots):
+            if snapshot.created_at is not None and _as_utc(snapshot.created_at) > cutoff:
+                return snapshots[:index]
+        return snapshots
+
+    def _load_snapshots(self, db: Session, watermark: int) -> List[Any]:
+        return db.execute(
+            select(
+                PostAnalytics.id,
+                PostAnalytics.post_id,
+                PostAnalytics.last_updated,
+                PostAnalytics.created_at,
+                *[getattr(PostAnalytics, metric) for metric in METRICS],
+                Post.content_item_id,
+                Post.social_account_id,
+                Post.platform,
+                ContentItem.content_type
+            )
+            .outerjoin(Post, Post.id == PostAnalytics.post_id)
+            .outerjoin(ContentItem, ContentItem.id == Post.content_item_id)
+            .where(PostAnalytics.id > watermark)
+            .order_by(PostAnalytics.id)
+            .limit(self.batch_size)
+        ).all()
+
+    def _previous_totals(self, db: Session, post_ids: List[int], watermark: int) -> Dict[int, Dict[str, int]]:
+        """Cumulative metrics of each post's last snapshot already rolled up"""
+        if not post_ids or not watermark:
+            return {}
+
+        latest = (
+            select(PostAnalytics.post_id, func.max(PostAnalytics.id).label("id"))
+            .where(PostAnalytics.post_id.in_(post_ids), PostAnalytics.id <= watermark)
+            .group_by(PostAnalytics.post_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(PostAnalytics.post_id, *[getattr(PostAnalytics, metric) for metric in METRICS])
+            .join(latest, PostAnalytics.id == latest.c.id)
+        ).all()
+        return {row.post_id: {metric: getattr(row, metric) or 0 for metric in METRICS} for row in rows}
+
+    def _fold(
+        self, db: Session, snapshots: List[Any], watermark: int
+    ) -> Tuple[Dict[Tuple[int, datetime], Dict[str, Any]], Dict[Tuple[int, datetime], Dict[str, Any]]]:
+        """Increases per (post, hour) and (post, day) for a batch of snapshots in id order"""
+        totals = self._previous_totals(db, sorted({snapshot.post_id for snapshot in snapshots}), watermark)
+        buckets = {"hour": {}, "day": {}}
+
+        for snapshot in snapshots:
+            current = {metric: getattr(snapshot, metric) or 0 for metric in METRICS}
+            previous = totals.get(snapshot.post_id, dict.fromkeys(METRICS, 0))
+            delta = {metric: current[metric] - previous[metric] for metric in METRICS}
+            totals[snapshot.post_id] = current
+
+            taken_at = snapshot.last_updated or snapshot.created_at or datetime.now(timezone.utc)
+            for granularity, rows in buckets.items():
+                key = (snapshot.post_id, bucket_start(taken_at, granularity))
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = {
+                        "post_id": snapshot.post_id,
+                        "bucket_start": key[1],
+                        "content_item_id": snapshot.content_item_id,
+                        "social_account_id": snapshot.social_account_id,
+                        "platform": snapshot.platform,
+                        "content_type": snapshot.content_type,
+                        **dict.fromkeys(METRICS, 0),
+                        "engagements": 0,
+                        "snapshots": 0
+                    }
+                for metric in METRICS:
+                    row[metric] += delta[metric]
+                row["engagements"] += sum(delta[metric] for metric in ENGAGEMENT_METRICS)
+                row["snapshots"] += 1
+
+        return buckets["hour"], buckets["day"]
+
+    def rebuild(self, db: Session) -> Dict[str, Any]:
+        """Empty the rollup tables, reset the watermark and roll up all snapshots again"""
+        self._lock_watermark(db).last_source_id = 0
+        for model in ROLLUP_MODELS.values():
+            db.query(model).delete(synchronize_session=False)
+        db.commit()
+        return self.run(db)
+
+
+def _window(model, days: int):
+    since = bucket_start(datetime.now(timezone.utc) - timedelta(days=days), "hour")
+    return model.bucket_start >= since
+
+
+def _rate(engagements: int, views: int) -> float:
+    return round(engagements / views, 4) if views else 0.0
+
+
+def overview_statements(days: int, top: int = 5) -> Tuple[Select, Select]:
+    """Totals and top posts over the last `days` days, from the daily rollups"""
+    model = AnalyticsRollupDaily
+    window = _window(model, days)
+
+    totals = select(
+        func.count(func.distinct(model.post_id)).label("posts"),
+        func.coalesce(func.sum(model.views), 0).label("views"),
+        func.coalesce(func.sum(model.engagements), 0).label("engagements")
+    ).where(window)
+
+    engagements = func.sum(model.engagements).label("engagements")
+    top_posts = (
+        select(
+            model.post_id,
+            model.content_item_id,
+            model.platform,
+            model.content_type,
+            func.sum(model.views).label("views"),
+            engagements
+        )
+        .where(window)
+        .group_by(model.post_id, model.content_item_id, model.platform, model.content_type)
+        .order_by(desc(engagements))
+        .limit(top)
+    )
+    return totals, top_posts
+
+
+def overview_result(totals: Any, top_rows: List[Any]) -> Dict[str, Any]:
+    """Shape the rows of overview_statements() for the API and reports"""
+    return {
+        "total_posts": totals.posts,
+        "total_views": totals.views,
+        "total_engagement": totals.engagements,
+        "avg_engagement_rate": _rate(totals.engagements, totals.views),
+        "top_performing_content": [
+            {
+                "post_id": row.post_id,
+                "content_item_id": row.content_item_id,
+                "platform": row.platform.value if row.platform else None,
+                "content_type": row.content_type.value if row.content_type else None,
+                "views": row.views,
+                "engagements": row.engagements,
+                "engagement_rate": _rate(row.engagements, row.views)
+            }
+            for row in top_rows
+        ]
+    }
+
+
+async def get_overview(db: AsyncSession, days: int, top: int = 5) -> Dict[str, Any]:
+    """Analytics overview for the API"""
+    totals, top_posts = overview_statements(days, top)
+    return overview_result((await db.execute(totals)).one(), (await db.execute(top_posts)).all())
+
+
+async def get_performance(
+    db: AsyncSession,
+    granularity: str,
+    days: int,
+    group_by: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Metric increases per bucket (and per `group_by` value) over the last `days` days"""
+    model = ROLLUP_MODELS[granularity]
+    columns = [model.bucket_start]
+    if group_by:
+        columns.append(getattr(model, group_by))
+
+    rows = (await db.execute(
+        select(
+            *columns,
+            *[func.sum(getattr(model, metric)).label(metric) for metric in METRICS],
+            func.sum(model.engagements).label("engagements")
+        )
+        .where(_window(model, days))
+        .group_by(*columns)
+        .order_by(*columns)
+    )).all()
+
+    series = []
+    for row in rows:
+        point = {"bucket_start": bucket_start(row.bucket_start, granularity).isoformat()}
+        if group_by:
+            value = getattr(row, group_by)
+            point[group_by] = getattr(value, "value", value)
+        point.update({metric: getattr(row, metric) for metric in METRICS})
+        point["engagements"] = row.engagements
+        point["engagement_rate"] = _rate(row.engagements, row.views)
+        series.append(point)
+    return series
+
+
+# Global analytics rollup instance
+analytics_rollup = AnalyticsRollup(
+    batch_size=settings.ANALYTICS_ROLLUP_BATCH_SIZE,
+    settle_seconds=settings.ANALYTICS_ROLLUP_SETTLE_SECONDS
+)
+
+
+def get_analytics_rollup() -> AnalyticsRollup:
+    """Get the analytics rollup instance"""
+    return analytics_rollup
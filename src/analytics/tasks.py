@@ -0,0 +1,113 @@
+"""
+Celery tasks for performance analytics
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from ..core.celery_app import celery_app
+from ..core.config import get_settings
+from ..core.database import SessionLocal
+from ..core.models import ContentStatus, Post, PostAnalytics
+from ..social_platforms.publisher import fetch_post_metrics, has_platform_client
+from .rollups import get_analytics_rollup, overview_result, overview_statements
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def collect_post_metrics(db) -> int:
+    """
+    Store a PostAnalytics snapshot for every post published within
+    ANALYTICS_TRACKING_DAYS on a platform with a client
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=settings.ANALYTICS_TRACKING_DAYS)
+    posts = db.query(Post).filter(
+        Post.status == ContentStatus.POSTED,
+        Post.posted_at >= since
+    ).all()
+
+    snapshots = []
+    for post in posts:
+        if not has_platform_client(post.platform):
+            continue
+        try:
+            metrics = fetch_post_metrics(post)
+        except Exception as e:
+            logger.error(f"Failed to fetch metrics for post {post.id}: {e}")
+            continue
+
+        views = metrics.get("views", 0)
+        engagements = sum(metrics.get(metric, 0) for metric in ("likes", "comments", "shares", "saves"))
+        snapshots.append({
+            "post_id": post.id,
+            **metrics,
+            "engagement_rate": engagements / views if views else 0.0,
+            "last_updated": datetime.now(timezone.utc)
+        })
+
+    if snapshots:
+        db.execute(insert(PostAnalytics), snapshots)
+        db.commit()
+    return len(snapshots)
+
+
+@celery_app.task(bind=True)
+def update_post_analytics(self):
+    """
+    Snapshot the metrics of recent posts, then fold every settled snapshot
+    past the rollup watermark into the hourly and daily rollup tables (the
+    ones just collected are folded by a later run)
+    """
+    db = SessionLocal()
+    try:
+        collected = collect_post_metrics(db) if settings.ANALYTICS_ENABLED else 0
+        rollup = get_analytics_rollup().run(db)
+
+        logger.info(f"Collected {collected} post metrics snapshots, rolled up {rollup['snapshots']}")
+        return {
+            "status": "analytics_updated",
+            "snapshots_collected": collected,
+            "snapshots_rolled_up": rollup["snapshots"],
+            "watermark": rollup["watermark"],
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Post analytics update failed: {e}")
+        db.rollback()
+        self.retry(countdown=300, max_retries=3)
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True)
+def generate_analytics_report(self):
+    """
+    Summarize the daily rollups covering the last ANALYTICS_REPORT_FREQUENCY
+    hours (rounded up to whole days)
+    """
+    db = SessionLocal()
+    try:
+        days = -(-settings.ANALYTICS_REPORT_FREQUENCY // 24)
+        totals, top_posts = overview_statements(days)
+        report = overview_result(db.execute(totals).one(), db.execute(top_posts).all())
+
+        logger.info(
+            f"Analytics report ({days}d): {report['total_posts']} posts, "
+            f"{report['total_engagement']} engagements, {report['avg_engagement_rate']:.2%} engagement rate"
+        )
+        return {
+            "status": "report_generated",
+            "days": days,
+            "report": report,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Analytics report failed: {e}")
+        self.retry(countdown=600, max_retries=3)
+    finally:
+        db.close()
@@ -5,13 +5,17 @@ ViralForge AI - Main FastAPI Application
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime
 
 from ..core.config import get_settings
-from ..core.database import create_tables, check_database_connection
+from ..core.database import create_tables, check_database_connection, close_async_engine
+from ..ai_services.usage_recorder import get_usage_recorder
+from ..scheduler.post_scheduler import get_post_scheduler
 from .routers import content, social, analytics, admin, health
 
 # Configure logging
@@ -41,12 +45,30 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
     
+    # Start buffered API usage flushing
+    get_usage_recorder().start()
+    
+    # Queue scheduled posts from the database
+    if settings.AUTO_POSTING_ENABLED:
+        try:
+            await asyncio.to_thread(get_post_scheduler().start)
+        except Exception as e:
+            logger.error(f"❌ Post scheduler failed to start: {e}")
+    
     logger.info("🎯 ViralForge AI started successfully!")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down ViralForge AI...")
+    
+    # Stop queueing posts (held posts are reloaded on the next start)
+    get_post_scheduler().stop()
+    
+    # Write any buffered API usage
+    await asyncio.to_thread(get_usage_recorder().stop)
+    
+    await close_async_engine()
 
 
 # Create FastAPI app
@@ -142,6 +164,14 @@ async def status():
         raise HTTPException(status_code=500, detail="System health check failed")
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this API process (database pools)"""
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post("/trigger-content-generation")
 async def trigger_content_generation(background_tasks: BackgroundTasks):
     """Manually trigger content generation (admin endpoint)"""
@@ -162,16 +192,14 @@ async def trigger_content_generation(background_tasks: BackgroundTasks):
 
 
 @app.post("/trigger-post-processing")
-async def trigger_post_processing(background_tasks: BackgroundTasks):
-    """Manually trigger post processing (admin endpoint)"""
+async def trigger_post_processing():
+    """Re-sync the post schedule with the database (admin endpoint)"""
     try:
-        from ..social_platforms.tasks import process_scheduled_posts
-        
-        # Add background task
-        background_tasks.add_task(process_scheduled_posts.delay)
+        reconciled = await asyncio.to_thread(get_post_scheduler().reconcile)
         
         return {
-            "message": "Post processing triggered successfully",
+            "message": "Post schedule reconciled successfully",
+            "scheduled_posts": reconciled,
             "timestamp": datetime.utcnow().isoformat()
         }
     
@@ -183,7 +211,11 @@ async def trigger_post_processing(background_tasks: BackgroundTasks):
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {
+    detail = getattr(exc, "detail", None)
+    if detail and detail != "Not Found":
+        # A missing resource rather than an unknown route
+        return JSONResponse(status_code=404, content={"detail": detail})
+    return JSONResponse(status_code=404, content={
         "error": "Endpoint not found",
         "message": "The requested endpoint does not exist",
         "available_endpoints": [
@@ -195,17 +227,17 @@ async def not_found_handler(request, exc):
             "/api/v1/analytics/",
             "/api/v1/admin/",
         ]
-    }
+    })
 
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     logger.error(f"Internal server error: {exc}")
-    return {
+    return JSONResponse(status_code=500, content={
         "error": "Internal server error",
         "message": "An unexpected error occurred",
         "timestamp": datetime.utcnow().isoformat()
-    }
+    })
 
 
 if __name__ == "__main__":
@@ -6,6 +6,14 @@ from fastapi import APIRouter, HTTPException
 from datetime import datetime
 import logging
 
+from ...ai_services.openai_service import get_openai_service
+from ...ai_services.usage_recorder import get_usage_recorder
+from ...content_pipeline.generator import get_content_generator
+from ...content_pipeline.inventory import get_content_inventory
+from ...core.database import get_pool_stats
+from ...core.task_metrics import get_task_stats
+from ...scheduler.post_scheduler import get_post_scheduler
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
@@ -23,9 +31,33 @@ async def admin_dashboard():
 @router.get("/system")
 async def get_system_info():
     """Get system information"""
+    try:
+        inventory_stats = await get_content_inventory().get_stats()
+    except Exception as e:
+        logger.error(f"Failed to read content inventory stats: {e}")
+        inventory_stats = {"error": str(e)}
+    
+    try:
+        task_stats = await get_task_stats().get_summary()
+    except Exception as e:
+        logger.error(f"Failed to read Celery task stats: {e}")
+        task_stats = {"error": str(e)}
+    
     return {
         "message": "System information endpoint",
-        "system_info": {},
+        "system_info": {
+            "ai_cache": get_openai_service().get_cache_stats(),
+            "ai_rate_limiter": get_openai_service().rate_limiter.get_stats(),
+            "ai_resilience": get_openai_service().resilience.get_stats(),
+            "ai_router": get_openai_service().router.get_stats(),
+            "ai_singleflight": get_openai_service().singleflight.get_stats(),
+            "content_singleflight": get_content_generator().singleflight.get_stats(),
+            "api_usage_recorder": get_usage_recorder().get_stats(),
+            "content_inventory": inventory_stats,
+            "celery_tasks": task_stats,
+            "post_scheduler": get_post_scheduler().get_stats(),
+            "database_pool": get_pool_stats()
+        },
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -2,35 +2,54 @@
 Analytics and performance tracking API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Optional
 import logging
 
+from ...analytics.rollups import DIMENSIONS, ROLLUP_MODELS, get_overview, get_performance
+from ...core.database import get_async_db
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
 @router.get("/")
-async def get_analytics_overview():
-    """Get analytics overview"""
+async def get_analytics_overview(
+    days: int = Query(30, ge=1, le=365),
+    top: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get analytics overview (from the daily rollups)"""
     return {
         "message": "Analytics overview endpoint",
-        "analytics": {
-            "total_posts": 0,
-            "total_engagement": 0,
-            "avg_engagement_rate": 0.0,
-            "top_performing_content": []
-        },
+        "analytics": await get_overview(db, days, top),
+        "days": days,
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
 @router.get("/performance")
-async def get_performance_metrics():
-    """Get performance metrics"""
+async def get_performance_metrics(
+    granularity: str = Query("day"),
+    days: int = Query(7, ge=1, le=365),
+    group_by: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get engagement per hour or day, optionally per post, account, platform or content type"""
+    if granularity not in ROLLUP_MODELS:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {sorted(ROLLUP_MODELS)}")
+    if group_by is not None and group_by not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {list(DIMENSIONS)}")
+
     return {
         "message": "Performance metrics endpoint",
-        "metrics": {},
+        "metrics": {
+            "granularity": granularity,
+            "group_by": group_by,
+            "series": await get_performance(db, granularity, days, group_by)
+        },
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -42,4 +61,4 @@ async def get_trending_topics():
         "message": "Trending topics endpoint",
         "trends": [],
         "timestamp": datetime.utcnow().isoformat()
-    } 
\ No newline at end of file
+    }
\ No newline at end of file
@@ -2,14 +2,19 @@
 Content generation API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
 import logging
+import json
 
 from ...core.config import ContentType, get_settings
-from ...content_pipeline.generator import get_content_generator
+from ...content_pipeline.generator import get_content_generator, ContentGenerationFailure
+from ...content_pipeline.jobs import get_job_store, JobStatus
+from ...content_pipeline.inventory import get_content_inventory
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -23,12 +28,14 @@ class ContentGenerationRequest(BaseModel):
     topic: Optional[str] = None
     location: Optional[str] = None
     target_audience: Optional[Dict[str, Any]] = None
+    fused: Optional[bool] = None
 
 
 class BulkContentGenerationRequest(BaseModel):
     count: int = 3
     content_types: Optional[List[ContentType]] = None
     locations: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
 
 
 class ContentResponse(BaseModel):
@@ -57,19 +64,33 @@ async def get_content_list():
 
 
 @router.post("/generate", response_model=ContentResponse)
-async def generate_content(request: ContentGenerationRequest):
-    """Generate a single piece of content"""
+async def generate_content(request: ContentGenerationRequest, response: Response):
+    """
+    Generate a single piece of content
+    
+    Requests without a topic or custom audience are served from the
+    pre-generated inventory when a piece is in stock (X-Content-Source header).
+    """
     try:
         logger.info(f"Generating content: {request.content_type}")
         
-        generator = get_content_generator()
+        content_data = None
+        if settings.INVENTORY_ENABLED and request.topic is None and request.target_audience is None:
+            content_data = await _take_from_inventory(request.content_type, request.location)
         
-        content_data = await generator.generate_content_piece(
-            content_type=request.content_type,
-            topic=request.topic,
-            target_audience=request.target_audience,
-            location=request.location
-        )
+        if content_data is not None:
+            response.headers["X-Content-Source"] = "inventory"
+        else:
+            response.headers["X-Content-Source"] = "generated"
+            generator = get_content_generator()
+            
+            content_data = await generator.generate_content_piece(
+                content_type=request.content_type,
+                topic=request.topic,
+                target_audience=request.target_audience,
+                location=request.location,
+                fused=request.fused
+            )
         
         return ContentResponse(
             content_type=content_data["content_type"],
@@ -87,6 +108,75 @@ async def generate_content(request: ContentGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Content generation failed: {str(e)}")
 
 
+async def _take_from_inventory(content_type: ContentType, location: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Pop a ready piece, triggering a refill on a miss (inventory errors fall back to live generation)"""
+    inventory = get_content_inventory()
+    try:
+        content_data = await inventory.take(content_type, location)
+    except Exception as e:
+        logger.warning(f"Content inventory unavailable, generating live: {e}")
+        return None
+    
+    if content_data is None:
+        try:
+            # A burst of misses queues one refill, published off the event loop
+            if await inventory.request_refill():
+                from ...content_pipeline.tasks import refill_content_inventory
+                await asyncio.to_thread(refill_content_inventory.delay)
+        except Exception as e:
+            logger.warning(f"Failed to trigger inventory refill: {e}")
+    
+    return content_data
+
+
+@router.get("/inventory")
+async def get_inventory_stats():
+    """Inventory depth, oldest piece age and refill lag per content type and location"""
+    try:
+        stats = await get_content_inventory().get_stats()
+    except Exception as e:
+        logger.error(f"Failed to read content inventory stats: {e}")
+        raise HTTPException(status_code=503, detail="Content inventory unavailable")
+    
+    return {
+        **stats,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.post("/generate/stream")
+async def stream_content_generation(request: ContentGenerationRequest):
+    """Stream script generation as Server-Sent Events (title first, then script)"""
+    generator = get_content_generator()
+    
+    async def event_stream():
+        try:
+            async for event in generator.stream_content_script(
+                content_type=request.content_type,
+                topic=request.topic,
+                target_audience=request.target_audience,
+                location=request.location
+            ):
+                yield _format_sse(event["event"], event)
+        except Exception as e:
+            logger.error(f"Streaming content generation failed: {e}")
+            yield _format_sse("error", {"detail": f"Content generation failed: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering (nginx)
+        }
+    )
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("/generate/bulk")
 async def generate_bulk_content(request: BulkContentGenerationRequest):
     """Generate multiple pieces of content"""
@@ -95,15 +185,23 @@ async def generate_bulk_content(request: BulkContentGenerationRequest):
         
         generator = get_content_generator()
         
-        content_pieces = await generator.generate_multiple_content_pieces(
+        content_pieces = []
+        errors = []
+        async for result in generator.stream_content_pieces(
             count=request.count,
             content_types=request.content_types,
-            locations=request.locations
-        )
+            locations=request.locations,
+            max_concurrency=request.max_concurrency
+        ):
+            if isinstance(result, ContentGenerationFailure):
+                errors.append(result.to_dict())
+            else:
+                content_pieces.append(result)
         
         return {
             "message": f"Generated {len(content_pieces)} pieces of content",
             "content": content_pieces,
+            "errors": errors,
             "requested": request.count,
             "generated": len(content_pieces),
             "timestamp": datetime.utcnow().isoformat()
@@ -114,6 +212,92 @@ async def generate_bulk_content(request: BulkContentGenerationRequest):
         raise HTTPException(status_code=500, detail=f"Bulk content generation failed: {str(e)}")
 
 
+@router.post("/jobs", status_code=202)
+async def submit_content_job(request: ContentGenerationRequest):
+    """Queue single content generation and return a job id immediately"""
+    from ...content_pipeline.tasks import generate_content_job
+    
+    generator = get_content_generator()
+    stages = list(generator.get_pipeline(request.fused).stages)
+    return await _submit_job("content", generate_content_job, json.loads(request.json()), stages)
+
+
+@router.post("/jobs/bulk", status_code=202)
+async def submit_bulk_content_job(request: BulkContentGenerationRequest):
+    """Queue bulk content generation and return a job id immediately"""
+    from ...content_pipeline.tasks import generate_bulk_content_job
+    
+    return await _submit_job(
+        "bulk", generate_bulk_content_job, json.loads(request.json()), [], total=request.count
+    )
+
+
+async def _submit_job(kind: str, task, payload: Dict[str, Any], stages: List[str], total: int = 1) -> Dict[str, Any]:
+    """Record a job and hand it to the content_generation queue"""
+    job_store = get_job_store()
+    
+    try:
+        job_id = await job_store.create(kind, payload, stages, total=total)
+    except Exception as e:
+        logger.error(f"Failed to create {kind} job: {e}")
+        raise HTTPException(status_code=503, detail="Job store unavailable")
+    
+    try:
+        # Publishing (and a claim-check write for large payloads) blocks; keep it off the event loop
+        await asyncio.to_thread(task.apply_async, args=[job_id, payload], task_id=job_id)
+    except Exception as e:
+        logger.error(f"Failed to enqueue {kind} job {job_id}: {e}")
+        await job_store.fail_async(job_id, f"Failed to enqueue: {e}")
+        raise HTTPException(status_code=503, detail="Task queue unavailable")
+    
+    return {
+        "job_id": job_id,
+        "status": JobStatus.QUEUED.value,
+        "status_url": f"/api/v1/content/jobs/{job_id}",
+        "result_url": f"/api/v1/content/jobs/{job_id}/result",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_content_job(job_id: str):
+    """Get job status and per-stage progress"""
+    job = await get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_content_job_result(
+    job_id: str,
+    wait: int = Query(0, ge=0, description="Seconds to long-poll for completion")
+):
+    """Get the job result, optionally waiting for it to finish"""
+    job_store = get_job_store()
+    job = await job_store.wait(job_id, min(wait, settings.CONTENT_JOB_MAX_WAIT_SECONDS))
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["status"] == JobStatus.FAILED.value:
+        raise HTTPException(status_code=500, detail=f"Content generation failed: {job.get('error', 'unknown error')}")
+    
+    if job["status"] != JobStatus.SUCCEEDED.value:
+        return JSONResponse(status_code=202, content=job)
+    
+    result = await job_store.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=410, detail="Job result expired")
+    
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "result": result,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @router.post("/generate/daily")
 async def trigger_daily_generation(background_tasks: BackgroundTasks):
     """Trigger daily content generation"""
@@ -2,10 +2,18 @@
 Social media platform API endpoints
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 import logging
 
+from ...core.database import get_async_db
+from ...core.models import ContentItem, ContentStatus, Post, SocialAccount
+from ...scheduler.post_scheduler import RESCHEDULABLE_STATUSES, ScheduleConflict, get_post_scheduler
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
@@ -21,19 +29,109 @@ async def get_social_accounts():
 
 
 @router.get("/posts")
-async def get_posts():
+async def get_posts(
+    status: Optional[ContentStatus] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get scheduled and posted content"""
+    query = select(Post).order_by(Post.scheduled_at.desc()).limit(limit)
+    if status is not None:
+        query = query.where(Post.status == status)
+    posts = (await db.scalars(query)).all()
+    
     return {
         "message": "Posts endpoint",
-        "posts": [],
+        "posts": [
+            {
+                "id": post.id,
+                "content_item_id": post.content_item_id,
+                "platform": post.platform.value,
+                "status": post.status.value,
+                "scheduled_at": post.scheduled_at.isoformat() if post.scheduled_at else None,
+                "posted_at": post.posted_at.isoformat() if post.posted_at else None,
+                "post_url": post.post_url
+            }
+            for post in posts
+        ],
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
-@router.post("/schedule")
-async def schedule_post():
-    """Schedule a post for publishing"""
+class PostScheduleRequest(BaseModel):
+    content_item_id: int
+    social_account_id: int
+    scheduled_at: datetime
+    caption: Optional[str] = None
+    hashtags: Optional[List[str]] = None
+
+
+class PostRescheduleRequest(BaseModel):
+    scheduled_at: datetime
+
+
+def _schedule_response(message: str, post: Post):
     return {
-        "message": "Post scheduled successfully",
+        "message": message,
+        "post_id": post.id,
+        "status": post.status.value,
+        "scheduled_at": post.scheduled_at.isoformat() if post.scheduled_at else None,
         "timestamp": datetime.utcnow().isoformat()
-    } 
\ No newline at end of file
+    }
+
+
+async def _get_scheduled_post(db: AsyncSession, post_id: int) -> Post:
+    post = await db.get(Post, post_id)
+    if post is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    if post.status not in RESCHEDULABLE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Post is already {post.status.value}")
+    return post
+
+
+@router.post("/schedule")
+async def schedule_post(request: PostScheduleRequest, db: AsyncSession = Depends(get_async_db)):
+    """Schedule a post for publishing at `scheduled_at`"""
+    content_item = await db.get(ContentItem, request.content_item_id)
+    if content_item is None:
+        raise HTTPException(status_code=404, detail="Content item not found")
+    account = await db.get(SocialAccount, request.social_account_id)
+    if account is None or not account.is_active:
+        raise HTTPException(status_code=404, detail="Social account not found")
+    
+    post = Post(
+        content_item_id=content_item.id,
+        social_account_id=account.id,
+        platform=account.platform,
+        caption=request.caption if request.caption is not None else content_item.description,
+        hashtags=request.hashtags if request.hashtags is not None else content_item.hashtags
+    )
+    db.add(post)
+    await db.flush()
+    await get_post_scheduler().schedule_post(db, post, request.scheduled_at)
+    
+    return _schedule_response("Post scheduled successfully", post)
+
+
+@router.put("/posts/{post_id}/schedule")
+async def reschedule_post(post_id: int, request: PostRescheduleRequest, db: AsyncSession = Depends(get_async_db)):
+    """Move a scheduled (or cancelled) post to a new time"""
+    post = await _get_scheduled_post(db, post_id)
+    try:
+        await get_post_scheduler().schedule_post(db, post, request.scheduled_at)
+    except ScheduleConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return _schedule_response("Post rescheduled successfully", post)
+
+
+@router.delete("/posts/{post_id}/schedule")
+async def cancel_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Cancel a scheduled post"""
+    post = await _get_scheduled_post(db, post_id)
+    try:
+        await get_post_scheduler().cancel_post(db, post)
+    except ScheduleConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return _schedule_response("Post schedule cancelled", post)
\ No newline at end of file
@@ -4,83 +4,238 @@ Content generator that orchestrates AI services to create complete content piece
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 import random
 
 from ..core.config import get_settings, ContentType
 from ..core.models import ContentItem, MediaAsset
 from ..ai_services.openai_service import get_openai_service
+from ..ai_services.resilience import deadline
+from ..core.singleflight import create_singleflight, make_flight_key
+from .stages import Stage, StageCallback, StageGraph
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+class ContentGenerationFailure:
+    """Error record for a content piece that failed during bulk generation"""
+    
+    def __init__(
+        self,
+        index: int,
+        content_type: ContentType,
+        location: Optional[str],
+        error: Exception
+    ):
+        self.index = index
+        self.content_type = content_type
+        self.location = location
+        self.error = error
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "content_type": self.content_type.value,
+            "location": self.location,
+            "error_type": type(self.error).__name__,
+            "error": str(self.error)
+        }
+
+
 class ContentGenerator:
     """Main content generator orchestrating AI services"""
     
     def __init__(self):
         self.openai_service = get_openai_service()
+        self.pipeline = self._build_pipeline()
+        self.fused_pipeline = self._build_fused_pipeline()
+        self.singleflight = create_singleflight("content")
+    
+    def get_pipeline(self, fused: Optional[bool] = None) -> StageGraph:
+        """Get the staged or fused pipeline (default: FUSED_GENERATION_ENABLED)"""
+        if fused is None:
+            fused = settings.FUSED_GENERATION_ENABLED
+        return self.fused_pipeline if fused else self.pipeline
+    
+    def _build_pipeline(self) -> StageGraph:
+        """
+        Build the content piece stage graph.
+        
+        Hashtags and the image prompt only need the script, and the image only
+        needs the image prompt, so those branches run concurrently.
+        """
+        return StageGraph([
+            Stage("script", self._stage_script),
+            Stage("hashtags", self._stage_hashtags, depends_on=["script"]),
+            Stage("image_prompt", self._stage_image_prompt, depends_on=["script"]),
+            Stage("image", self._stage_image, depends_on=["image_prompt"]),
+        ])
+    
+    def _build_fused_pipeline(self) -> StageGraph:
+        """
+        Build the fused-mode stage graph.
+        
+        One structured completion produces the script, hashtags, captions and
+        image prompt; each downstream stage uses the fused field when it is
+        valid and falls back to the single-purpose call otherwise.
+        """
+        return StageGraph([
+            Stage("fused", self._stage_fused),
+            Stage("script", self._stage_fused_script, depends_on=["fused"]),
+            Stage("hashtags", self._stage_fused_hashtags, depends_on=["script"]),
+            Stage("image_prompt", self._stage_fused_image_prompt, depends_on=["script"]),
+            Stage("captions", self._stage_fused_captions, depends_on=["fused"]),
+            Stage("image", self._stage_image, depends_on=["image_prompt"]),
+        ])
+    
+    async def _stage_script(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate the content script"""
+        return await self.openai_service.generate_content_script(
+            content_type=context["content_type"],
+            topic=context["topic"],
+            target_audience=context["target_audience"],
+            duration_seconds=context["duration_seconds"],
+            location=context["location"]
+        )
+    
+    async def _stage_hashtags(self, context: Dict[str, Any]) -> List[str]:
+        """Generate hashtags for the script"""
+        return await self.openai_service.generate_hashtags(
+            content=context["script"].get("script", ""),
+            platform="instagram",  # Default platform
+            max_hashtags=20
+        )
+    
+    async def _stage_image_prompt(self, context: Dict[str, Any]) -> str:
+        """Generate the image prompt for the script"""
+        return await self.openai_service.generate_image_prompt(
+            content=context["script"].get("script", ""),
+            style="modern",
+            aspect_ratio="9:16"
+        )
+    
+    async def _stage_image(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate the image from the image prompt"""
+        return await self.openai_service.generate_image(
+            prompt=context["image_prompt"],
+            size="1024x1792"  # 9:16 aspect ratio
+        )
+    
+    async def _stage_fused(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate all text assets in one structured completion"""
+        try:
+            return await self.openai_service.generate_fused_content(
+                content_type=context["content_type"],
+                topic=context["topic"],
+                target_audience=context["target_audience"],
+                duration_seconds=context["duration_seconds"],
+                location=context["location"],
+                platforms=["instagram", "tiktok"],
+                max_hashtags=20
+            )
+        except Exception as e:
+            logger.warning(f"Fused generation failed, falling back to single-purpose calls: {e}")
+            return {}
+    
+    async def _stage_fused_script(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Use the fused script, or generate it separately"""
+        if context["fused"].get("content"):
+            return context["fused"]["content"]
+        context["fallbacks"].append("script")
+        return await self._stage_script(context)
+    
+    async def _stage_fused_hashtags(self, context: Dict[str, Any]) -> List[str]:
+        """Use the fused hashtags, or generate them separately"""
+        if context["fused"].get("hashtags"):
+            return context["fused"]["hashtags"]
+        context["fallbacks"].append("hashtags")
+        return await self._stage_hashtags(context)
+    
+    async def _stage_fused_image_prompt(self, context: Dict[str, Any]) -> str:
+        """Use the fused image prompt, or generate it separately"""
+        if context["fused"].get("image_prompt"):
+            return context["fused"]["image_prompt"]
+        context["fallbacks"].append("image_prompt")
+        return await self._stage_image_prompt(context)
+    
+    async def _stage_fused_captions(self, context: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Use the fused captions; platforms without a valid caption get one from
+        generate_caption when the piece is adapted for that platform
+        """
+        return context["fused"].get("captions") or {}
     
     async def generate_content_piece(
         self,
         content_type: ContentType,
         topic: Optional[str] = None,
         target_audience: Optional[Dict[str, Any]] = None,
-        location: Optional[str] = None
+        location: Optional[str] = None,
+        fused: Optional[bool] = None,
+        on_stage_complete: Optional[StageCallback] = None
     ) -> Dict[str, Any]:
         """
         Generate a complete content piece with script, media, and metadata
+        
+        With `fused` (default: FUSED_GENERATION_ENABLED) the text assets come
+        from a single structured completion instead of one call each.
+        `on_stage_complete(stage, timing)` is called as each stage finishes.
+        All AI calls share one CONTENT_PIPELINE_DEADLINE_SECONDS deadline.
+        
+        Concurrent requests for the same explicit topic (e.g. a double-submit)
+        are coalesced into one generation; only the request that runs it gets
+        stage callbacks. Requests without a topic always generate a new piece.
         """
+        if fused is None:
+            fused = settings.FUSED_GENERATION_ENABLED
+        
+        async def generate():
+            return await self._generate_content_piece(
+                content_type, topic, target_audience, location, fused, on_stage_complete
+            )
+        
+        if not topic:
+            return await generate()
+        
+        key = make_flight_key("content_piece", content_type, topic, target_audience, location, fused)
+        return await self.singleflight.do(key, generate)
+    
+    async def _generate_content_piece(
+        self,
+        content_type: ContentType,
+        topic: Optional[str],
+        target_audience: Optional[Dict[str, Any]],
+        location: Optional[str],
+        fused: bool,
+        on_stage_complete: Optional[StageCallback]
+    ) -> Dict[str, Any]:
+        """Run the generation pipeline for one content piece"""
         try:
             logger.info(f"Generating {content_type.value} content - Topic: {topic}")
             
-            # Use default audience if not provided
-            if not target_audience:
-                target_audience = {
-                    "age_groups": settings.TARGET_AGE_GROUPS,
-                    "locations": settings.TARGET_LOCATIONS,
-                    "interests": ["general"]
-                }
-            
-            # Generate topic if not provided
-            if not topic:
-                topic = await self._generate_topic(content_type, location)
-            
-            # Generate duration
-            duration = random.randint(
-                settings.VIDEO_DURATION_MIN,
-                settings.VIDEO_DURATION_MAX
-            )
-            
-            # Generate content script
-            content_data = await self.openai_service.generate_content_script(
-                content_type=content_type,
-                topic=topic,
-                target_audience=target_audience,
-                duration_seconds=duration,
-                location=location
+            topic, target_audience, duration = await self._prepare_request(
+                content_type, topic, target_audience, location
             )
             
-            # Generate hashtags
-            hashtags = await self.openai_service.generate_hashtags(
-                content=content_data.get("script", ""),
-                platform="instagram",  # Default platform
-                max_hashtags=20
-            )
+            pipeline = self.get_pipeline(fused)
             
-            # Generate image prompt and create image
-            image_prompt = await self.openai_service.generate_image_prompt(
-                content=content_data.get("script", ""),
-                style="modern",
-                aspect_ratio="9:16"
-            )
+            # Run script, hashtags, image prompt and image stages
+            with deadline(settings.CONTENT_PIPELINE_DEADLINE_SECONDS):
+                results, stage_timings = await pipeline.run({
+                    "content_type": content_type,
+                    "topic": topic,
+                    "target_audience": target_audience,
+                    "duration_seconds": duration,
+                    "location": location,
+                    "fallbacks": []
+                }, on_stage_complete=on_stage_complete)
             
-            # Generate image
-            image_data = await self.openai_service.generate_image(
-                prompt=image_prompt,
-                size="1024x1792"  # 9:16 aspect ratio
-            )
+            content_data = results["script"]
+            hashtags = results["hashtags"]
+            image_prompt = results["image_prompt"]
+            image_data = results["image"]
             
             # Compile final content piece
             final_content = {
@@ -103,15 +258,21 @@ class ContentGenerator:
                 ],
                 "generated_at": datetime.utcnow().isoformat(),
                 "ai_metadata": {
-                    "content_model": "gpt-4o",
-                    "image_model": "dall-e-3",
+                    "content_model": self.openai_service.router.preferred_model("fused" if fused else "script"),
+                    "image_model": image_data.get("model", "dall-e-3"),
                     "generation_parameters": {
                         "temperature": 0.8,
                         "image_quality": "hd"
-                    }
+                    },
+                    "generation_mode": "fused" if fused else "staged",
+                    "stage_timings": stage_timings
                 }
             }
             
+            if fused:
+                final_content["captions"] = results["captions"]
+                final_content["ai_metadata"]["fused_fallbacks"] = results["fallbacks"]
+            
             # Add content-specific fields
             if content_type == ContentType.FACTS:
                 final_content["fact"] = content_data.get("fact", "")
@@ -137,42 +298,79 @@ class ContentGenerator:
             logger.error(f"Failed to generate content piece: {e}")
             raise
     
+    async def stream_content_script(
+        self,
+        content_type: ContentType,
+        topic: Optional[str] = None,
+        target_audience: Optional[Dict[str, Any]] = None,
+        location: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream script generation events (see OpenAIService.stream_content_script)
+        """
+        topic, target_audience, duration = await self._prepare_request(
+            content_type, topic, target_audience, location
+        )
+        
+        yield {"event": "start", "content_type": content_type.value, "topic": topic, "duration_seconds": duration}
+        
+        async for event in self.openai_service.stream_content_script(
+            content_type=content_type,
+            topic=topic,
+            target_audience=target_audience,
+            duration_seconds=duration,
+            location=location
+        ):
+            yield event
+    
+    async def _prepare_request(
+        self,
+        content_type: ContentType,
+        topic: Optional[str],
+        target_audience: Optional[Dict[str, Any]],
+        location: Optional[str]
+    ) -> Tuple[str, Dict[str, Any], int]:
+        """Fill in default audience, topic and duration for a generation request"""
+        # Use default audience if not provided
+        if not target_audience:
+            target_audience = {
+                "age_groups": settings.TARGET_AGE_GROUPS,
+                "locations": settings.TARGET_LOCATIONS,
+                "interests": ["general"]
+            }
+        
+        # Generate topic if not provided
+        if not topic:
+            topic = await self._generate_topic(content_type, location)
+        
+        # Generate duration
+        duration = random.randint(
+            settings.VIDEO_DURATION_MIN,
+            settings.VIDEO_DURATION_MAX
+        )
+        
+        return topic, target_audience, duration
+    
     async def generate_multiple_content_pieces(
         self,
         count: int,
         content_types: Optional[List[ContentType]] = None,
-        locations: Optional[List[str]] = None
+        locations: Optional[List[str]] = None,
+        max_concurrency: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Generate multiple content pieces in parallel
         """
         try:
-            if not content_types:
-                content_types = settings.CONTENT_TYPES
-            
-            if not locations:
-                locations = settings.TARGET_LOCATIONS
-            
-            # Create tasks for parallel generation
-            tasks = []
-            for i in range(count):
-                content_type = random.choice(content_types)
-                location = random.choice(locations) if locations else None
-                
-                task = self.generate_content_piece(
-                    content_type=content_type,
-                    location=location
-                )
-                tasks.append(task)
-            
-            # Execute all tasks in parallel
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Filter out exceptions and log errors
             successful_results = []
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Content generation {i+1} failed: {result}")
+            async for result in self.stream_content_pieces(
+                count=count,
+                content_types=content_types,
+                locations=locations,
+                max_concurrency=max_concurrency
+            ):
+                if isinstance(result, ContentGenerationFailure):
+                    logger.error(f"Content generation {result.index + 1} failed: {result.error}")
                 else:
                     successful_results.append(result)
             
@@ -183,6 +381,62 @@ class ContentGenerator:
             logger.error(f"Failed to generate multiple content pieces: {e}")
             raise
     
+    async def stream_content_pieces(
+        self,
+        count: int,
+        content_types: Optional[List[ContentType]] = None,
+        locations: Optional[List[str]] = None,
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[Union[Dict[str, Any], ContentGenerationFailure]]:
+        """
+        Generate content pieces with a bounded worker pool, yielding each piece
+        (or a ContentGenerationFailure) as soon as it completes.
+        
+        At most `max_concurrency` pieces are in flight, and workers pause while
+        the consumer has not picked up finished pieces, so memory stays flat.
+        """
+        if not content_types:
+            content_types = settings.CONTENT_TYPES
+        
+        if not locations:
+            locations = settings.TARGET_LOCATIONS
+        
+        concurrency = max(1, min(max_concurrency or settings.CONTENT_GENERATION_CONCURRENCY, count))
+        
+        work_queue: asyncio.Queue = asyncio.Queue()
+        for i in range(count):
+            work_queue.put_nowait(i)
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        
+        async def worker():
+            while True:
+                try:
+                    index = work_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                
+                content_type = random.choice(content_types)
+                location = random.choice(locations) if locations else None
+                
+                try:
+                    result = await self.generate_content_piece(
+                        content_type=content_type,
+                        location=location
+                    )
+                except Exception as e:
+                    result = ContentGenerationFailure(index, content_type, location, e)
+                
+                await result_queue.put(result)
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            for _ in range(count):
+                yield await result_queue.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
     async def _generate_topic(
         self,
         content_type: ContentType,
@@ -262,13 +516,15 @@ class ContentGenerator:
         try:
             platform_content = base_content.copy()
             
-            # Generate platform-specific caption
-            caption = await self.openai_service.generate_caption(
-                content=base_content["script"],
-                platform=platform.lower(),
-                tone="engaging",
-                include_cta=True
-            )
+            # Generate platform-specific caption (fused pieces already carry one)
+            caption = base_content.get("captions", {}).get(platform.lower())
+            if not caption:
+                caption = await self.openai_service.generate_caption(
+                    content=base_content["script"],
+                    platform=platform.lower(),
+                    tone="engaging",
+                    include_cta=True
+                )
             
             # Generate platform-specific hashtags
             hashtags = await self.openai_service.generate_hashtags(
@@ -0,0 +1,283 @@
+"""
+Pre-generated content inventory
+
+Keeps up to INVENTORY_TARGET_DEPTH ready content pieces per (content type,
+location) slot in Redis lists, so requests without a specific topic can be
+served in milliseconds. Pieces are served oldest first and dropped once they
+pass INVENTORY_MAX_AGE_SECONDS. Celery refills the slots in the background
+(see refill_content_inventory), using part of the AI rate limit budget.
+"""
+
+import logging
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+from ..core.config import ContentType, get_settings
+from ..core.serialization import dumps_payload, loads_payload
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+Slot = Tuple[ContentType, Optional[str]]
+
+# Slot name used for pieces generated without a location
+NO_LOCATION = "_"
+
+# Delete the refill lock only if this run still owns it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ContentInventory:
+    """Redis-backed stock of ready content pieces per content type and location"""
+
+    def __init__(
+        self,
+        url: str,
+        target_depth: int,
+        max_age_seconds: int,
+        locations: List[str],
+        prefix: str = "viralforge:inventory",
+        refill_debounce_seconds: int = 10
+    ):
+        self.url = url
+        self.target_depth = target_depth
+        self.max_age_seconds = max_age_seconds
+        self.locations = locations
+        self.prefix = prefix
+        self.refill_debounce_seconds = refill_debounce_seconds
+        self._redis: Optional[redis.Redis] = None
+        self._aredis: Optional[aioredis.Redis] = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        """Sync client, used from Celery workers"""
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.url)
+        return self._redis
+
+    @property
+    def aredis(self) -> aioredis.Redis:
+        """Async client, used from the API"""
+        if self._aredis is None:
+            self._aredis = aioredis.from_url(self.url)
+        return self._aredis
+
+    def slots(self) -> List[Slot]:
+        """Every stocked (content type, location) combination"""
+        return [
+            (content_type, location)
+            for content_type in settings.CONTENT_TYPES
+            for location in [None, *self.locations]
+        ]
+
+    def _slot_name(self, content_type: ContentType, location: Optional[str]) -> str:
+        return f"{content_type.value}:{location.lower() if location else NO_LOCATION}"
+
+    def _items_key(self, slot_name: str) -> str:
+        return f"{self.prefix}:{slot_name}"
+
+    def _below_target_key(self, slot_name: str) -> str:
+        return f"{self.prefix}:{slot_name}:below_target_since"
+
+    @property
+    def _stats_key(self) -> str:
+        return f"{self.prefix}:stats"
+
+    @staticmethod
+    def _encode(content: Dict[str, Any]) -> bytes:
+        return zlib.compress(dumps_payload({"stored_at": time.time(), "content": content}))
+
+    @staticmethod
+    def _decode(raw: bytes) -> Dict[str, Any]:
+        return loads_payload(zlib.decompress(raw))
+
+    # API side (async)
+
+    async def take(self, content_type: ContentType, location: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Pop the oldest fresh piece for a slot (None on a miss)"""
+        slot_name = self._slot_name(content_type, location)
+        key = self._items_key(slot_name)
+        now = time.time()
+
+        while True:
+            raw = await self.aredis.lpop(key)
+            if raw is None:
+                await self.aredis.hincrby(self._stats_key, "misses", 1)
+                await self._mark_below_target(slot_name, now)
+                return None
+
+            item = self._decode(raw)
+            if now - item["stored_at"] > self.max_age_seconds:
+                await self.aredis.hincrby(self._stats_key, "expired", 1)
+                continue
+
+            await self.aredis.hincrby(self._stats_key, "hits", 1)
+            await self._mark_below_target(slot_name, now)
+            content = item["content"]
+            content.setdefault("ai_metadata", {})["inventory_age_seconds"] = round(now - item["stored_at"], 1)
+            return content
+
+    async def _mark_below_target(self, slot_name: str, now: float):
+        """Start the refill-lag clock the first time a slot drops below target"""
+        if await self.aredis.llen(self._items_key(slot_name)) < self.target_depth:
+            await self.aredis.set(self._below_target_key(slot_name), now, nx=True)
+
+    async def request_refill(self) -> bool:
+        """Whether a miss should trigger a refill; at most one per debounce window across all API processes"""
+        return bool(await self.aredis.set(
+            f"{self.prefix}:refill_requested", 1, nx=True, ex=self.refill_debounce_seconds
+        ))
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Depth, oldest piece age and refill lag per slot, plus hit/miss counters"""
+        now = time.time()
+        slots = {}
+        for content_type, location in self.slots():
+            slot_name = self._slot_name(content_type, location)
+            key = self._items_key(slot_name)
+            async with self.aredis.pipeline(transaction=False) as pipe:
+                pipe.llen(key)
+                pipe.lindex(key, 0)
+                pipe.get(self._below_target_key(slot_name))
+                depth, oldest, below_since = await pipe.execute()
+
+            slots[slot_name] = {
+                "depth": depth,
+                "target": self.target_depth,
+                "oldest_age_seconds": round(now - self._decode(oldest)["stored_at"], 1) if oldest else None,
+                "refill_lag_seconds": round(now - float(below_since), 1) if below_since else 0.0
+            }
+
+        counters = {key.decode(): int(value) for key, value in (await self.aredis.hgetall(self._stats_key)).items()}
+        served = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "enabled": settings.INVENTORY_ENABLED,
+            "slots": slots,
+            "total_depth": sum(slot["depth"] for slot in slots.values()),
+            "max_refill_lag_seconds": max((slot["refill_lag_seconds"] for slot in slots.values()), default=0.0),
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "expired": counters.get("expired", 0),
+            "refilled": counters.get("refilled", 0),
+            "hit_rate": round(counters.get("hits", 0) / served, 3) if served else 0.0
+        }
+
+    # Worker side (sync)
+
+    def deficits(self) -> Dict[Slot, int]:
+        """How many pieces each slot is short of the target depth"""
+        slots = self.slots()
+        with self.redis.pipeline(transaction=False) as pipe:
+            for content_type, location in slots:
+                pipe.llen(self._items_key(self._slot_name(content_type, location)))
+            depths = pipe.execute()
+        deficits = {
+            slot: self.target_depth - depth
+            for slot, depth in zip(slots, depths)
+            if depth < self.target_depth
+        }
+
+        # Slots that were never filled start their refill-lag clock here
+        now = time.time()
+        with self.redis.pipeline(transaction=False) as pipe:
+            for content_type, location in deficits:
+                pipe.set(self._below_target_key(self._slot_name(content_type, location)), now, nx=True)
+            pipe.execute()
+        return deficits
+
+    def add(self, content_type: ContentType, location: Optional[str], content: Dict[str, Any]):
+        """Stock a freshly generated piece"""
+        slot_name = self._slot_name(content_type, location)
+        key = self._items_key(slot_name)
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, self._encode(content))
+            pipe.ltrim(key, -self.target_depth, -1)
+            pipe.llen(key)
+            pipe.hincrby(self._stats_key, "refilled", 1)
+            _, _, depth, _ = pipe.execute()
+
+        if depth >= self.target_depth:
+            self.redis.delete(self._below_target_key(slot_name))
+
+    def drop_expired(self) -> int:
+        """Remove stale pieces from the front of every slot"""
+        dropped = 0
+        cutoff = time.time() - self.max_age_seconds
+        for content_type, location in self.slots():
+            key = self._items_key(self._slot_name(content_type, location))
+            while True:
+                oldest = self.redis.lindex(key, 0)
+                if oldest is None or self._decode(oldest)["stored_at"] >= cutoff:
+                    break
+                self.redis.lpop(key)
+                dropped += 1
+        if dropped:
+            self.redis.hincrby(self._stats_key, "expired", dropped)
+        return dropped
+
+    def acquire_refill_lock(self, ttl_seconds: int) -> Optional[str]:
+        """Only one refill run at a time across all workers; returns the owner token, or None if held"""
+        token = uuid.uuid4().hex
+        if self.redis.set(f"{self.prefix}:refill_lock", token, nx=True, ex=ttl_seconds):
+            return token
+        return None
+
+    def release_refill_lock(self, token: str):
+        """Release the lock unless it expired and another run took it"""
+        self.redis.eval(_RELEASE_SCRIPT, 1, f"{self.prefix}:refill_lock", token)
+
+
+def refill_budget() -> int:
+    """
+    Pieces one refill run may generate.
+
+    Every piece needs one image, so the image model's RPM limit bounds
+    throughput; refills use INVENTORY_REFILL_BUDGET_FRACTION of it per
+    refill interval and leave the rest for interactive requests.
+    """
+    image_models = [route.split(":", 1)[-1] for route in settings.AI_ROUTES.get("image", [])]
+    image_rpm = settings.AI_RPM_LIMITS.get(image_models[0]) if image_models else None
+    if not image_rpm:
+        return settings.INVENTORY_REFILL_MAX_PIECES
+    per_interval = image_rpm * settings.INVENTORY_REFILL_INTERVAL_SECONDS / 60
+    budget = int(per_interval * settings.INVENTORY_REFILL_BUDGET_FRACTION)
+    return max(1, min(budget, settings.INVENTORY_REFILL_MAX_PIECES))
+
+
+def plan_refill(deficits: Dict[Slot, int], budget: int) -> List[Slot]:
+    """Spread the budget across slots, emptiest first, one piece per slot per round"""
+    remaining = dict(sorted(deficits.items(), key=lambda item: -item[1]))
+    plan: List[Slot] = []
+    while remaining and len(plan) < budget:
+        for slot in list(remaining):
+            if len(plan) >= budget:
+                break
+            plan.append(slot)
+            remaining[slot] -= 1
+            if remaining[slot] <= 0:
+                del remaining[slot]
+    return plan
+
+
+# Global inventory instance
+content_inventory = ContentInventory(
+    url=settings.REDIS_URL,
+    target_depth=settings.INVENTORY_TARGET_DEPTH,
+    max_age_seconds=settings.INVENTORY_MAX_AGE_SECONDS,
+    locations=settings.INVENTORY_LOCATIONS
+)
+
+
+def get_content_inventory() -> ContentInventory:
+    """Get the content inventory instance"""
+    return content_inventory
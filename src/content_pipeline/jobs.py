@@ -0,0 +1,203 @@
+"""
+Job store for asynchronous content generation
+
+The API records a job and hands the work to the content_generation queue;
+workers report per-stage progress and store the result here. Status lives in
+a small Redis hash, the result in a separate compressed key, and waiters are
+woken through a per-job notification list for long-polling.
+"""
+
+import json
+import logging
+import time
+import uuid
+import zlib
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED.value, JobStatus.FAILED.value}
+
+
+class JobStore:
+    """Redis-backed job status and result store"""
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "viralforge:jobs"):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._redis: Optional[redis.Redis] = None
+        self._aredis: Optional[aioredis.Redis] = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        """Sync client, used from Celery workers"""
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.url)
+        return self._redis
+
+    @property
+    def aredis(self) -> aioredis.Redis:
+        """Async client, used from the API"""
+        if self._aredis is None:
+            self._aredis = aioredis.from_url(self.url)
+        return self._aredis
+
+    def _status_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    def _result_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}:result"
+
+    def _done_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}:done"
+
+    # API side (async)
+
+    async def create(self, kind: str, request: Dict[str, Any], stages: List[str], total: int = 1) -> str:
+        """Register a new queued job and return its id"""
+        job_id = uuid.uuid4().hex
+        key = self._status_key(job_id)
+        async with self.aredis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "job_id": job_id,
+                "kind": kind,
+                "status": JobStatus.QUEUED.value,
+                "request": json.dumps(request),
+                **{f"stage:{stage}": "" for stage in stages},
+                "completed": 0,
+                "total": total,
+                "created_at": time.time()
+            })
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job status and progress (None if unknown or expired)"""
+        raw = await self.aredis.hgetall(self._status_key(job_id))
+        if not raw:
+            return None
+        return self._decode_status(raw)
+
+    async def get_result(self, job_id: str) -> Optional[Any]:
+        """Get the stored result of a finished job"""
+        raw = await self.aredis.get(self._result_key(job_id))
+        if raw is None:
+            return None
+        return json.loads(zlib.decompress(raw))
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Long-poll until the job finishes or `timeout` seconds pass"""
+        job = await self.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES or timeout <= 0:
+            return job
+
+        # The worker pushes one token per finish; put it back for other waiters
+        token = await self.aredis.blpop(self._done_key(job_id), timeout=max(1, int(timeout)))
+        if token is not None:
+            await self.aredis.rpush(self._done_key(job_id), token[1])
+        return await self.get(job_id)
+
+    async def fail_async(self, job_id: str, error: str):
+        """Mark a job failed from the API (e.g. the broker rejected it)"""
+        await self.aredis.hset(self._status_key(job_id), mapping={
+            "status": JobStatus.FAILED.value,
+            "error": error,
+            "finished_at": time.time()
+        })
+
+    # Worker side (sync; async task bodies call these through asyncio.to_thread)
+
+    def mark_running(self, job_id: str):
+        self.redis.hset(self._status_key(job_id), mapping={
+            "status": JobStatus.RUNNING.value,
+            "started_at": time.time()
+        })
+
+    def record_stage(self, job_id: str, stage: str, timing: Dict[str, float]):
+        """Record a finished pipeline stage"""
+        self.redis.hset(self._status_key(job_id), f"stage:{stage}", json.dumps(timing))
+
+    def record_progress(self, job_id: str, completed: int, failed: int = 0):
+        """Record bulk job progress"""
+        self.redis.hset(self._status_key(job_id), mapping={"completed": completed, "failed": failed})
+
+    def complete(self, job_id: str, result: Any):
+        """Store the result and wake long-poll waiters"""
+        payload = zlib.compress(json.dumps(result, default=str).encode("utf-8"))
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._result_key(job_id), payload, ex=self.ttl_seconds)
+            pipe.hset(self._status_key(job_id), mapping={
+                "status": JobStatus.SUCCEEDED.value,
+                "result_bytes": len(payload),
+                "finished_at": time.time()
+            })
+            self._notify(pipe, job_id)
+            pipe.execute()
+
+    def fail(self, job_id: str, error: str):
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._status_key(job_id), mapping={
+                "status": JobStatus.FAILED.value,
+                "error": error,
+                "finished_at": time.time()
+            })
+            self._notify(pipe, job_id)
+            pipe.execute()
+
+    def _notify(self, pipe, job_id: str):
+        pipe.rpush(self._done_key(job_id), 1)
+        pipe.expire(self._done_key(job_id), self.ttl_seconds)
+
+    @staticmethod
+    def _decode_status(raw: Dict[bytes, bytes]) -> Dict[str, Any]:
+        data = {key.decode(): value.decode() for key, value in raw.items()}
+        job = {
+            "job_id": data["job_id"],
+            "kind": data.get("kind"),
+            "status": data["status"],
+            "stages": {
+                key[len("stage:"):]: json.loads(value) if value else None
+                for key, value in data.items()
+                if key.startswith("stage:")
+            },
+            "progress": {
+                "completed": int(data.get("completed", 0)),
+                "failed": int(data.get("failed", 0)),
+                "total": int(data.get("total", 1))
+            },
+            "created_at": float(data["created_at"])
+        }
+        for field in ("started_at", "finished_at"):
+            if field in data:
+                job[field] = float(data[field])
+        if "error" in data:
+            job["error"] = data["error"]
+        if "result_bytes" in data:
+            job["result_bytes"] = int(data["result_bytes"])
+        return job
+
+
+# Global job store instance
+job_store = JobStore(settings.REDIS_URL, settings.CONTENT_JOB_TTL_SECONDS)
+
+
+def get_job_store() -> JobStore:
+    """Get the job store instance"""
+    return job_store
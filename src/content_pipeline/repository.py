@@ -0,0 +1,141 @@
+"""
+Persistence of generated content pieces
+
+Maps the dicts returned by ContentGenerator.generate_content_piece to
+ContentItem and MediaAsset rows. Batches are written with two bulk INSERTs
+in one transaction: content items with RETURNING (ids come back in
+parameter order, so each piece's media rows get the right parent id), then
+all media assets. SQLAlchemy sends these as multi-row INSERT statements on
+Postgres and SQLite instead of one round trip per row.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..core.models import ContentItem, ContentStatus, ContentType, MediaAsset
+
+logger = logging.getLogger(__name__)
+
+# Piece fields stored in ContentItem columns; everything else goes to generation_metadata
+_COLUMN_FIELDS = {
+    "content_type", "title", "script", "description", "hashtags",
+    "target_audience", "location", "media_assets", "ai_metadata"
+}
+
+
+def _dimensions(size: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Width and height from an image size such as "1024x1792" """
+    try:
+        width, height = str(size).lower().split("x")
+        return int(width), int(height)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def content_item_row(piece: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+    """ContentItem column values for a generated piece"""
+    ai_metadata = piece.get("ai_metadata") or {}
+    target_audience = piece.get("target_audience") or {}
+    location = piece.get("location")
+
+    return {
+        "user_id": user_id,
+        "title": (piece.get("title") or "")[:255],
+        "content_type": ContentType(piece["content_type"]),
+        "script": piece.get("script"),
+        "description": piece.get("description"),
+        "hashtags": piece.get("hashtags"),
+        "ai_model_used": ai_metadata.get("content_model"),
+        "generation_metadata": {
+            **ai_metadata,
+            **{key: value for key, value in piece.items() if key not in _COLUMN_FIELDS}
+        },
+        "target_locations": [location] if location else target_audience.get("locations"),
+        "target_demographics": target_audience or None,
+        "status": ContentStatus.GENERATED
+    }
+
+
+def media_asset_rows(piece: Dict[str, Any], content_item_id: int) -> List[Dict[str, Any]]:
+    """MediaAsset column values for a generated piece's media"""
+    ai_metadata = piece.get("ai_metadata") or {}
+    rows = []
+    for asset in piece.get("media_assets") or []:
+        width, height = _dimensions(asset.get("size"))
+        rows.append({
+            "content_item_id": content_item_id,
+            "asset_type": asset.get("type", "image"),
+            "file_url": asset.get("url"),
+            "width": width,
+            "height": height,
+            "ai_service_used": ai_metadata.get("image_model"),
+            "generation_prompt": asset.get("prompt"),
+            "generation_parameters": {
+                **(ai_metadata.get("generation_parameters") or {}),
+                "size": asset.get("size"),
+                "revised_prompt": asset.get("revised_prompt")
+            },
+            "is_processed": False,
+            "processing_status": "generated"
+        })
+    return rows
+
+
+class ContentRepository:
+    """Writes generated content pieces in bulk"""
+
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+
+    def save_pieces(self, db: Session, pieces: Iterable[Dict[str, Any]], user_id: int) -> List[int]:
+        """
+        Insert pieces and their media assets, one transaction per batch.
+
+        Returns the new ContentItem ids in the order of `pieces`. A failing
+        batch is rolled back and the error raised; earlier batches stay
+        committed.
+        """
+        pieces = list(pieces)
+        ids: List[int] = []
+        for start in range(0, len(pieces), self.batch_size):
+            batch = pieces[start:start + self.batch_size]
+            try:
+                ids.extend(self._insert_batch(db, batch, user_id))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to save {len(batch)} content pieces: {e}")
+                raise
+
+        logger.info(f"Saved {len(ids)} content pieces")
+        return ids
+
+    def _insert_batch(self, db: Session, batch: List[Dict[str, Any]], user_id: int) -> List[int]:
+        if not batch:
+            return []
+
+        item_ids = db.scalars(
+            insert(ContentItem).returning(ContentItem.id, sort_by_parameter_order=True),
+            [content_item_row(piece, user_id) for piece in batch]
+        ).all()
+
+        assets = [
+            row
+            for piece, item_id in zip(batch, item_ids)
+            for row in media_asset_rows(piece, item_id)
+        ]
+        if assets:
+            db.execute(insert(MediaAsset), assets)
+        return list(item_ids)
+
+
+# Global content repository instance
+content_repository = ContentRepository()
+
+
+def get_content_repository() -> ContentRepository:
+    """Get the content repository instance"""
+    return content_repository
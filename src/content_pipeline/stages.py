@@ -0,0 +1,138 @@
+"""
+Stage graph executor for the content generation pipeline
+
+A pipeline is a set of named async stages with declared dependencies. Stages
+whose dependencies are satisfied run concurrently, and every stage records
+its own timing.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+StageCallback = Callable[[str, Dict[str, Any]], Any]
+
+
+class StageError(Exception):
+    """Raised when a pipeline stage fails"""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """A named async pipeline step and the stages it depends on"""
+
+    def __init__(self, name: str, func: StageFunc, depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, depends_on={self.depends_on!r})"
+
+
+class StageGraph:
+    """Dependency graph of stages with a concurrent executor"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self._validate()
+
+    def _validate(self):
+        """Reject unknown dependencies and cycles"""
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def with_stage(self, stage: Stage) -> "StageGraph":
+        """Return a new graph with `stage` added or replaced"""
+        stages = dict(self.stages)
+        stages[stage.name] = stage
+        return StageGraph(list(stages.values()))
+
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        on_stage_complete: Optional[StageCallback] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+        """
+        Run every stage as soon as its dependencies finish.
+
+        Each stage receives a dict with the pipeline inputs plus the results
+        of all stages completed so far, keyed by stage name. Returns that dict
+        and per-stage timings (offset from pipeline start and duration, in ms).
+        `on_stage_complete` may return an awaitable; it is awaited after the
+        next ready stages have started.
+        """
+        results = dict(inputs)
+        timings: Dict[str, Dict[str, float]] = {}
+        pending = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+        pipeline_started = time.perf_counter()
+
+        async def run_stage(stage: Stage) -> Any:
+            started = time.perf_counter()
+            try:
+                return await stage.func(results)
+            finally:
+                timings[stage.name] = {
+                    "started_ms": round((started - pipeline_started) * 1000, 1),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+                }
+
+        def start_ready_stages():
+            for name, stage in list(pending.items()):
+                if all(dependency in results for dependency in stage.depends_on):
+                    del pending[name]
+                    running[asyncio.ensure_future(run_stage(stage))] = name
+
+        try:
+            start_ready_stages()
+            while running:
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                callbacks = []
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        results[name] = task.result()
+                    except Exception as e:
+                        raise StageError(name, e) from e
+
+                    if on_stage_complete:
+                        callbacks.append(on_stage_complete(name, timings[name]))
+                start_ready_stages()
+                for outcome in callbacks:
+                    if inspect.isawaitable(outcome):
+                        await outcome
+        finally:
+            for task in running:
+                task.cancel()
+
+        return results, timings
@@ -2,38 +2,48 @@
 Celery tasks for content generation pipeline
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from ..core.celery_app import celery_app
-from ..core.config import get_settings
-from .generator import get_content_generator
+from celery import chord, group
+
+from ..core.celery_app import AsyncTask, celery_app
+from ..core.config import get_settings, ContentType
+from .generator import get_content_generator, ContentGenerationFailure
+from .jobs import get_job_store
+from .inventory import get_content_inventory, plan_refill, refill_budget
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
-@celery_app.task(bind=True)
-def generate_daily_content(self):
+@celery_app.task(bind=True, base=AsyncTask)
+async def generate_daily_content(self):
     """
-    Generate daily content based on configuration
+    Generate the daily batch of content pieces across the configured
+    content types and target locations
     """
     try:
         logger.info("Starting daily content generation")
         
-        # This would normally:
-        # 1. Fetch trending topics
-        # 2. Generate content pieces
-        # 3. Save to database
-        # 4. Schedule for posting
+        generator = get_content_generator()
+        content, errors = [], []
+        async for result in generator.stream_content_pieces(count=settings.DAILY_CONTENT_COUNT):
+            if isinstance(result, ContentGenerationFailure):
+                errors.append(result.to_dict())
+            else:
+                content.append(result)
         
-        # For now, just log the action
-        logger.info(f"Generated {settings.DAILY_CONTENT_COUNT} pieces of content")
+        logger.info(f"Generated {len(content)} pieces of content ({len(errors)} failed)")
         
         return {
             "status": "success",
-            "generated": settings.DAILY_CONTENT_COUNT,
+            "generated": len(content),
+            "failed": len(errors),
+            "content": content,
+            "errors": errors,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -76,22 +86,26 @@ def fetch_trending_topics(self):
         self.retry(countdown=300, max_retries=3)
 
 
-@celery_app.task(bind=True)
-def generate_content_for_topic(self, topic: str, content_type: str):
+@celery_app.task(bind=True, base=AsyncTask)
+async def generate_content_for_topic(self, topic: str, content_type: str, location: Optional[str] = None):
     """
     Generate content for a specific topic
     """
     try:
         logger.info(f"Generating {content_type} content for topic: {topic}")
         
-        # This would use the content generator
         generator = get_content_generator()
+        content = await generator.generate_content_piece(
+            content_type=ContentType(content_type),
+            topic=topic,
+            location=location
+        )
         
-        # Simulate content generation (would be real in implementation)
         result = {
             "topic": topic,
             "content_type": content_type,
             "status": "generated",
+            "content": content,
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -103,27 +117,94 @@ def generate_content_for_topic(self, topic: str, content_type: str):
         self.retry(countdown=60, max_retries=3)
 
 
+@celery_app.task(bind=True, base=AsyncTask)
+async def generate_content_for_topics(self, content_requests: List[Dict[str, Any]]):
+    """
+    Generate content for several topics in one task, sharing the worker's
+    clients and running up to CONTENT_GENERATION_CONCURRENCY at once
+    """
+    generator = get_content_generator()
+    semaphore = asyncio.Semaphore(settings.CONTENT_GENERATION_CONCURRENCY)
+    
+    async def generate(request: Dict[str, Any]) -> Dict[str, Any]:
+        result = {
+            "topic": request.get("topic"),
+            "content_type": request.get("content_type")
+        }
+        try:
+            async with semaphore:
+                result["content"] = await generator.generate_content_piece(
+                    content_type=ContentType(request["content_type"]),
+                    topic=request.get("topic"),
+                    location=request.get("location")
+                )
+            result["status"] = "generated"
+        except Exception as e:
+            logger.error(f"Content generation failed for topic {request.get('topic')}: {e}")
+            result.update(status="failed", error=str(e))
+        result["timestamp"] = datetime.utcnow().isoformat()
+        return result
+    
+    logger.info(f"Generating content for {len(content_requests)} topics")
+    return list(await asyncio.gather(*[generate(request) for request in content_requests]))
+
+
+@celery_app.task(bind=True)
+def aggregate_batch_results(self, chunk_results: List[List[Dict[str, Any]]]):
+    """
+    Chord callback: combine the per-chunk results of a content batch
+    """
+    results = [result for chunk in chunk_results for result in chunk]
+    generated = [result for result in results if result.get("status") == "generated"]
+    
+    logger.info(f"Content batch finished: {len(generated)} of {len(results)} generated")
+    return {
+        "status": "batch_completed",
+        "generated": len(generated),
+        "failed": len(results) - len(generated),
+        "results": results,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @celery_app.task(bind=True)
-def process_content_batch(self, content_requests: List[Dict[str, Any]]):
+def process_content_batch(
+    self,
+    content_requests: List[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    aggregate: bool = False
+):
     """
     Process a batch of content generation requests
+    
+    Requests are split into chunks of `chunk_size` (default:
+    CONTENT_BATCH_CHUNK_SIZE) and enqueued as one group, so a batch costs
+    one message per chunk rather than per topic. `batch_id` is the saved
+    group result, or with `aggregate` the chord callback whose result
+    collects every chunk's results.
     """
     try:
         logger.info(f"Processing batch of {len(content_requests)} content requests")
         
-        results = []
-        for request in content_requests:
-            # Process each content request
-            result = generate_content_for_topic.delay(
-                request.get("topic"),
-                request.get("content_type")
-            )
-            results.append(result.id)
+        size = max(1, chunk_size or settings.CONTENT_BATCH_CHUNK_SIZE)
+        chunks = [content_requests[i:i + size] for i in range(0, len(content_requests), size)]
+        signatures = [generate_content_for_topics.s(chunk) for chunk in chunks]
+        task_ids = [signature.freeze().id for signature in signatures]
+        
+        if aggregate:
+            batch_id = chord(group(signatures))(aggregate_batch_results.s()).id
+        else:
+            group_result = group(signatures).apply_async()
+            group_result.save()
+            batch_id = group_result.id
         
         return {
             "status": "batch_processed",
-            "task_ids": results,
-            "count": len(results),
+            "batch_id": batch_id,
+            "aggregated": aggregate,
+            "task_ids": task_ids,
+            "count": len(content_requests),
+            "chunks": len(chunks),
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -158,4 +239,148 @@ def cleanup_old_content(self):
         
     except Exception as e:
         logger.error(f"Content cleanup failed: {e}")
-        self.retry(countdown=300, max_retries=3) 
\ No newline at end of file
+        self.retry(countdown=300, max_retries=3)
+
+
+@celery_app.task(bind=True, base=AsyncTask)
+async def generate_content_job(self, job_id: str, request: Dict[str, Any]):
+    """
+    Generate a single content piece for an async API job, reporting each
+    pipeline stage to the job store
+    """
+    job_store = get_job_store()
+    
+    try:
+        logger.info(f"Running content job {job_id}")
+        await asyncio.to_thread(job_store.mark_running, job_id)
+        
+        generator = get_content_generator()
+        content = await generator.generate_content_piece(
+            content_type=ContentType(request["content_type"]),
+            topic=request.get("topic"),
+            target_audience=request.get("target_audience"),
+            location=request.get("location"),
+            fused=request.get("fused"),
+            on_stage_complete=lambda stage, timing: asyncio.to_thread(job_store.record_stage, job_id, stage, timing)
+        )
+        
+        await asyncio.to_thread(job_store.record_progress, job_id, completed=1)
+        await asyncio.to_thread(job_store.complete, job_id, content)
+        return {
+            "job_id": job_id,
+            "status": "succeeded",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Content job {job_id} failed: {e}")
+        await asyncio.to_thread(job_store.fail, job_id, str(e))
+        return {
+            "job_id": job_id,
+            "status": "failed",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+@celery_app.task(bind=True, base=AsyncTask)
+async def generate_bulk_content_job(self, job_id: str, request: Dict[str, Any]):
+    """
+    Generate multiple content pieces for an async API job, reporting
+    progress as each piece finishes
+    """
+    job_store = get_job_store()
+    
+    async def run() -> Dict[str, Any]:
+        generator = get_content_generator()
+        content, errors = [], []
+        
+        async for result in generator.stream_content_pieces(
+            count=request["count"],
+            content_types=[ContentType(value) for value in request.get("content_types") or []],
+            locations=request.get("locations"),
+            max_concurrency=request.get("max_concurrency")
+        ):
+            if isinstance(result, ContentGenerationFailure):
+                errors.append(result.to_dict())
+            else:
+                content.append(result)
+            await asyncio.to_thread(job_store.record_progress, job_id, completed=len(content), failed=len(errors))
+        
+        return {"content": content, "errors": errors}
+    
+    try:
+        logger.info(f"Running bulk content job {job_id}")
+        await asyncio.to_thread(job_store.mark_running, job_id)
+        
+        result = await run()
+        
+        await asyncio.to_thread(job_store.complete, job_id, result)
+        return {
+            "job_id": job_id,
+            "status": "succeeded",
+            "generated": len(result["content"]),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Bulk content job {job_id} failed: {e}")
+        await asyncio.to_thread(job_store.fail, job_id, str(e))
+        return {
+            "job_id": job_id,
+            "status": "failed",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+
+@celery_app.task(bind=True, base=AsyncTask)
+async def refill_content_inventory(self):
+    """
+    Top up the pre-generated content inventory, emptiest slots first,
+    within a share of the image model's rate limit
+    """
+    if not settings.INVENTORY_ENABLED:
+        return {"status": "disabled", "timestamp": datetime.utcnow().isoformat()}
+    
+    inventory = get_content_inventory()
+    lock_token = await asyncio.to_thread(
+        inventory.acquire_refill_lock, ttl_seconds=settings.INVENTORY_REFILL_INTERVAL_SECONDS * 5
+    )
+    if lock_token is None:
+        return {"status": "skipped", "reason": "refill already running", "timestamp": datetime.utcnow().isoformat()}
+    
+    async def run(plan) -> Dict[str, int]:
+        generator = get_content_generator()
+        semaphore = asyncio.Semaphore(settings.CONTENT_GENERATION_CONCURRENCY)
+        
+        async def refill(content_type: ContentType, location):
+            async with semaphore:
+                content = await generator.generate_content_piece(content_type=content_type, location=location)
+            await asyncio.to_thread(inventory.add, content_type, location, content)
+        
+        results = await asyncio.gather(*[refill(*slot) for slot in plan], return_exceptions=True)
+        for error in (result for result in results if isinstance(result, Exception)):
+            logger.warning(f"Inventory refill piece failed: {error}")
+        failed = sum(1 for result in results if isinstance(result, Exception))
+        return {"added": len(plan) - failed, "failed": failed}
+    
+    try:
+        expired = await asyncio.to_thread(inventory.drop_expired)
+        plan = plan_refill(await asyncio.to_thread(inventory.deficits), refill_budget())
+        if not plan:
+            return {"status": "full", "expired": expired, "timestamp": datetime.utcnow().isoformat()}
+        
+        logger.info(f"Refilling content inventory with {len(plan)} pieces")
+        counts = await run(plan)
+        
+        return {
+            "status": "refilled",
+            **counts,
+            "expired": expired,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+    except Exception as e:
+        logger.error(f"Content inventory refill failed: {e}")
+        return {"status": "failed", "error": str(e), "timestamp": datetime.utcnow().isoformat()}
+    finally:
+        await asyncio.to_thread(inventory.release_refill_lock, lock_token)
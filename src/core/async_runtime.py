@@ -0,0 +1,164 @@
+"""
+Per-process asyncio runtime for Celery workers
+
+Coroutine tasks run on one long-lived event loop per worker process (in a
+background thread) instead of a fresh loop per task. Loop-bound resources
+such as the shared HTTP connection pool and the async Redis clients are then
+reused across tasks rather than rebuilt and torn down each time.
+
+Both the loop and the HTTP client are created lazily and remember the process
+that created them, so nothing is carried across the prefork fork. Worker
+threads (e.g. `--pool threads`) can submit coroutines to the same loop and
+have their I/O-bound generations multiplexed on it.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+import httpx
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+
+class WorkerEventLoop:
+    """A persistent event loop running in a daemon thread"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The loop for this process, started on first use"""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._start()
+            return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="worker-event-loop", daemon=True)
+        thread.start()
+        ready.wait()
+
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+        logger.info(f"Started worker event loop in process {self._pid}")
+
+    def run(self, coro: Awaitable[T], cancel_grace_seconds: float = 5.0) -> T:
+        """
+        Run a coroutine on the worker loop and block until it finishes.
+
+        If the waiting thread is interrupted (e.g. by SoftTimeLimitExceeded),
+        the coroutine is cancelled and given `cancel_grace_seconds` to run
+        its cleanup before the exception propagates.
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("WorkerEventLoop.run() called from the worker loop itself; await the coroutine instead")
+
+        finished = threading.Event()
+
+        async def tracked() -> T:
+            try:
+                return await coro
+            finally:
+                finished.set()
+
+        future = asyncio.run_coroutine_threadsafe(tracked(), loop)
+        try:
+            return future.result()
+        except BaseException as e:
+            if not future.done():
+                logger.warning(f"Cancelling coroutine after {type(e).__name__}")
+                future.cancel()
+                if not finished.wait(cancel_grace_seconds):
+                    logger.warning(f"Cancelled coroutine did not finish within {cancel_grace_seconds}s")
+            raise
+
+    def stop(self, timeout: float = 10.0):
+        """Cancel outstanding work, close the shared HTTP client and stop the loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = self._pid = None
+
+        async def shutdown():
+            current = asyncio.current_task()
+            tasks = [task for task in asyncio.all_tasks() if task is not current]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await close_http_client()
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Worker event loop shutdown failed: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+
+
+# Shared HTTP connection pool for provider clients
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_pid: Optional[int] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The process-wide async HTTP client used by AI provider SDKs.
+
+    Connections are opened lazily, so a client created before the worker
+    forks (e.g. at import time) is safe for the child to use as long as the
+    parent never sent a request through it.
+    """
+    global _http_client, _http_client_pid
+    if _http_client is None or _http_client_pid != os.getpid():
+        _http_client = httpx.AsyncClient(
+            timeout=settings.AI_REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            follow_redirects=True
+        )
+        _http_client_pid = os.getpid()
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client if this process created it"""
+    global _http_client
+    if _http_client is not None and _http_client_pid == os.getpid():
+        await _http_client.aclose()
+        _http_client = None
+
+
+# Global worker loop instance
+worker_loop = WorkerEventLoop()
+
+
+def get_worker_loop() -> WorkerEventLoop:
+    """Get the worker event loop instance"""
+    return worker_loop
@@ -4,15 +4,36 @@ Celery configuration for background task processing
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import (
+    before_task_publish, worker_init, worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
+)
+from contextvars import ContextVar
+from datetime import datetime
+import inspect
 import logging
+import os
+import time
 
+from .async_runtime import get_worker_loop
+from .claim_check import get_claim_check
 from .config import get_settings
+from .serialization import available_serializers, register_serializers, resolve_serializer
+from .task_metrics import (
+    PUBLISHED_AT_HEADER, TASK_QUEUE_WAIT, TASK_RESULT_BYTES, TASK_RETRIES, TASK_RUNTIME, TASKS_IN_FLIGHT,
+    get_task_stats, mark_process_dead, prepare_multiprocess_dir, result_size, start_metrics_server
+)
 
 logger = logging.getLogger(__name__)
 
 # Get settings
 settings = get_settings()
 
+register_serializers()
+QUEUE_SERIALIZERS = {
+    queue: resolve_serializer(serializer)
+    for queue, serializer in settings.CELERY_QUEUE_SERIALIZERS.items()
+}
+
 # Create Celery app
 celery_app = Celery(
     "viralforge_ai",
@@ -24,6 +45,7 @@ celery_app = Celery(
         "src.scheduler.tasks",
         "src.analytics.tasks",
         "src.ai_services.tasks",
+        "src.core.tasks",
     ]
 )
 
@@ -38,17 +60,19 @@ celery_app.conf.update(
         "src.ai_services.tasks.*": {"queue": "ai_processing"},
     },
     
-    # Task serialization
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    # Task serialization (see src.core.serialization; queues can override the task serializer)
+    task_serializer=resolve_serializer(settings.CELERY_TASK_SERIALIZER),
+    accept_content=available_serializers(),
+    result_serializer=resolve_serializer(settings.CELERY_RESULT_SERIALIZER),
     
     # Task execution
     task_acks_late=True,
     worker_prefetch_multiplier=1,
+    task_soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT_SECONDS,
+    task_time_limit=settings.CELERY_TASK_TIME_LIMIT_SECONDS,
     
     # Result backend settings
-    result_expires=3600,  # 1 hour
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
     
     # Time zone
     timezone="UTC",
@@ -71,18 +95,18 @@ celery_app.conf.beat_schedule = {
         "schedule": crontab(hour=6, minute=0),  # 6 AM UTC daily
     },
     
+    "refill-content-inventory": {
+        "task": "src.content_pipeline.tasks.refill_content_inventory",
+        "schedule": float(settings.INVENTORY_REFILL_INTERVAL_SECONDS),
+        "options": {"expires": settings.INVENTORY_REFILL_INTERVAL_SECONDS},
+    },
+    
     # Trend analysis
     "fetch-trending-topics": {
         "task": "src.content_pipeline.tasks.fetch_trending_topics",
         "schedule": crontab(minute=0, hour="*/4"),  # Every 4 hours
     },
     
-    # Posting tasks
-    "process-scheduled-posts": {
-        "task": "src.social_platforms.tasks.process_scheduled_posts",
-        "schedule": crontab(minute="*/15"),  # Every 15 minutes
-    },
-    
     # Analytics tasks
     "update-post-analytics": {
         "task": "src.analytics.tasks.update_post_analytics",
@@ -95,6 +119,11 @@ celery_app.conf.beat_schedule = {
     },
     
     # Maintenance tasks
+    "cleanup-claim-check-blobs": {
+        "task": "src.core.tasks.cleanup_claim_check_blobs",
+        "schedule": crontab(minute=20),  # Hourly; blobs outlive results by CLAIM_CHECK_GRACE_SECONDS
+    },
+    
     "cleanup-old-files": {
         "task": "src.core.tasks.cleanup_old_files",
         "schedule": crontab(hour=2, minute=0),  # 2 AM UTC daily
@@ -124,13 +153,102 @@ def debug_task(self):
 from celery import Task
 from celery.exceptions import Retry
 
+# Request of the AsyncTask coroutine running in the current asyncio task
+_async_request = ContextVar("celery_async_request", default=None)
+
 
 class CallbackTask(Task):
-    """Base task class with error handling and callbacks"""
+    """
+    Base task class with error handling and callbacks
+    
+    Large arguments and results go through the claim check: they are stored
+    in the blob store on publish and on return, and only references pass
+    through the broker and result backend. References are resolved before
+    the task body runs.
+    
+    Executions from a queue record their queue wait, run time, outcome and
+    result size (see src.core.task_metrics).
+    """
+    
+    def apply_async(self, args=None, kwargs=None, **options):
+        """Publish the task, offloading large arguments and using its queue's serializer"""
+        args, kwargs = get_claim_check().offload_call(args, kwargs)
+        if QUEUE_SERIALIZERS and "serializer" not in options:
+            serializer = QUEUE_SERIALIZERS.get(self._queue_name(options, args, kwargs))
+            if serializer:
+                options["serializer"] = serializer
+        return super().apply_async(args, kwargs, **options)
+    
+    def _queue_name(self, options, args, kwargs):
+        """Queue the router will send this call to"""
+        queue = self.app.amqp.router.route(dict(options), self.name, args, kwargs).get("queue")
+        return getattr(queue, "name", queue)
+    
+    def __call__(self, *args, **kwargs):
+        claim_check = get_claim_check()
+        called_directly = self.request.called_directly
+        queue = self._task_started() if settings.TASK_METRICS_ENABLED and not called_directly else None
+        started = time.monotonic()
+        state = "failure"
+        
+        try:
+            args = claim_check.resolve(list(args))
+            kwargs = claim_check.resolve(kwargs)
+            # The worker's tracer has already pushed this execution's request;
+            # Task.__call__ would push an empty one over it (request.id=None,
+            # called_directly=True), which breaks self.retry()
+            body = super().__call__ if called_directly else self.run
+            result = self._complete(body(*args, **kwargs))
+            state = "success"
+        except Retry:
+            state = "retry"
+            raise
+        finally:
+            if queue is not None:
+                self._task_finished(queue, state, time.monotonic() - started)
+        
+        # Results of direct calls never reach the result backend
+        return result if called_directly else claim_check.offload(result)
+    
+    def _task_started(self):
+        """Record the start of an execution; returns the queue it came from"""
+        request = self.request
+        delivery_info = request.delivery_info or {}
+        queue = delivery_info.get("routing_key") or ("eager" if request.is_eager else "default")
+        
+        queue_wait = None
+        published_at = getattr(request, PUBLISHED_AT_HEADER, None) or (request.headers or {}).get(PUBLISHED_AT_HEADER)
+        if published_at:
+            # Time spent waiting for a countdown/ETA is not queueing
+            ready_at = float(published_at)
+            if request.eta:
+                eta = request.eta if isinstance(request.eta, datetime) else datetime.fromisoformat(request.eta)
+                ready_at = max(ready_at, eta.timestamp())
+            queue_wait = max(0.0, time.time() - ready_at)
+            TASK_QUEUE_WAIT.labels(self.name, queue).observe(queue_wait)
+        
+        TASKS_IN_FLIGHT.labels(queue).inc()
+        get_task_stats().task_started(self.name, queue, queue_wait)
+        return queue
+    
+    def _task_finished(self, queue, state, runtime):
+        TASKS_IN_FLIGHT.labels(queue).dec()
+        TASK_RUNTIME.labels(self.name, queue, state).observe(runtime)
+        get_task_stats().task_finished(self.name, queue, state, runtime)
+    
+    def _complete(self, result):
+        """Turn the task body's return value into the task result"""
+        return result
     
     def on_success(self, retval, task_id, args, kwargs):
         """Called on task success"""
-        logger.info(f"Task {task_id} succeeded with result: {retval}")
+        if not settings.TASK_METRICS_ENABLED:
+            logger.info(f"Task {task_id} succeeded")
+            return
+        size = result_size(retval)
+        TASK_RESULT_BYTES.labels(self.name).observe(size)
+        get_task_stats().result_stored(self.name, size)
+        logger.info(f"Task {task_id} succeeded ({size} byte result)")
     
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         """Called on task failure"""
@@ -138,13 +256,112 @@ class CallbackTask(Task):
     
     def on_retry(self, exc, task_id, args, kwargs, einfo):
         """Called on task retry"""
-        logger.warning(f"Task {task_id} retrying: {exc}")
+        if settings.TASK_METRICS_ENABLED:
+            TASK_RETRIES.labels(self.name).inc()
+        logger.warning(f"Task {task_id} retrying (attempt {self.request.retries + 1}): {exc}")
+
+
+class AsyncTask(CallbackTask):
+    """
+    Base task class for `async def` tasks
+    
+    The coroutine runs on the worker process's persistent event loop, so
+    HTTP connection pools and async Redis clients are reused across tasks.
+    When the soft time limit fires the coroutine is cancelled, letting its
+    cleanup run before the task fails.
+    
+    Celery's request stack is per thread, and the loop thread's is empty, so
+    the coroutine sees its request through a context variable instead;
+    self.request and self.retry() work as in a sync task.
+    """
+    
+    @property
+    def request(self):
+        request = _async_request.get()
+        return request if request is not None else self._get_request()
+    
+    def _complete(self, result):
+        if inspect.isawaitable(result):
+            return get_worker_loop().run(
+                _with_request(result, self._get_request()),
+                cancel_grace_seconds=settings.CELERY_TASK_CANCEL_GRACE_SECONDS
+            )
+        return result
+
+
+async def _with_request(coro, request):
+    """Await `coro` with `request` as the current task request (scoped to this asyncio task)"""
+    token = _async_request.set(request)
+    try:
+        return await coro
+    finally:
+        _async_request.reset(token)
 
 
 # Register custom task base
 celery_app.Task = CallbackTask
 
 
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """Record the publish time so workers can measure queue wait"""
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+@worker_init.connect
+def reset_task_metrics(**kwargs):
+    """Clear multiprocess metric files left by a previous worker run"""
+    if settings.TASK_METRICS_ENABLED:
+        prepare_multiprocess_dir()
+
+
+@worker_init.connect
+def configure_database_pool(sender=None, **kwargs):
+    """Size the worker's pool; thread-pool workers need a connection per thread"""
+    from .database import configure_worker_engine
+    
+    pool_cls = getattr(sender, "pool_cls", None)
+    pool_module = getattr(pool_cls, "__module__", str(pool_cls))
+    concurrency = getattr(sender, "concurrency", None) or 1
+    configure_worker_engine(concurrency if "thread" in pool_module else 1)
+
+
+@worker_process_init.connect
+def reset_database_pool(**kwargs):
+    """Drop connections inherited from the parent; each child connects on first use"""
+    from .database import configure_worker_engine
+    
+    configure_worker_engine()
+
+
+@worker_ready.connect
+def serve_task_metrics(**kwargs):
+    """Expose task metrics in Prometheus format"""
+    if settings.TASK_METRICS_ENABLED and settings.TASK_METRICS_PORT:
+        try:
+            start_metrics_server(settings.TASK_METRICS_PORT)
+        except OSError as e:
+            logger.error(f"Could not serve task metrics on port {settings.TASK_METRICS_PORT}: {e}")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_api_usage(**kwargs):
+    """Write buffered API usage before a worker process exits"""
+    from ..ai_services.usage_recorder import get_usage_recorder
+    
+    get_usage_recorder().stop()
+
+
+@worker_process_shutdown.connect
+def stop_worker_loop(**kwargs):
+    """Cancel outstanding coroutines and close the shared HTTP client"""
+    get_worker_loop().stop()
+    if settings.TASK_METRICS_ENABLED:
+        mark_process_dead(os.getpid())
+
+
 def get_celery_app():
     """Get the Celery app instance"""
     return celery_app 
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Claim-check storage for large Celery task payloads
+
+Task arguments and results whose JSON encoding reaches
+CLAIM_CHECK_THRESHOLD_BYTES are written to a content-addressed blob store
+(a directory shared by API and workers, or the task_payloads table), and only
+a small reference travels through the broker and the result backend. The
+task base class offloads on publish and on return, and resolves references
+before the task body runs; other readers of task results call `resolve()`.
+
+Blobs are kept for the result expiry plus CLAIM_CHECK_GRACE_SECONDS after they
+were last stored, then removed by the cleanup_claim_check_blobs task.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import ClaimCheckBackend, get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Marker key of a reference in place of an offloaded value
+REFERENCE_KEY = "__claim_check__"
+
+
+class ClaimCheckMissing(LookupError):
+    """A referenced payload is no longer in the blob store"""
+
+
+class BlobStore:
+    """Base class for content-addressed payload stores"""
+
+    def put(self, digest: str, data: bytes):
+        """Store a blob, or refresh its retention if it already exists"""
+        raise NotImplementedError
+
+    def get(self, digest: str) -> bytes:
+        raise NotImplementedError
+
+    def delete_older_than(self, cutoff: float) -> int:
+        """Remove blobs last stored before the `cutoff` timestamp"""
+        raise NotImplementedError
+
+
+class FileBlobStore(BlobStore):
+    """Blobs as files under a directory, fanned out by digest prefix"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, digest: str, data: bytes):
+        path = self._path(digest)
+        if path.exists():
+            os.utime(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, digest: str) -> bytes:
+        try:
+            return self._path(digest).read_bytes()
+        except FileNotFoundError:
+            raise ClaimCheckMissing(f"Payload {digest} not found in {self.root}")
+
+    def delete_older_than(self, cutoff: float) -> int:
+        deleted = 0
+        if not self.root.exists():
+            return deleted
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+
+class DatabaseBlobStore(BlobStore):
+    """Blobs in the task_payloads table"""
+
+    def put(self, digest: str, data: bytes):
+        from .database import SessionLocal
+        from .models import TaskPayload
+
+        db = SessionLocal()
+        try:
+            payload = db.get(TaskPayload, digest)
+            if payload is None:
+                db.add(TaskPayload(digest=digest, data=data, size_bytes=len(data)))
+            else:
+                payload.last_stored_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get(self, digest: str) -> bytes:
+        from .database import SessionLocal
+        from .models import TaskPayload
+
+        db = SessionLocal()
+        try:
+            payload = db.get(TaskPayload, digest)
+            if payload is None:
+                raise ClaimCheckMissing(f"Payload {digest} not found in task_payloads")
+            return payload.data
+        finally:
+            db.close()
+
+    def delete_older_than(self, cutoff: float) -> int:
+        from .database import SessionLocal
+        from .models import TaskPayload
+
+        db = SessionLocal()
+        try:
+            deleted = db.query(TaskPayload).filter(
+                TaskPayload.last_stored_at < datetime.fromtimestamp(cutoff, timezone.utc)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class ClaimCheck:
+    """Swaps large values for references to the blob store, and back"""
+
+    def __init__(self, store: BlobStore, threshold_bytes: int, retention_seconds: int, enabled: bool = True):
+        self.store = store
+        self.threshold_bytes = threshold_bytes
+        self.retention_seconds = retention_seconds
+        self.enabled = enabled
+
+    @staticmethod
+    def is_reference(value: Any) -> bool:
+        return isinstance(value, dict) and REFERENCE_KEY in value
+
+    def offload(self, value: Any) -> Any:
+        """A reference for a large value; small values are returned unchanged"""
+        if not self.enabled or value is None or self.is_reference(value):
+            return value
+        encoded = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+        if len(encoded) < self.threshold_bytes:
+            return value
+
+        digest = hashlib.sha256(encoded).hexdigest()
+        self.store.put(digest, zlib.compress(encoded))
+        logger.debug(f"Offloaded {len(encoded)} byte payload as {digest[:12]}")
+        return {REFERENCE_KEY: digest, "size_bytes": len(encoded)}
+
+    def offload_call(self, args: Optional[Any], kwargs: Optional[Dict[str, Any]]):
+        """Offload each large positional and keyword argument"""
+        if args is not None:
+            args = [self.offload(arg) for arg in args]
+        if kwargs is not None:
+            kwargs = {key: self.offload(value) for key, value in kwargs.items()}
+        return args, kwargs
+
+    def resolve(self, value: Any) -> Any:
+        """Replace references (also inside lists and dicts) with their payloads"""
+        if self.is_reference(value):
+            return json.loads(zlib.decompress(self.store.get(value[REFERENCE_KEY])))
+        if isinstance(value, (list, tuple)):
+            return [self.resolve(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        return value
+
+    def collect_garbage(self) -> int:
+        """Delete blobs whose retention has passed"""
+        return self.store.delete_older_than(time.time() - self.retention_seconds)
+
+
+def create_claim_check() -> ClaimCheck:
+    """Build the claim check from settings"""
+    if settings.CLAIM_CHECK_BACKEND == ClaimCheckBackend.DATABASE:
+        store: BlobStore = DatabaseBlobStore()
+    else:
+        store = FileBlobStore(settings.CLAIM_CHECK_PATH)
+    return ClaimCheck(
+        store=store,
+        threshold_bytes=settings.CLAIM_CHECK_THRESHOLD_BYTES,
+        retention_seconds=settings.CELERY_RESULT_EXPIRES_SECONDS + settings.CLAIM_CHECK_GRACE_SECONDS,
+        enabled=settings.CLAIM_CHECK_ENABLED
+    )
+
+
+# Global claim check instance
+claim_check = create_claim_check()
+
+
+def get_claim_check() -> ClaimCheck:
+    """Get the claim check instance"""
+    return claim_check
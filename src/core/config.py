@@ -3,7 +3,7 @@ Configuration management for ViralForge AI
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseSettings, Field, validator
 from enum import Enum
 
@@ -30,6 +30,27 @@ class VideoQuality(str, Enum):
     UHD_4K = "4k"
 
 
+class CacheBackend(str, Enum):
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+    REDIS = "redis"
+
+
+class RateLimitBackend(str, Enum):
+    LOCAL = "local"
+    REDIS = "redis"
+
+
+class SingleFlightBackend(str, Enum):
+    LOCAL = "local"
+    REDIS = "redis"
+
+
+class ClaimCheckBackend(str, Enum):
+    FILESYSTEM = "filesystem"
+    DATABASE = "database"
+
+
 class Settings(BaseSettings):
     """
     Application settings loaded from environment variables
@@ -49,6 +70,29 @@ class Settings(BaseSettings):
     # =================================
     DATABASE_URL: str = Field(..., description="PostgreSQL database URL")
     DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = Field(default=5, ge=1, description="Connections kept open per engine in each API process")
+    DATABASE_MAX_OVERFLOW: int = Field(default=5, ge=0, description="Extra connections an engine may open under load")
+    DATABASE_POOL_TIMEOUT_SECONDS: float = Field(
+        default=10.0, gt=0.0,
+        description="How long a request waits for a free connection before failing"
+    )
+    DATABASE_POOL_RECYCLE_SECONDS: int = Field(
+        default=1800, ge=-1,
+        description="Replace connections older than this (-1 never), ahead of server and proxy idle timeouts"
+    )
+    DATABASE_POOL_PRE_PING: bool = Field(default=True, description="Test connections before handing them out")
+    CELERY_DATABASE_POOL_SIZE: int = Field(
+        default=1, ge=1,
+        description="Pool size per Celery worker process (thread-pool workers get one per thread at least)"
+    )
+    CELERY_DATABASE_MAX_OVERFLOW: int = Field(
+        default=2, ge=0,
+        description="Overflow per Celery worker process (background flush threads share the pool)"
+    )
+    ASYNC_DATABASE_URL: Optional[str] = Field(
+        None,
+        description="Async driver URL for the API (derived from DATABASE_URL when unset: asyncpg or aiosqlite)"
+    )
     
     # =================================
     # Redis Configuration
@@ -57,6 +101,64 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str = Field(default="redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = Field(default="redis://localhost:6379/0")
     
+    # =================================
+    # Celery Workers
+    # =================================
+    CELERY_TASK_SOFT_TIME_LIMIT_SECONDS: int = Field(
+        default=600, ge=1,
+        description="Soft time limit; async tasks are cancelled when it fires"
+    )
+    CELERY_TASK_TIME_LIMIT_SECONDS: int = Field(
+        default=660, ge=1,
+        description="Hard time limit after which the worker process is killed"
+    )
+    CELERY_TASK_CANCEL_GRACE_SECONDS: float = Field(
+        default=5.0, ge=0.0,
+        description="Time a cancelled async task gets to run its cleanup"
+    )
+    CELERY_RESULT_EXPIRES_SECONDS: int = Field(
+        default=3600, ge=60,
+        description="How long task results are kept in the result backend"
+    )
+    CELERY_TASK_SERIALIZER: str = Field(
+        default="json",
+        description="Default task message serializer: json, vf-msgpack or vf-orjson"
+    )
+    CELERY_QUEUE_SERIALIZERS: Dict[str, str] = Field(
+        default={},
+        description="Serializer override per queue, e.g. {\"content_generation\": \"vf-msgpack\"}"
+    )
+    CELERY_RESULT_SERIALIZER: str = Field(default="json", description="Task result serializer")
+    PAYLOAD_SERIALIZER: str = Field(
+        default="json",
+        description="Encoding of cached completions and inventory pieces in Redis"
+    )
+    CLAIM_CHECK_ENABLED: bool = Field(
+        default=True,
+        description="Move large task arguments and results out of the broker and result backend"
+    )
+    CLAIM_CHECK_BACKEND: ClaimCheckBackend = Field(
+        default=ClaimCheckBackend.FILESYSTEM,
+        description="Where offloaded payloads are stored (the filesystem path must be shared by API and workers)"
+    )
+    CLAIM_CHECK_THRESHOLD_BYTES: int = Field(
+        default=16384, ge=256,
+        description="Encoded size from which an argument or result is offloaded"
+    )
+    CLAIM_CHECK_PATH: str = Field(default="media/claim_check", description="Filesystem claim-check store")
+    CLAIM_CHECK_GRACE_SECONDS: int = Field(
+        default=3600, ge=0,
+        description="Extra retention beyond result expiry, covering messages still waiting in a queue"
+    )
+    TASK_METRICS_ENABLED: bool = Field(
+        default=True,
+        description="Record queue wait, run time, retries and result size of every task"
+    )
+    TASK_METRICS_PORT: int = Field(
+        default=9808, ge=0,
+        description="Port of the worker's Prometheus /metrics endpoint (0 disables it)"
+    )
+    
     # =================================
     # AI Service API Keys
     # =================================
@@ -70,6 +172,127 @@ class Settings(BaseSettings):
     PIKA_LABS_API_KEY: Optional[str] = Field(None, description="Pika Labs API key")
     SYNTHESIA_API_KEY: Optional[str] = Field(None, description="Synthesia API key")
     
+    # =================================
+    # AI Response Caching
+    # =================================
+    AI_CACHE_ENABLED: bool = Field(default=True, description="Cache identical AI completion requests")
+    AI_CACHE_BACKEND: CacheBackend = Field(default=CacheBackend.MEMORY, description="Completion cache backend")
+    AI_CACHE_TTL_SECONDS: int = Field(default=86400, ge=0, description="Completion cache TTL (0 = no expiry)")
+    AI_CACHE_MAX_ENTRIES: int = Field(default=10000, ge=1, description="Max entries in the persistent cache tier")
+    AI_CACHE_MEMORY_MAX_ENTRIES: int = Field(default=1000, ge=1, description="Max entries in the in-process LRU")
+    AI_CACHE_SQLITE_PATH: str = Field(default="cache/completions.db", description="SQLite completion cache path")
+    
+    # =================================
+    # AI Provider Rate Limits
+    # =================================
+    AI_RATE_LIMIT_BACKEND: RateLimitBackend = Field(
+        default=RateLimitBackend.LOCAL,
+        description="Rate limiter backend (redis shares one budget across all workers)"
+    )
+    AI_RPM_LIMITS: Dict[str, int] = Field(
+        default={
+            "gpt-4o": 500,
+            "gpt-4o-mini": 500,
+            "dall-e-3": 7,
+            "claude-3-5-sonnet-latest": 50,
+            "claude-3-5-haiku-latest": 50,
+            "stable-diffusion-xl-1024-v1-0": 150
+        },
+        description="Requests per minute per model"
+    )
+    AI_TPM_LIMITS: Dict[str, int] = Field(
+        default={
+            "gpt-4o": 30000,
+            "gpt-4o-mini": 200000,
+            "claude-3-5-sonnet-latest": 40000,
+            "claude-3-5-haiku-latest": 50000
+        },
+        description="Estimated tokens per minute per model"
+    )
+    AI_RATE_LIMIT_MAX_WAIT_SECONDS: float = Field(
+        default=300.0, ge=1.0,
+        description="Max time a call waits for rate limit capacity"
+    )
+    
+    # =================================
+    # AI Call Resilience
+    # =================================
+    AI_REQUEST_TIMEOUT_SECONDS: float = Field(
+        default=60.0, gt=0.0,
+        description="Timeout for a single AI provider request"
+    )
+    AI_HTTP_MAX_CONNECTIONS: int = Field(
+        default=100, ge=1,
+        description="Connection pool size shared by the AI provider clients in one process"
+    )
+    AI_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        default=20, ge=0,
+        description="Idle connections kept open for reuse"
+    )
+    AI_RETRY_MAX_ATTEMPTS: int = Field(
+        default=4, ge=1, le=10,
+        description="Attempts per AI call for 429s, 5xx errors, timeouts and connection errors"
+    )
+    AI_RETRY_BASE_DELAY_SECONDS: float = Field(
+        default=0.5, gt=0.0,
+        description="Base delay for jittered exponential backoff"
+    )
+    AI_RETRY_MAX_DELAY_SECONDS: float = Field(
+        default=20.0, gt=0.0,
+        description="Max backoff delay (a longer Retry-After is still honoured)"
+    )
+    AI_HEDGE_OPERATIONS: List[str] = Field(
+        default=["hashtags", "caption"],
+        description="Operations that send a duplicate request once the first passes its p95 latency"
+    )
+    AI_HEDGE_MIN_SAMPLES: int = Field(
+        default=20, ge=1,
+        description="Latency samples needed before an operation is hedged"
+    )
+    CONTENT_PIPELINE_DEADLINE_SECONDS: float = Field(
+        default=180.0, gt=0.0,
+        description="Overall deadline for generating one content piece"
+    )
+    SINGLEFLIGHT_BACKEND: SingleFlightBackend = Field(
+        default=SingleFlightBackend.LOCAL,
+        description="Coalesce identical in-flight requests per process (local) or across workers (redis)"
+    )
+    SINGLEFLIGHT_LOCK_TTL_SECONDS: float = Field(
+        default=240.0, gt=0.0,
+        description="How long a cross-process leader holds its lock before followers give up waiting"
+    )
+    
+    # =================================
+    # AI Model Routing
+    # =================================
+    AI_ROUTES: Dict[str, List[str]] = Field(
+        default={
+            "script": ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-latest"],
+            "fused": ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-latest"],
+            "image_prompt": ["openai:gpt-4o-mini", "anthropic:claude-3-5-haiku-latest", "openai:gpt-4o"],
+            "hashtags": ["openai:gpt-4o-mini", "anthropic:claude-3-5-haiku-latest", "openai:gpt-4o"],
+            "caption": ["openai:gpt-4o-mini", "anthropic:claude-3-5-haiku-latest", "openai:gpt-4o"],
+            "image": ["openai:dall-e-3"]
+        },
+        description="Ordered provider:model candidates per call type (providers without an API key are skipped)"
+    )
+    AI_ROUTING_COST_WEIGHT: float = Field(
+        default=20.0, ge=0.0,
+        description="Seconds of latency one USD per 1K tokens (or per image) is worth when ranking routes"
+    )
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = Field(
+        default=5, ge=1,
+        description="Consecutive failures that open a route's circuit"
+    )
+    AI_CIRCUIT_ERROR_RATE: float = Field(
+        default=0.5, gt=0.0, le=1.0,
+        description="Rolling error rate that opens a route's circuit"
+    )
+    AI_CIRCUIT_RECOVERY_SECONDS: float = Field(
+        default=30.0, gt=0.0,
+        description="How long an open circuit waits before sending a probe request"
+    )
+    
     # =================================
     # Social Media Platform APIs
     # =================================
@@ -100,11 +323,61 @@ class Settings(BaseSettings):
     # Content Generation Settings
     # =================================
     DAILY_CONTENT_COUNT: int = Field(default=3, ge=1, le=50, description="Daily content count")
+    FUSED_GENERATION_ENABLED: bool = Field(
+        default=False,
+        description="Generate script, hashtags, captions and image prompt in one completion"
+    )
+    CONTENT_GENERATION_CONCURRENCY: int = Field(
+        default=4, ge=1, le=50,
+        description="Max content pieces generated concurrently in bulk runs"
+    )
+    CONTENT_BATCH_CHUNK_SIZE: int = Field(
+        default=5, ge=1, le=100,
+        description="Topics handled by one task when process_content_batch enqueues a batch"
+    )
     CONTENT_TYPES: List[ContentType] = Field(
         default=[ContentType.FACTS, ContentType.TRIVIA, ContentType.MEMES],
         description="Content types to generate"
     )
     
+    CONTENT_JOB_TTL_SECONDS: int = Field(
+        default=3600, ge=60,
+        description="How long async generation job status and results are kept"
+    )
+    CONTENT_JOB_MAX_WAIT_SECONDS: int = Field(
+        default=30, ge=1, le=120,
+        description="Max long-poll wait for job results"
+    )
+    
+    INVENTORY_ENABLED: bool = Field(
+        default=False,
+        description="Serve topic-less /generate requests from pre-generated inventory (refills cost AI calls)"
+    )
+    INVENTORY_TARGET_DEPTH: int = Field(
+        default=5, ge=1, le=100,
+        description="Ready pieces kept per content type and location"
+    )
+    INVENTORY_LOCATIONS: List[str] = Field(
+        default=[],
+        description="Locations stocked in addition to location-less pieces"
+    )
+    INVENTORY_MAX_AGE_SECONDS: int = Field(
+        default=86400, ge=60,
+        description="Inventory pieces older than this are discarded"
+    )
+    INVENTORY_REFILL_INTERVAL_SECONDS: int = Field(
+        default=60, ge=10,
+        description="How often Celery beat runs an inventory refill"
+    )
+    INVENTORY_REFILL_BUDGET_FRACTION: float = Field(
+        default=0.5, gt=0.0, le=1.0,
+        description="Share of the image model's RPM limit refills may use"
+    )
+    INVENTORY_REFILL_MAX_PIECES: int = Field(
+        default=20, ge=1,
+        description="Max pieces generated per refill run"
+    )
+    
     VIDEO_DURATION_MIN: int = Field(default=10, ge=5, le=60, description="Min video duration (seconds)")
     VIDEO_DURATION_MAX: int = Field(default=60, ge=10, le=180, description="Max video duration (seconds)")
     VIDEO_QUALITY: VideoQuality = Field(default=VideoQuality.FHD_1080P, description="Video quality")
@@ -121,6 +394,14 @@ class Settings(BaseSettings):
     
     INSTAGRAM_POSTS_PER_DAY: int = Field(default=2, ge=0, le=20, description="Instagram posts per day")
     TIKTOK_POSTS_PER_DAY: int = Field(default=3, ge=0, le=20, description="TikTok posts per day")
+    POST_SCHEDULER_HORIZON_SECONDS: int = Field(
+        default=1800, ge=60,
+        description="Posts due within this window are queued with an ETA; keep it below the broker visibility timeout"
+    )
+    POST_SCHEDULER_RETRY_SECONDS: float = Field(
+        default=10.0, gt=0.0,
+        description="Delay before retrying a post that could not be queued"
+    )
     
     # =================================
     # Target Audience Settings
@@ -153,6 +434,42 @@ class Settings(BaseSettings):
         default=24, ge=1, le=168,
         description="Analytics report frequency (hours)"
     )
+    ANALYTICS_TRACKING_DAYS: int = Field(
+        default=30, ge=1,
+        description="Keep collecting metrics snapshots for posts published this many days ago"
+    )
+    ANALYTICS_ROLLUP_BATCH_SIZE: int = Field(
+        default=5000, ge=1,
+        description="PostAnalytics snapshots folded into the rollup tables per transaction"
+    )
+    ANALYTICS_ROLLUP_SETTLE_SECONDS: float = Field(
+        default=120.0, ge=0.0,
+        description="Snapshots younger than this are left for the next rollup (ids are assigned before commit)"
+    )
+    
+    USAGE_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=30.0, ge=1.0,
+        description="How often buffered API usage is written to the database"
+    )
+    USAGE_FLUSH_MAX_PENDING: int = Field(
+        default=500, ge=1,
+        description="Buffered API calls that trigger an early usage flush"
+    )
+    USAGE_BUCKET_SECONDS: int = Field(
+        default=3600, ge=60,
+        description="Time bucket for aggregated API usage rows"
+    )
+    AI_MODEL_PRICING: Dict[str, float] = Field(
+        default={
+            "gpt-4o": 0.0075,
+            "gpt-4o-mini": 0.0004,
+            "claude-3-5-sonnet-latest": 0.009,
+            "claude-3-5-haiku-latest": 0.0024,
+            "dall-e-3": 0.12,
+            "stable-diffusion-xl-1024-v1-0": 0.006
+        },
+        description="Estimated USD cost per 1K tokens (per image for image models)"
+    )
     
     # =================================
     # Security Settings
@@ -181,6 +498,15 @@ class Settings(BaseSettings):
     DEVELOPMENT_MODE: bool = Field(default=False, description="Development mode")
     MOCK_API_CALLS: bool = Field(default=False, description="Mock API calls for testing")
     
+    # Fake AI backend used when MOCK_API_CALLS is enabled
+    FAKE_API_LATENCY_MEDIAN_MS: float = Field(default=400.0, ge=0.0, description="Fake chat latency median (ms)")
+    FAKE_API_LATENCY_P99_MS: float = Field(default=2500.0, ge=0.0, description="Fake chat latency p99 (ms)")
+    FAKE_IMAGE_LATENCY_MEDIAN_MS: float = Field(default=4000.0, ge=0.0, description="Fake image latency median (ms)")
+    FAKE_IMAGE_LATENCY_P99_MS: float = Field(default=12000.0, ge=0.0, description="Fake image latency p99 (ms)")
+    FAKE_API_ERROR_RATE: float = Field(default=0.0, ge=0.0, le=1.0, description="Fraction of fake calls failing with 500")
+    FAKE_API_RATE_LIMIT_RATE: float = Field(default=0.0, ge=0.0, le=1.0, description="Fraction of fake calls failing with 429")
+    FAKE_API_SEED: Optional[int] = Field(None, description="Random seed for reproducible fake runs")
+    
     TEST_INSTAGRAM_ACCOUNT: Optional[str] = Field(None, description="Test Instagram account")
     TEST_TIKTOK_ACCOUNT: Optional[str] = Field(None, description="Test TikTok account")
     
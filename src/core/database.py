@@ -2,31 +2,85 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict, Generator
 import logging
 
 from .config import get_settings
+from .db_pool import get_telemetry, pool_options
 
 logger = logging.getLogger(__name__)
 
 # Get settings
 settings = get_settings()
 
+
+
+def _create_sync_engine(pool_size: int, max_overflow: int):
+    sync_engine = create_engine(
+        settings.DATABASE_URL,
+        echo=settings.DATABASE_ECHO,
+        connect_args={
+            "check_same_thread": False  # Only needed for SQLite
+        } if "sqlite" in settings.DATABASE_URL else {},
+        **pool_options(
+            settings.DATABASE_URL, "sync",
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            timeout_seconds=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+            recycle_seconds=settings.DATABASE_POOL_RECYCLE_SECONDS,
+            pre_ping=settings.DATABASE_POOL_PRE_PING
+        )
+    )
+    get_telemetry("sync").attach(sync_engine)
+    return sync_engine
+
+
 # SQLAlchemy setup
-engine = create_engine(
-    settings.DATABASE_URL,
+engine = _create_sync_engine(settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async drivers for each sync dialect
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The same database with an async driver (asyncpg for Postgres, aiosqlite for SQLite)"""
+    parsed = make_url(url)
+    backend = "postgresql" if parsed.get_backend_name() in ("postgres", "postgresql") else parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+# Async engine for the FastAPI layer; Celery tasks and scripts use the sync engine
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
     echo=settings.DATABASE_ECHO,
-    pool_pre_ping=True,
-    connect_args={
-        "check_same_thread": False  # Only needed for SQLite
-    } if "sqlite" in settings.DATABASE_URL else {}
+    **pool_options(
+        ASYNC_DATABASE_URL, "async",
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        timeout_seconds=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        recycle_seconds=settings.DATABASE_POOL_RECYCLE_SECONDS,
+        pre_ping=settings.DATABASE_POOL_PRE_PING,
+        use_async=True
+    )
 )
+get_telemetry("async").attach(async_engine.sync_engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Metadata and Base for models
 metadata = MetaData()
@@ -48,6 +102,54 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async database session dependency for FastAPI
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await db.rollback()
+            raise
+
+
+async def close_async_engine():
+    """
+    Close the async engine's pooled connections
+    """
+    await async_engine.dispose()
+
+
+def configure_worker_engine(concurrency: int = 1):
+    """
+    Give a Celery worker process its own, worker-sized pool.
+
+    Connections inherited across fork are dropped without being closed (they
+    still belong to the parent) and new ones are opened lazily on first use.
+    Thread-pool workers get at least one connection per thread.
+    """
+    global engine
+    
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    
+    engine = _create_sync_engine(
+        max(settings.CELERY_DATABASE_POOL_SIZE, concurrency),
+        settings.CELERY_DATABASE_MAX_OVERFLOW
+    )
+    SessionLocal.configure(bind=engine)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool usage and checkout wait times of this process's engines"""
+    return {
+        "sync": get_telemetry("sync").get_stats(engine),
+        "async": get_telemetry("async").get_stats(async_engine.sync_engine)
+    }
+
+
 def create_tables():
     """
     Create all database tables
@@ -77,10 +179,8 @@ async def check_database_connection() -> bool:
     Check if database connection is working
     """
     try:
-        db = SessionLocal()
-        # Execute a simple query
-        db.execute("SELECT 1")
-        db.close()
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"Database connection check failed: {e}")
@@ -0,0 +1,178 @@
+"""
+Database connection pool configuration and telemetry
+
+Every API process and every Celery worker process holds its own pools, so
+the connections Postgres must accept are roughly
+
+    api_processes * 2 * (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW)
+    + worker_processes * (CELERY_DATABASE_POOL_SIZE + CELERY_DATABASE_MAX_OVERFLOW)
+
+(the API has a sync and an async engine; the async one carries request
+traffic). Pools only connect on first use; Celery worker processes replace
+the pool inherited across fork (see `database.configure_worker_engine`).
+
+Checkouts, overflow and the time spent waiting for a connection are recorded
+per engine and exported as Prometheus metrics and by `get_pool_stats()`.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+POOL_CHECKED_OUT = Gauge(
+    "viralforge_db_pool_checked_out", "Connections currently checked out",
+    ["engine"], multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "viralforge_db_pool_overflow", "Connections open beyond the pool size",
+    ["engine"], multiprocess_mode="livesum"
+)
+POOL_WAIT = Histogram(
+    "viralforge_db_pool_wait_seconds", "Time to obtain a connection from the pool",
+    ["engine"], buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, float("inf"))
+)
+POOL_CONNECTS = Counter("viralforge_db_pool_connects_total", "New database connections opened", ["engine"])
+POOL_TIMEOUTS = Counter("viralforge_db_pool_timeouts_total", "Pool checkouts that timed out", ["engine"])
+
+
+class PoolTelemetry:
+    """Checkout, overflow and wait statistics of one engine's pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def waited(self, seconds: float):
+        POOL_WAIT.labels(self.name).observe(seconds)
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def timed_out(self):
+        POOL_TIMEOUTS.labels(self.name).inc()
+        with self._lock:
+            self.timeouts += 1
+
+    def attach(self, engine: Engine):
+        """Track connects, checkouts and checkins on a (sync) engine"""
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            POOL_CONNECTS.labels(self.name).inc()
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            POOL_CHECKED_OUT.labels(self.name).inc()
+            POOL_OVERFLOW.labels(self.name).set(max(0, _overflow(engine.pool)))
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            POOL_CHECKED_OUT.labels(self.name).dec()
+            POOL_OVERFLOW.labels(self.name).set(max(0, _overflow(engine.pool)))
+
+    def get_stats(self, engine: Engine) -> Dict[str, Any]:
+        pool = engine.pool
+        with self._lock:
+            stats = {
+                "pool": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                "max_wait_ms": round(self.wait_seconds_max * 1000, 3)
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "max_connections": pool.size() + max(0, pool._max_overflow),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(0, pool.overflow())
+            })
+        return stats
+
+
+def _overflow(pool) -> int:
+    return pool.overflow() if isinstance(pool, QueuePool) else 0
+
+
+class _TimedCheckoutMixin:
+    """Times each connection request; the telemetry is a class attribute so it survives pool.recreate()"""
+
+    telemetry: PoolTelemetry
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.telemetry.timed_out()
+            raise
+        finally:
+            self.telemetry.waited(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Telemetry per engine name, kept when an engine is rebuilt
+_telemetry: Dict[str, PoolTelemetry] = {}
+
+
+def get_telemetry(name: str) -> PoolTelemetry:
+    if name not in _telemetry:
+        _telemetry[name] = PoolTelemetry(name)
+    return _telemetry[name]
+
+
+def pool_options(
+    url: str,
+    name: str,
+    pool_size: int,
+    max_overflow: int,
+    timeout_seconds: float,
+    recycle_seconds: int,
+    pre_ping: bool,
+    use_async: bool = False
+) -> Dict[str, Any]:
+    """
+    create_engine keyword arguments for a sized, instrumented pool.
+
+    SQLite (local runs) keeps the dialect's default pool: a file database
+    has no connection limit to size against, and pooled aiosqlite
+    connections would keep their threads alive.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"pool_pre_ping": pre_ping}
+
+    base = TimedAsyncQueuePool if use_async else TimedQueuePool
+    return {
+        "poolclass": type(f"{base.__name__}[{name}]", (base,), {"telemetry": get_telemetry(name)}),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": timeout_seconds,
+        "pool_recycle": recycle_seconds,
+        "pool_pre_ping": pre_ping
+    }
@@ -2,7 +2,7 @@
 Database models for ViralForge AI
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey, Enum, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -16,6 +16,7 @@ class ContentStatus(PyEnum):
     DRAFT = "draft"
     GENERATED = "generated"
     SCHEDULED = "scheduled"
+    PUBLISHING = "publishing"
     POSTED = "posted"
     FAILED = "failed"
     ARCHIVED = "archived"
@@ -87,6 +88,9 @@ class ContentItem(Base):
     Generated content items (scripts, ideas, etc.)
     """
     __tablename__ = "content_items"
+    __table_args__ = (
+        Index("ix_content_items_user_id_status_created_at", "user_id", "status", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -124,7 +128,7 @@ class MediaAsset(Base):
     __tablename__ = "media_assets"
     
     id = Column(Integer, primary_key=True, index=True)
-    content_item_id = Column(Integer, ForeignKey("content_items.id"), nullable=False)
+    content_item_id = Column(Integer, ForeignKey("content_items.id"), nullable=False, index=True)
     
     asset_type = Column(String(50), nullable=False)  # image, video, audio
     file_path = Column(String(500))  # Local or S3 path
@@ -158,6 +162,9 @@ class Post(Base):
     Posted content to social media platforms
     """
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_status_scheduled_at", "status", "scheduled_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     content_item_id = Column(Integer, ForeignKey("content_items.id"), nullable=False)
@@ -173,6 +180,7 @@ class Post(Base):
     # Scheduling
     scheduled_at = Column(DateTime(timezone=True))
     posted_at = Column(DateTime(timezone=True))
+    schedule_version = Column(Integer, default=0, nullable=False)  # Bumped on every (re)schedule, cancel and publish
     
     # Status and performance
     status = Column(Enum(ContentStatus), default=ContentStatus.SCHEDULED)
@@ -192,6 +200,9 @@ class PostAnalytics(Base):
     Post performance analytics
     """
     __tablename__ = "post_analytics"
+    __table_args__ = (
+        Index("ix_post_analytics_post_id_last_updated", "post_id", "last_updated"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
@@ -220,6 +231,71 @@ class PostAnalytics(Base):
     post = relationship("Post", back_populates="analytics")
 
 
+class AnalyticsRollupMixin:
+    """
+    Engagement gained by one post within one time bucket
+
+    Metric columns hold increases between consecutive PostAnalytics
+    snapshots (which are cumulative), so rows add up across posts, accounts,
+    platforms, content types and buckets. Maintained by src.analytics.rollups.
+    """
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)  # UTC, truncated to the hour or day
+    
+    # Dimensions, copied from the post so dashboards never join
+    post_id = Column(Integer, nullable=False)
+    content_item_id = Column(Integer)
+    social_account_id = Column(Integer)
+    platform = Column(Enum(Platform))
+    content_type = Column(Enum(ContentType))
+    
+    # Increases within the bucket
+    views = Column(Integer, default=0, nullable=False)
+    likes = Column(Integer, default=0, nullable=False)
+    comments = Column(Integer, default=0, nullable=False)
+    shares = Column(Integer, default=0, nullable=False)
+    saves = Column(Integer, default=0, nullable=False)
+    reach = Column(Integer, default=0, nullable=False)
+    impressions = Column(Integer, default=0, nullable=False)
+    engagements = Column(Integer, default=0, nullable=False)  # likes + comments + shares + saves
+    snapshots = Column(Integer, default=0, nullable=False)  # PostAnalytics rows folded in
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AnalyticsRollupHourly(AnalyticsRollupMixin, Base):
+    """
+    Hourly engagement per post
+    """
+    __tablename__ = "analytics_rollups_hourly"
+    __table_args__ = (
+        UniqueConstraint("post_id", "bucket_start", name="uq_analytics_rollups_hourly_post_id_bucket_start"),
+        Index("ix_analytics_rollups_hourly_bucket_start", "bucket_start"),
+    )
+
+
+class AnalyticsRollupDaily(AnalyticsRollupMixin, Base):
+    """
+    Daily engagement per post
+    """
+    __tablename__ = "analytics_rollups_daily"
+    __table_args__ = (
+        UniqueConstraint("post_id", "bucket_start", name="uq_analytics_rollups_daily_post_id_bucket_start"),
+        Index("ix_analytics_rollups_daily_bucket_start", "bucket_start"),
+    )
+
+
+class AnalyticsRollupState(Base):
+    """
+    Watermarks of incremental rollups (last source row folded in)
+    """
+    __tablename__ = "analytics_rollup_state"
+    
+    name = Column(String(100), primary_key=True)
+    last_source_id = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class TrendingTopic(Base):
     """
     Trending topics and keywords
@@ -293,8 +369,8 @@ class SystemLog(Base):
     content_item_id = Column(Integer, ForeignKey("content_items.id"))
     post_id = Column(Integer, ForeignKey("posts.id"))
     
-    # Additional data
-    metadata = Column(JSON)  # Additional context data
+    # Additional data ("metadata" is reserved on declarative models)
+    extra_metadata = Column("metadata", JSON)  # Additional context data
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -304,6 +380,9 @@ class APIUsage(Base):
     Track API usage and costs
     """
     __tablename__ = "api_usage"
+    __table_args__ = (
+        Index("ix_api_usage_service_name_date", "service_name", "date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -322,5 +401,19 @@ class APIUsage(Base):
     # Time tracking
     date = Column(DateTime(timezone=True), server_default=func.now())
     
-    # Additional metadata
-    metadata = Column(JSON) 
\ No newline at end of file
+    # Additional metadata ("metadata" is reserved on declarative models)
+    extra_metadata = Column("metadata", JSON)
+
+
+class TaskPayload(Base):
+    """
+    Large Celery task arguments and results offloaded by the claim check
+    """
+    __tablename__ = "task_payloads"
+    
+    digest = Column(String(64), primary_key=True)  # sha256 of the encoded payload
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed JSON
+    size_bytes = Column(Integer, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_stored_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
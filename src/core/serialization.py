@@ -0,0 +1,182 @@
+"""
+Binary serializers for Celery messages and cached payloads
+
+Two serializers are registered with kombu next to the stdlib "json" one:
+
+- "vf-msgpack": msgpack with extension types, so datetimes and the project's
+  enums (ContentType, Platform, ContentStatus, ...) come back as the same
+  types they were sent as.
+- "vf-orjson": orjson; datetimes and enums are encoded natively (as ISO
+  strings and values), which is fast but decodes to plain JSON types.
+
+Celery picks a serializer per queue from CELERY_QUEUE_SERIALIZERS; the
+completion cache and content inventory use PAYLOAD_SERIALIZER through
+`dumps_payload`/`loads_payload`, which mark msgpack payloads so any value
+round-trips and values written as JSON still read back.
+"""
+
+import importlib
+import json
+import logging
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Tuple
+
+from kombu.serialization import register
+
+from .config import get_settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+JSON = "json"
+MSGPACK = "vf-msgpack"
+ORJSON = "vf-orjson"
+
+# msgpack extension type codes
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_ENUM = 3
+
+# Prefix of msgpack payloads written by dumps_payload. 0xc1 is never used by
+# msgpack and cannot start JSON (or UTF-8) text, so the format is unambiguous
+_MSGPACK_MARKER = b"\xc1"
+
+# Enums are only rebuilt from modules of this package
+_PACKAGE = __name__.split(".")[0]
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode("utf-8"))
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode("utf-8"))
+    if isinstance(value, Enum):
+        enum_type = type(value)
+        return msgpack.ExtType(_EXT_ENUM, msgpack.packb(
+            [enum_type.__module__, enum_type.__qualname__, value.value]
+        ))
+    return str(value)
+
+
+def _enum_from(module_name: str, qualname: str, value: Any) -> Any:
+    """The enum member, or the bare value if the type cannot be resolved"""
+    if module_name != _PACKAGE and not module_name.startswith(f"{_PACKAGE}."):
+        return value
+    try:
+        enum_type = importlib.import_module(module_name)
+        for name in qualname.split("."):
+            enum_type = getattr(enum_type, name)
+        if isinstance(enum_type, type) and issubclass(enum_type, Enum):
+            return enum_type(value)
+    except (ImportError, AttributeError, ValueError) as e:
+        logger.warning(f"Could not rebuild {module_name}.{qualname}({value!r}): {e}")
+    return value
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode("utf-8"))
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode("utf-8"))
+    if code == _EXT_ENUM:
+        return _enum_from(*msgpack.unpackb(data, raw=False))
+    return msgpack.ExtType(code, data)
+
+
+def msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+
+def msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+def orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def orjson_loads(data: Any) -> Any:
+    return orjson.loads(data)
+
+
+def json_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+def json_loads(data: Any) -> Any:
+    return json.loads(data)
+
+
+# name -> (dumps, loads) for each serializer whose library is installed
+_CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[Any], Any]]] = {JSON: (json_dumps, json_loads)}
+if msgpack is not None:
+    _CODECS[MSGPACK] = (msgpack_dumps, msgpack_loads)
+if orjson is not None:
+    _CODECS[ORJSON] = (orjson_dumps, orjson_loads)
+
+
+def available_serializers() -> List[str]:
+    return list(_CODECS)
+
+
+def resolve_serializer(name: str) -> str:
+    """The serializer to use for a configured name, falling back to json"""
+    if name in _CODECS:
+        return name
+    logger.warning(f"Serializer {name!r} is not available, using json")
+    return JSON
+
+
+def register_serializers():
+    """Register the binary serializers with kombu (idempotent)"""
+    if msgpack is not None:
+        register(
+            MSGPACK, msgpack_dumps, msgpack_loads,
+            content_type="application/x-viralforge-msgpack",
+            content_encoding="binary"
+        )
+    if orjson is not None:
+        register(
+            ORJSON, orjson_dumps, orjson_loads,
+            content_type="application/x-viralforge-json",
+            content_encoding="utf-8"
+        )
+
+
+def dumps_payload(value: Any) -> bytes:
+    """Encode a cached or queued payload with PAYLOAD_SERIALIZER"""
+    name = settings.PAYLOAD_SERIALIZER if settings.PAYLOAD_SERIALIZER in _CODECS else JSON
+    dumps, _ = _CODECS[name]
+    if name == MSGPACK:
+        return _MSGPACK_MARKER + dumps(value)
+    return dumps(value)
+
+
+def loads_payload(data: bytes) -> Any:
+    """
+    Decode a payload written by `dumps_payload`.
+
+    msgpack payloads carry a marker byte; anything else is JSON, so values
+    stored before the serializer was changed keep working. Unmarked msgpack
+    from before the marker existed is decoded if it is not valid JSON.
+    """
+    if data[:1] == _MSGPACK_MARKER:
+        return msgpack_loads(data[1:])
+    json_decode = orjson_loads if orjson is not None else json_loads
+    try:
+        return json_decode(data)
+    except ValueError:
+        if msgpack is None:
+            raise
+        return msgpack_loads(data)
@@ -0,0 +1,236 @@
+"""
+Single-flight request coalescing
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the work and every other caller waits for its result.
+In-process, callers share one asyncio task. With the Redis backend a lock
+extends this across API and Celery worker processes; followers in other
+processes wait for the leader's result, or run the work themselves if the
+leader fails or disappears.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import uuid
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import redis.asyncio as aioredis
+
+from .config import SingleFlightBackend, get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+# Delete the lock only if this flight still owns it
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def make_flight_key(*parts: Any) -> str:
+    """Stable key for a request; strings are trimmed, lower-cased and whitespace-collapsed"""
+    def normalize(value: Any) -> Any:
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, str):
+            return " ".join(value.split()).lower()
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    payload = json.dumps([normalize(part) for part in parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One in-process execution shared by its waiters"""
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(
+        self,
+        name: str,
+        backend: SingleFlightBackend = SingleFlightBackend.LOCAL,
+        redis_url: Optional[str] = None,
+        lock_ttl_seconds: float = 300.0,
+        prefix: str = "viralforge:singleflight"
+    ):
+        self.name = name
+        self.backend = backend
+        self.redis_url = redis_url
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.prefix = f"{prefix}:{name}"
+        self._flights: Dict[str, _Flight] = {}
+        self._redis: Optional[aioredis.Redis] = None
+
+        self.leaders = 0
+        self.coalesced = 0
+        self.remote_waits = 0
+        self.remote_hits = 0
+        self.fallbacks = 0
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(self.redis_url)
+        return self._redis
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `func()` once for all concurrent callers with this key.
+
+        Followers receive a deep copy of the leader's result so callers can
+        modify what they get back. The shared work is only cancelled when
+        every waiter has gone away.
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        is_leader = flight is None or flight.task.done() or flight.task.get_loop() is not loop
+
+        if is_leader:
+            self.leaders += 1
+            work = self._run_cross_process(key, func) if self.backend == SingleFlightBackend.REDIS else func()
+            flight = _Flight(asyncio.ensure_future(work))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task, key=key, flight=flight: self._finish(key, flight))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced {self.name} request {key[:12]} onto the in-flight call")
+
+        result = await self._join(flight)
+        return result if is_leader else copy.deepcopy(result)
+
+    async def _join(self, flight: _Flight) -> Any:
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the outcome as retrieved even if every waiter left early
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    # Cross-process mode
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}:lock"
+
+    def _result_key(self, key: str, flight_id: str) -> str:
+        return f"{self.prefix}:{key}:{flight_id}:result"
+
+    def _done_key(self, key: str, flight_id: str) -> str:
+        return f"{self.prefix}:{key}:{flight_id}:done"
+
+    async def _run_cross_process(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Lead through a Redis lock, or wait for the process that holds it"""
+        flight_id = uuid.uuid4().hex
+        lock_key = self._lock_key(key)
+
+        try:
+            while True:
+                if await self.redis.set(lock_key, flight_id, nx=True, px=int(self.lock_ttl_seconds * 1000)):
+                    break
+                leader_id = await self.redis.get(lock_key)
+                if leader_id is not None:
+                    result = await self._wait_for_leader(key, leader_id.decode())
+                    if result is not _MISSING:
+                        return result
+                    self.fallbacks += 1
+                    return await func()
+                # The leader finished between SET and GET; try to lead again
+        except aioredis.RedisError as e:
+            logger.warning(f"Single-flight lock unavailable for {self.name}, running locally: {e}")
+            return await func()
+
+        try:
+            result = await func()
+        except BaseException:
+            await self._publish(key, flight_id, None)
+            raise
+
+        await self._publish(key, flight_id, result)
+        return result
+
+    async def _publish(self, key: str, flight_id: str, result: Any):
+        """Store the leader's result (None on failure), wake followers and release the lock"""
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if result is not None:
+                    pipe.set(self._result_key(key, flight_id), json.dumps(result, default=str), ex=60)
+                pipe.rpush(self._done_key(key, flight_id), 1)
+                pipe.expire(self._done_key(key, flight_id), 60)
+                pipe.eval(_RELEASE_SCRIPT, 1, self._lock_key(key), flight_id)
+                await pipe.execute()
+        except aioredis.RedisError as e:
+            logger.warning(f"Failed to publish single-flight result for {self.name}: {e}")
+
+    async def _wait_for_leader(self, key: str, flight_id: str) -> Any:
+        """Wait for another process's result; _MISSING if it failed or vanished"""
+        self.remote_waits += 1
+        done_key = self._done_key(key, flight_id)
+        waited = 0.0
+
+        while waited < self.lock_ttl_seconds:
+            token = await self.redis.blpop(done_key, timeout=5)
+            if token is not None:
+                # One token per flight; put it back for the other followers
+                await self.redis.rpush(done_key, token[1])
+                raw = await self.redis.get(self._result_key(key, flight_id))
+                if raw is None:
+                    return _MISSING
+                self.remote_hits += 1
+                return json.loads(raw)
+
+            waited += 5
+            leader_id = await self.redis.get(self._lock_key(key))
+            if leader_id is None or leader_id.decode() != flight_id:
+                # Lock expired or was released without a notification
+                return _MISSING
+
+        return _MISSING
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.value,
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "remote_waits": self.remote_waits,
+            "remote_hits": self.remote_hits,
+            "fallbacks": self.fallbacks
+        }
+
+
+def create_singleflight(name: str, backend: Optional[SingleFlightBackend] = None) -> SingleFlight:
+    """Build a single-flight group from settings"""
+    return SingleFlight(
+        name=name,
+        backend=backend or settings.SINGLEFLIGHT_BACKEND,
+        redis_url=settings.REDIS_URL,
+        lock_ttl_seconds=settings.SINGLEFLIGHT_LOCK_TTL_SECONDS
+    )
@@ -0,0 +1,202 @@
+"""
+Celery task instrumentation
+
+Each task execution records:
+- queue wait: time from publish (a `published_at` header stamped by
+  before_task_publish) to the start of execution
+- run time and final state (success, failure, retry)
+- result size as stored in the result backend (offloaded results count
+  their full size)
+- in-flight executions per queue
+
+Metrics are exported in Prometheus format from the worker (TASK_METRICS_PORT;
+with the prefork pool set PROMETHEUS_MULTIPROC_DIR so child processes are
+aggregated) and mirrored as Redis counters that /api/v1/admin/system
+summarises across all workers. Together they show whether slowness comes
+from backlog (queue wait) or from execution (run time).
+"""
+
+import json
+import logging
+import os
+import shutil
+from typing import Any, Dict, Optional
+
+import redis
+import redis.asyncio as aioredis
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, start_http_server
+
+from .claim_check import REFERENCE_KEY
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Message header with the publish timestamp (seconds since the epoch)
+PUBLISHED_AT_HEADER = "published_at"
+
+_TIME_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, float("inf"))
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, float("inf"))
+
+TASK_QUEUE_WAIT = Histogram(
+    "viralforge_task_queue_wait_seconds", "Time from publish to start of execution",
+    ["task", "queue"], buckets=_TIME_BUCKETS
+)
+TASK_RUNTIME = Histogram(
+    "viralforge_task_runtime_seconds", "Task execution time",
+    ["task", "queue", "state"], buckets=_TIME_BUCKETS
+)
+TASK_RETRIES = Counter("viralforge_task_retries_total", "Task retries", ["task"])
+TASK_RESULT_BYTES = Histogram(
+    "viralforge_task_result_bytes", "Encoded size of task results",
+    ["task"], buckets=_SIZE_BUCKETS
+)
+TASKS_IN_FLIGHT = Gauge(
+    "viralforge_tasks_in_flight", "Tasks currently executing",
+    ["queue"], multiprocess_mode="livesum"
+)
+
+
+def result_size(result: Any) -> int:
+    """Encoded size of a task result; claim-check references report the offloaded size"""
+    if isinstance(result, dict) and REFERENCE_KEY in result:
+        return int(result.get("size_bytes", 0))
+    try:
+        return len(json.dumps(result, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+class TaskStats:
+    """Redis counters summarising task execution across all workers"""
+
+    def __init__(self, url: str, prefix: str = "viralforge:task_stats"):
+        self.url = url
+        self.prefix = prefix
+        self._redis: Optional[redis.Redis] = None
+        self._aredis: Optional[aioredis.Redis] = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        """Sync client, used from Celery workers"""
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.url)
+        return self._redis
+
+    @property
+    def aredis(self) -> aioredis.Redis:
+        """Async client, used from the API"""
+        if self._aredis is None:
+            self._aredis = aioredis.from_url(self.url)
+        return self._aredis
+
+    @property
+    def _tasks_key(self) -> str:
+        return f"{self.prefix}:tasks"
+
+    @property
+    def _in_flight_key(self) -> str:
+        return f"{self.prefix}:in_flight"
+
+    def _task_key(self, task: str) -> str:
+        return f"{self.prefix}:task:{task}"
+
+    # Worker side (sync); failures are logged and never fail the task
+
+    def task_started(self, task: str, queue: str, queue_wait: Optional[float]):
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.sadd(self._tasks_key, task)
+                pipe.hincrby(self._in_flight_key, queue, 1)
+                pipe.hincrby(self._task_key(task), "started", 1)
+                if queue_wait is not None:
+                    pipe.hincrby(self._task_key(task), "queue_wait_samples", 1)
+                    pipe.hincrbyfloat(self._task_key(task), "queue_wait_seconds", queue_wait)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.debug(f"Failed to record task start: {e}")
+
+    def task_finished(self, task: str, queue: str, state: str, runtime: float):
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(self._in_flight_key, queue, -1)
+                pipe.hincrby(self._task_key(task), state, 1)
+                pipe.hincrbyfloat(self._task_key(task), "runtime_seconds", runtime)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.debug(f"Failed to record task finish: {e}")
+
+    def result_stored(self, task: str, size: int):
+        try:
+            self.redis.hincrby(self._task_key(task), "result_bytes", size)
+        except redis.RedisError as e:
+            logger.debug(f"Failed to record task result size: {e}")
+
+    # API side (async)
+
+    async def get_summary(self) -> Dict[str, Any]:
+        """Per-task counts and averages, and in-flight tasks per queue"""
+        tasks = sorted(name.decode() for name in await self.aredis.smembers(self._tasks_key))
+        async with self.aredis.pipeline(transaction=False) as pipe:
+            for task in tasks:
+                pipe.hgetall(self._task_key(task))
+            pipe.hgetall(self._in_flight_key)
+            *task_counters, in_flight = await pipe.execute()
+
+        summary = {}
+        for task, raw in zip(tasks, task_counters):
+            counters = {key.decode(): float(value) for key, value in raw.items()}
+            finished = sum(counters.get(state, 0) for state in ("success", "failure", "retry"))
+            wait_samples = counters.get("queue_wait_samples", 0)
+            summary[task] = {
+                "started": int(counters.get("started", 0)),
+                "succeeded": int(counters.get("success", 0)),
+                "failed": int(counters.get("failure", 0)),
+                "retried": int(counters.get("retry", 0)),
+                "avg_queue_wait_seconds": round(counters.get("queue_wait_seconds", 0) / wait_samples, 3) if wait_samples else None,
+                "avg_runtime_seconds": round(counters.get("runtime_seconds", 0) / finished, 3) if finished else None,
+                "avg_result_bytes": int(counters.get("result_bytes", 0) / counters["success"]) if counters.get("success") else None
+            }
+
+        return {
+            "in_flight": {queue.decode(): max(0, int(count)) for queue, count in in_flight.items()},
+            "tasks": summary
+        }
+
+
+def prepare_multiprocess_dir():
+    """Empty PROMETHEUS_MULTIPROC_DIR before worker processes start writing to it"""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def mark_process_dead(pid: int):
+    """Drop a finished worker process's live gauges from the multiprocess aggregate"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def start_metrics_server(port: int):
+    """Serve /metrics for this worker, aggregating prefork children when configured"""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+    logger.info(f"Serving task metrics on port {port}")
+
+
+# Global task stats instance
+task_stats = TaskStats(url=settings.REDIS_URL)
+
+
+def get_task_stats() -> TaskStats:
+    """Get the task stats instance"""
+    return task_stats
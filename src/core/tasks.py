@@ -0,0 +1,31 @@
+"""
+Celery maintenance tasks for core infrastructure
+"""
+
+import logging
+from datetime import datetime
+
+from .celery_app import celery_app
+from .claim_check import get_claim_check
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def cleanup_claim_check_blobs(self):
+    """
+    Delete claim-check payloads whose task results have expired
+    """
+    try:
+        deleted = get_claim_check().collect_garbage()
+
+        logger.info(f"Deleted {deleted} expired claim-check payloads")
+        return {
+            "status": "cleanup_completed",
+            "deleted": deleted,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    except Exception as e:
+        logger.error(f"Claim-check cleanup failed: {e}")
+        self.retry(countdown=300, max_retries=3)
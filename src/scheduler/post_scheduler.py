@@ -0,0 +1,282 @@
+"""
+Event-driven post scheduling
+
+Each scheduled post is handed to the publish_post task with an ETA at its
+exact `scheduled_at`, so posts go out within seconds of their time instead
+of waiting for a periodic scan.
+
+Celery holds ETA messages in worker memory, and the Redis broker redelivers
+any message left unacknowledged past its visibility timeout, so only posts
+due within POST_SCHEDULER_HORIZON_SECONDS are queued right away. Later posts
+wait in an in-memory min-heap in the API process, and a background thread
+queues each one as it enters the horizon. On startup the heap is rebuilt
+from the posts table.
+
+Every schedule, reschedule and cancellation bumps `Post.schedule_version`,
+and publish_post only runs for the version it was queued with, so messages
+left behind by a reschedule or a cancellation, or duplicated by
+reconciliation, do nothing.
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import get_settings
+from ..core.models import ContentStatus, Post
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# (dispatch_at, scheduled_at, post_id, version), all times as epoch seconds
+HeapEntry = Tuple[float, float, int, int]
+
+# Posts that may be (re)scheduled or cancelled
+RESCHEDULABLE_STATUSES = (ContentStatus.SCHEDULED, ContentStatus.DRAFT)
+
+
+class ScheduleConflict(Exception):
+    """The post was published, cancelled or rescheduled concurrently"""
+
+
+def _timestamp(value: datetime) -> float:
+    """Epoch seconds; naive datetimes (e.g. from SQLite) are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class PostScheduler:
+    """Queues posts for publishing at their scheduled time"""
+
+    def __init__(self, horizon_seconds: float, retry_seconds: float):
+        self.horizon_seconds = horizon_seconds
+        self.retry_seconds = retry_seconds
+
+        self._lock = threading.Lock()
+        self._heap: List[HeapEntry] = []
+        self._versions: Dict[int, int] = {}  # Current version of each post held in the heap
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self.queued = 0
+        self.queue_errors = 0
+        self.dropped_stale = 0
+        self.reconciled = 0
+
+    # Post lifecycle (the caller's async session is committed here)
+
+    async def schedule_post(self, db: AsyncSession, post: Post, scheduled_at: datetime) -> Post:
+        """Schedule or reschedule a post"""
+        from ..social_platforms.publisher import has_platform_client
+
+        await self._bump_version(db, post, status=ContentStatus.SCHEDULED, scheduled_at=scheduled_at)
+        if has_platform_client(post.platform):
+            # May publish to the broker (and the claim check); keep it off the event loop
+            await asyncio.to_thread(self.schedule, post.id, scheduled_at, post.schedule_version)
+        else:
+            logger.warning(f"Post {post.id} stays scheduled: no {post.platform.value} client to publish it")
+        return post
+
+    async def cancel_post(self, db: AsyncSession, post: Post) -> Post:
+        """Unschedule a post; messages already queued for it become no-ops"""
+        await self._bump_version(db, post, status=ContentStatus.DRAFT)
+        self.forget(post.id)
+        return post
+
+    async def _bump_version(self, db: AsyncSession, post: Post, **values: Any):
+        """
+        Apply `values` and move schedule_version on, only if nobody else has
+        since the post was read (publish_post claims a post the same way).
+        """
+        post_id, seen = post.id, post.schedule_version or 0
+        result = await db.execute(
+            update(Post)
+            .where(
+                Post.id == post_id,
+                Post.schedule_version == seen,
+                Post.status.in_(RESCHEDULABLE_STATUSES)
+            )
+            .values(schedule_version=Post.schedule_version + 1, **values)
+        )
+        if result.rowcount != 1:
+            await db.rollback()
+            raise ScheduleConflict(f"Post {post_id} changed while it was being scheduled (version {seen})")
+        await db.commit()
+
+    # Dispatching
+
+    def schedule(self, post_id: int, scheduled_at: datetime, version: int):
+        """Queue a post now if it is due within the horizon, otherwise hold it"""
+        scheduled_ts = _timestamp(scheduled_at)
+        dispatch_at = scheduled_ts - self.horizon_seconds
+
+        if dispatch_at <= time.time():
+            self.forget(post_id)
+            if self._enqueue(post_id, scheduled_ts, version):
+                return
+            dispatch_at = time.time() + self.retry_seconds
+
+        self._ensure_started()
+        with self._lock:
+            self._versions[post_id] = version
+            heapq.heappush(self._heap, (dispatch_at, scheduled_ts, post_id, version))
+        self._wakeup.set()
+
+    def forget(self, post_id: int):
+        """Drop a held post; its heap entry is discarded when it comes up"""
+        with self._lock:
+            self._versions.pop(post_id, None)
+
+    def _enqueue(self, post_id: int, scheduled_ts: float, version: int) -> bool:
+        from ..social_platforms.tasks import publish_post
+
+        try:
+            publish_post.apply_async(
+                args=[post_id, version],
+                eta=datetime.fromtimestamp(scheduled_ts, timezone.utc)
+            )
+        except Exception as e:
+            self.queue_errors += 1
+            logger.error(f"Failed to queue post {post_id}: {e}")
+            return False
+
+        self.queued += 1
+        logger.debug(f"Queued post {post_id} (version {version}) for {datetime.fromtimestamp(scheduled_ts, timezone.utc).isoformat()}")
+        return True
+
+    def _pop_due(self) -> List[HeapEntry]:
+        """Remove and return entries that have entered the horizon"""
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                post_id, version = entry[2], entry[3]
+                if self._versions.get(post_id) != version:
+                    self.dropped_stale += 1
+                    continue
+                del self._versions[post_id]
+                due.append(entry)
+        return due
+
+    def _seconds_until_next(self) -> Optional[float]:
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.time())
+
+    def _run(self):
+        while not self._stopping.is_set():
+            for _, scheduled_ts, post_id, version in self._pop_due():
+                if not self._enqueue(post_id, scheduled_ts, version):
+                    with self._lock:
+                        self._versions.setdefault(post_id, version)
+                        heapq.heappush(self._heap, (time.time() + self.retry_seconds, scheduled_ts, post_id, version))
+
+            self._wakeup.wait(self._seconds_until_next())
+            self._wakeup.clear()
+
+    def _ensure_started(self):
+        """Start the dispatch thread lazily, once per process (safe across fork)"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="post-scheduler", daemon=True)
+            self._thread.start()
+
+    # Lifecycle
+
+    def reconcile(self) -> int:
+        """
+        Rebuild the schedule from the posts table.
+
+        Posts already queued may be queued again; publish_post lets only one
+        message per version through. Posts for platforms without a client
+        are left alone.
+        """
+        from ..core.database import SessionLocal
+        from ..social_platforms.publisher import has_platform_client
+
+        db = SessionLocal()
+        try:
+            rows = db.query(Post.id, Post.scheduled_at, Post.schedule_version, Post.platform).filter(
+                Post.status == ContentStatus.SCHEDULED,
+                Post.scheduled_at.isnot(None)
+            ).all()
+        finally:
+            db.close()
+
+        posts = [
+            (post_id, scheduled_at, version)
+            for post_id, scheduled_at, version, platform in rows
+            if has_platform_client(platform)
+        ]
+        if len(posts) < len(rows):
+            logger.warning(f"{len(rows) - len(posts)} scheduled posts are held back: no client for their platform")
+
+        with self._lock:
+            self._heap.clear()
+            self._versions.clear()
+        for post_id, scheduled_at, version in posts:
+            self.schedule(post_id, scheduled_at, version or 0)
+
+        self.reconciled += len(posts)
+        logger.info(f"Reconciled {len(posts)} scheduled posts")
+        return len(posts)
+
+    def start(self):
+        """Load scheduled posts from the database and start dispatching"""
+        self._ensure_started()
+        self.reconcile()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop dispatching; held posts are reloaded by the next reconcile"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            held = len(self._versions)
+            next_dispatch = min(
+                (entry[0] for entry in self._heap if self._versions.get(entry[2]) == entry[3]),
+                default=None
+            )
+        return {
+            "horizon_seconds": self.horizon_seconds,
+            "held_posts": held,
+            "next_dispatch_at": datetime.fromtimestamp(next_dispatch, timezone.utc).isoformat() if next_dispatch else None,
+            "queued": self.queued,
+            "queue_errors": self.queue_errors,
+            "dropped_stale": self.dropped_stale,
+            "reconciled": self.reconciled
+        }
+
+
+# Global post scheduler instance
+post_scheduler = PostScheduler(
+    horizon_seconds=settings.POST_SCHEDULER_HORIZON_SECONDS,
+    retry_seconds=settings.POST_SCHEDULER_RETRY_SECONDS
+)
+
+
+def get_post_scheduler() -> PostScheduler:
+    """Get the post scheduler instance"""
+    return post_scheduler
@@ -0,0 +1,77 @@
+"""
+Publishing posts to social media platforms and reading their metrics
+"""
+
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Dict, Set
+
+from ..core.config import get_settings
+from ..core.models import Platform, Post
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+# Platforms with a real API client. Posts for other platforms are neither
+# queued nor claimed, so they stay SCHEDULED until a client exists.
+CLIENT_PLATFORMS: Set[Platform] = set()
+
+
+class PublishError(Exception):
+    """A platform rejected a post or could not be reached"""
+
+
+class NoPlatformClient(PublishError):
+    """There is no API client for the post's platform"""
+
+
+def has_platform_client(platform: Platform) -> bool:
+    """Whether posts on `platform` can be published and measured (always with MOCK_API_CALLS)"""
+    return settings.MOCK_API_CALLS or platform in CLIENT_PLATFORMS
+
+
+def publish_to_platform(post: Post) -> Dict[str, str]:
+    """
+    Publish a post and return its platform_post_id and post_url.
+
+    With MOCK_API_CALLS the post is only logged. Callers check
+    has_platform_client() first; without a client NoPlatformClient is raised.
+    """
+    if settings.MOCK_API_CALLS:
+        logger.info(f"Mock publishing post {post.id} to {post.platform.value}")
+        return {
+            "platform_post_id": f"mock-{post.id}",
+            "post_url": f"https://{post.platform.value}.example.com/p/mock-{post.id}"
+        }
+
+    raise NoPlatformClient(f"No {post.platform.value} client to publish post {post.id}")
+
+
+def fetch_post_metrics(post: Post) -> Dict[str, int]:
+    """
+    Current cumulative metrics of a published post (views, likes, ...).
+
+    With MOCK_API_CALLS the numbers are synthetic: they grow with the time
+    since posting at a rate fixed per post. Without a client
+    NoPlatformClient is raised.
+    """
+    if settings.MOCK_API_CALLS:
+        posted_at = post.posted_at or datetime.now(timezone.utc)
+        if posted_at.tzinfo is None:
+            posted_at = posted_at.replace(tzinfo=timezone.utc)
+        hours = max((datetime.now(timezone.utc) - posted_at).total_seconds() / 3600, 0.0)
+        rate = random.Random(post.id).uniform(20, 500)
+        views = int(rate * hours)
+        return {
+            "views": views,
+            "likes": int(views * 0.05),
+            "comments": int(views * 0.004),
+            "shares": int(views * 0.006),
+            "saves": int(views * 0.01),
+            "reach": int(views * 0.8),
+            "impressions": int(views * 1.3)
+        }
+
+    raise NoPlatformClient(f"No {post.platform.value} client to read metrics of post {post.id}")
@@ -0,0 +1,97 @@
+"""
+Celery tasks for social media posting
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from celery.exceptions import Retry
+
+from ..core.celery_app import celery_app
+from ..core.database import SessionLocal
+from ..core.models import ContentStatus, Post
+from .publisher import PublishError, has_platform_client, publish_to_platform
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, max_retries=3)
+def publish_post(self, post_id: int, version: int):
+    """
+    Publish a scheduled post (queued by the post scheduler with an ETA)
+
+    The post is claimed by moving it to PUBLISHING and its schedule_version
+    past `version`, so messages for an older schedule, a cancelled post, or a
+    duplicate of this one do nothing, and the post cannot be rescheduled or
+    cancelled while it is being published. Posts for a platform without a
+    client are not claimed and stay SCHEDULED.
+    """
+    db = SessionLocal()
+    try:
+        platform = db.query(Post.platform).filter(Post.id == post_id).scalar()
+        if platform is not None and not has_platform_client(platform):
+            # Leave it SCHEDULED for when a client exists
+            logger.warning(f"Skipping post {post_id}: no {platform.value} client to publish it")
+            return {"status": "skipped", "post_id": post_id, "version": version, "reason": "no platform client"}
+
+        claimed = db.query(Post).filter(
+            Post.id == post_id,
+            Post.status == ContentStatus.SCHEDULED,
+            Post.schedule_version == version
+        ).update({
+            Post.status: ContentStatus.PUBLISHING,
+            Post.schedule_version: version + 1
+        }, synchronize_session=False)
+        db.commit()
+
+        if not claimed:
+            logger.info(f"Skipping post {post_id}: version {version} is no longer scheduled")
+            return {"status": "skipped", "post_id": post_id, "version": version}
+
+        post = db.get(Post, post_id)
+        try:
+            published = publish_to_platform(post)
+        except PublishError as e:
+            if self.request.retries < self.max_retries:
+                logger.warning(f"Publishing post {post_id} failed, retrying: {e}")
+                # Nothing was published, so it may be rescheduled or cancelled until the
+                # retry claims it again as the version the claim moved it to
+                db.query(Post).filter(
+                    Post.id == post_id,
+                    Post.status == ContentStatus.PUBLISHING,
+                    Post.schedule_version == version + 1
+                ).update({Post.status: ContentStatus.SCHEDULED}, synchronize_session=False)
+                db.commit()
+                raise self.retry(args=[post_id, version + 1], countdown=60)
+            raise
+
+        posted_at = datetime.now(timezone.utc)
+        scheduled_at = post.scheduled_at if post.scheduled_at.tzinfo else post.scheduled_at.replace(tzinfo=timezone.utc)
+        post.platform_post_id = published["platform_post_id"]
+        post.post_url = published["post_url"]
+        post.posted_at = posted_at
+        post.status = ContentStatus.POSTED
+        db.commit()
+
+        delay = (posted_at - scheduled_at).total_seconds()
+        logger.info(f"Published post {post_id} to {post.platform.value} {delay:.1f}s after its scheduled time")
+        return {
+            "status": "posted",
+            "post_id": post_id,
+            "post_url": post.post_url,
+            "delay_seconds": round(delay, 3)
+        }
+
+    except Retry:
+        raise
+    except Exception as e:
+        logger.error(f"Publishing post {post_id} failed: {e}")
+        db.rollback()
+        db.query(Post).filter(
+            Post.id == post_id,
+            Post.schedule_version == version + 1
+        ).update({Post.status: ContentStatus.FAILED}, synchronize_session=False)
+        db.commit()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,20 @@
+"""
+Shared test configuration
+
+Settings are read at import time, so the environment is prepared before
+any application module is imported.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("JWT_SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+os.environ.setdefault("TASK_METRICS_ENABLED", "False")
+os.environ.setdefault("MOCK_API_CALLS", "True")
@@ -0,0 +1,72 @@
+"""
+Task base classes: bound tasks see the worker's request and can retry
+"""
+
+from celery.app.trace import build_tracer
+
+from src.core.celery_app import AsyncTask, CallbackTask, celery_app
+
+seen = []
+
+
+@celery_app.task(bind=True, base=CallbackTask, name="tests.sync_request")
+def sync_request(self):
+    seen.append((self.request.id, self.request.called_directly, self.request.retries))
+    return "ok"
+
+
+@celery_app.task(bind=True, base=AsyncTask, name="tests.async_request")
+async def async_request(self):
+    seen.append((self.request.id, self.request.called_directly, self.request.retries))
+    return "ok"
+
+
+@celery_app.task(bind=True, base=CallbackTask, name="tests.sync_flaky")
+def sync_flaky(self):
+    seen.append(self.request.retries)
+    if self.request.retries < 2:
+        raise self.retry(countdown=0, max_retries=3)
+    return "ok"
+
+
+@celery_app.task(bind=True, base=AsyncTask, name="tests.async_flaky")
+async def async_flaky(self):
+    seen.append(self.request.retries)
+    if self.request.retries < 2:
+        raise self.retry(countdown=0, max_retries=3)
+    return "ok"
+
+
+def trace(task, **request):
+    tracer = build_tracer(task.name, task, app=celery_app, eager=False, propagate=True)
+    return tracer("abc", [], {}, {"id": "abc", "retries": 1, "delivery_info": {}, **request})
+
+
+def test_sync_task_sees_worker_request():
+    seen.clear()
+    trace(sync_request)
+    assert seen == [("abc", False, 1)]
+
+
+def test_async_task_sees_worker_request():
+    seen.clear()
+    trace(async_request)
+    assert seen == [("abc", False, 1)]
+
+
+def test_direct_call_gets_its_own_request():
+    seen.clear()
+    assert sync_request() == "ok"
+    assert seen == [(None, True, 0)]
+
+
+def test_sync_task_retries():
+    seen.clear()
+    sync_flaky.apply()
+    assert seen == [0, 1, 2]
+
+
+def test_async_task_retries():
+    seen.clear()
+    async_flaky.apply()
+    assert seen == [0, 1, 2]
@@ -0,0 +1,93 @@
+"""
+Claim check: large task payloads travel as references to a blob store
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from celery.app.trace import build_tracer
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from src.core import celery_app as celery_module
+from src.core import database
+from src.core.celery_app import CallbackTask, celery_app
+from src.core.claim_check import (
+    REFERENCE_KEY, ClaimCheck, ClaimCheckMissing, DatabaseBlobStore, FileBlobStore
+)
+from src.core.models import TaskPayload
+
+LARGE = {"script": "x" * 1000}
+
+
+@pytest.fixture
+def claim_check(tmp_path):
+    return ClaimCheck(FileBlobStore(str(tmp_path / "blobs")), threshold_bytes=256, retention_seconds=60)
+
+
+@celery_app.task(bind=True, base=CallbackTask, name="tests.echo_payload")
+def echo_payload(self, payload):
+    assert payload == LARGE
+    return {"echo": payload}
+
+
+def test_small_values_are_passed_through(claim_check):
+    assert claim_check.offload({"topic": "cats"}) == {"topic": "cats"}
+    assert claim_check.offload(None) is None
+
+
+def test_large_values_round_trip(claim_check):
+    reference = claim_check.offload(LARGE)
+
+    assert claim_check.is_reference(reference)
+    assert reference["size_bytes"] > 256
+    # Content addressed: the same payload is stored once
+    assert claim_check.offload(dict(LARGE)) == reference
+    assert claim_check.resolve({"items": [reference, 1]}) == {"items": [LARGE, 1]}
+
+
+def test_disabled_claim_check_keeps_values_inline(tmp_path):
+    disabled = ClaimCheck(FileBlobStore(str(tmp_path)), threshold_bytes=256, retention_seconds=60, enabled=False)
+    assert disabled.offload(LARGE) == LARGE
+
+
+def test_garbage_collection_removes_expired_blobs(claim_check):
+    old, fresh = claim_check.offload(LARGE), claim_check.offload({"script": "y" * 1000})
+    path = claim_check.store._path(old[REFERENCE_KEY])
+    os.utime(path, (time.time() - 120, time.time() - 120))
+
+    assert claim_check.collect_garbage() == 1
+    with pytest.raises(ClaimCheckMissing):
+        claim_check.resolve(old)
+    assert claim_check.resolve(fresh) == {"script": "y" * 1000}
+
+
+def test_database_store_refreshes_and_collects(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'payloads.db'}")
+    TaskPayload.__table__.create(engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    claim_check = ClaimCheck(DatabaseBlobStore(), threshold_bytes=256, retention_seconds=60)
+
+    reference = claim_check.offload(LARGE)
+    assert claim_check.offload(LARGE) == reference
+    assert claim_check.resolve(reference) == LARGE
+
+    with engine.begin() as conn:
+        conn.execute(update(TaskPayload).values(last_stored_at=datetime(2000, 1, 1, tzinfo=timezone.utc)))
+    assert claim_check.collect_garbage() == 1
+    with pytest.raises(ClaimCheckMissing):
+        claim_check.resolve(reference)
+    engine.dispose()
+
+
+def test_task_resolves_arguments_and_offloads_its_result(claim_check, monkeypatch):
+    monkeypatch.setattr(celery_module, "get_claim_check", lambda: claim_check)
+    tracer = build_tracer(echo_payload.name, echo_payload, app=celery_app, eager=False, propagate=True)
+
+    reference = claim_check.offload(LARGE)
+    result = tracer("abc", [reference], {}, {"id": "abc", "delivery_info": {}}).retval
+
+    assert claim_check.is_reference(result)
+    assert claim_check.resolve(result) == {"echo": LARGE}
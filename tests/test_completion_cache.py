@@ -0,0 +1,126 @@
+"""
+Completion cache tiers: TTL, LRU eviction and promotion into the in-process tier
+"""
+
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.ai_services import cache
+from src.ai_services.cache import MemoryCache, RedisCache, SQLiteCache, TieredCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def new_redis_cache() -> RedisCache:
+    """Must be built inside the event loop that uses it"""
+    tier = RedisCache(ttl_seconds=60, max_entries=2, url="redis://unused")
+    tier.redis = fakeredis.aioredis.FakeRedis()
+    return tier
+
+
+def run(*coros):
+    async def main():
+        return [await coro for coro in coros]
+
+    return asyncio.run(main())
+
+
+def test_cache_key_ignores_parameter_order():
+    messages = [{"role": "user", "content": "hi"}]
+    assert make_cache_key("gpt-4o", messages, {"a": 1, "b": 2}) == make_cache_key("gpt-4o", messages, {"b": 2, "a": 1})
+    assert make_cache_key("gpt-4o", messages, {"a": 1}) != make_cache_key("gpt-4o-mini", messages, {"a": 1})
+
+
+def test_memory_cache_expires_and_evicts_least_recently_used(clock):
+    tier = MemoryCache(ttl_seconds=60, max_entries=2)
+
+    run(tier.set("a", {"v": 1}), tier.set("b", {"v": 2}))
+    assert run(tier.get("a")) == [{"v": 1}]
+    run(tier.set("c", {"v": 3}))
+    assert run(tier.get("b"), tier.get("a"), tier.get("c")) == [None, {"v": 1}, {"v": 3}]
+
+    clock.value += 61
+    assert run(tier.get("a")) == [None]
+    assert tier.stats.evictions == 2
+
+
+def test_sqlite_cache_expires_and_trims(tmp_path, clock):
+    tier = SQLiteCache(ttl_seconds=60, max_entries=2, path=str(tmp_path / "cache.db"))
+    tier.trim_every = 3
+
+    run(tier.set("a", {"v": 1}))
+    clock.value += 1
+    run(tier.set("b", {"v": 2}))
+    assert run(tier.get("a"), tier.get("missing")) == [{"v": 1}, None]
+
+    clock.value += 1
+    run(tier.set("c", {"v": 3}), tier.set("d", {"v": 4}))
+    # The fourth write trims back to max_entries, dropping the least recently used
+    assert run(tier.get("b"), tier.get("a"), tier.get("d")) == [None, None, {"v": 4}]
+
+    clock.value += 61
+    assert run(tier.get("d")) == [None]
+
+
+def test_sqlite_cache_closes_its_connections(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    class TrackedConnection(sqlite3.Connection):
+        closed = False
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    def tracked_connect(*args, **kwargs):
+        opened.append(connect(*args, factory=TrackedConnection, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(cache.sqlite3, "connect", tracked_connect)
+    tier = SQLiteCache(ttl_seconds=60, max_entries=10, path=str(tmp_path / "cache.db"))
+    run(tier.set("a", {"v": 1}), tier.get("a"), tier.clear())
+
+    assert len(opened) == 4
+    assert all(conn.closed for conn in opened)
+
+
+def test_redis_cache_evicts_least_recently_used(clock):
+    async def scenario():
+        tier = new_redis_cache()
+        await tier.set("a", {"v": 1})
+        clock.value += 1
+        await tier.set("b", {"v": 2})
+        clock.value += 1
+        assert await tier.get("a") == {"v": 1}
+        clock.value += 1
+        await tier.set("c", {"v": 3})
+
+        assert [await tier.get(key) for key in "bac"] == [None, {"v": 1}, {"v": 3}]
+        assert tier.stats.evictions == 1
+        assert await tier.redis.ttl(tier._key("a")) == 60
+
+    asyncio.run(scenario())
+
+
+def test_tiered_cache_promotes_remote_hits():
+    async def scenario():
+        remote = new_redis_cache()
+        local = MemoryCache(ttl_seconds=60, max_entries=10)
+        tiered = TieredCache(local, remote)
+
+        await remote.set("a", {"v": 1})
+        assert [await tiered.get("a"), await tiered.get("a")] == [{"v": 1}, {"v": 1}]
+        assert (local.stats.hits, remote.stats.hits) == (1, 1)
+        assert set(tiered.get_stats()) == {"memory", "redis"}
+
+    asyncio.run(scenario())
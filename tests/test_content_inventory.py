@@ -0,0 +1,128 @@
+"""
+Content inventory: pieces are served oldest first, slots are refilled emptiest first and sparingly
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from src.content_pipeline.inventory import ContentInventory, plan_refill, refill_budget
+
+
+@pytest.fixture
+def inventory():
+    server = fakeredis.FakeServer()
+    inventory = ContentInventory(url="redis://unused", target_depth=2, max_age_seconds=3600, locations=["US"])
+    inventory._redis = fakeredis.FakeRedis(server=server)
+    inventory._aredis = fakeredis.aioredis.FakeRedis(server=server)
+    return inventory
+
+
+def test_misses_trigger_one_refill(inventory, monkeypatch):
+    from src.api.routers import content
+    from src.content_pipeline import tasks
+    from src.core.config import ContentType
+
+    queued = []
+    monkeypatch.setattr(content, "get_content_inventory", lambda: inventory)
+    monkeypatch.setattr(tasks.refill_content_inventory, "delay", lambda: queued.append(threading.current_thread()))
+
+    async def misses():
+        return [await content._take_from_inventory(ContentType.FACTS, None) for _ in range(3)]
+
+    assert asyncio.run(misses()) == [None, None, None]
+    assert len(queued) == 1
+    # Publishing to the broker blocks, so it runs off the event loop thread
+    assert queued[0] is not threading.main_thread()
+
+
+def test_refill_lock_is_only_released_by_its_owner(inventory):
+    first = inventory.acquire_refill_lock(ttl_seconds=300)
+    assert first is not None
+    assert inventory.acquire_refill_lock(ttl_seconds=300) is None
+
+    # The first run outlives the TTL and a second run takes the lock
+    inventory.redis.delete(f"{inventory.prefix}:refill_lock")
+    second = inventory.acquire_refill_lock(ttl_seconds=300)
+
+    inventory.release_refill_lock(first)
+    assert inventory.acquire_refill_lock(ttl_seconds=300) is None
+
+    inventory.release_refill_lock(second)
+    assert inventory.acquire_refill_lock(ttl_seconds=300) is not None
+
+
+def test_take_serves_oldest_fresh_piece(inventory, monkeypatch):
+    from src.content_pipeline import inventory as inventory_module
+    from src.core.config import ContentType
+
+    now = [1000.0]
+    monkeypatch.setattr(inventory_module, "time", SimpleNamespace(time=lambda: now[0]))
+    inventory.add(ContentType.FACTS, None, {"title": "stale"})
+    now[0] += 3000
+    inventory.add(ContentType.FACTS, None, {"title": "fresh"})
+    inventory.add(ContentType.FACTS, "US", {"title": "local"})
+    now[0] += 700
+
+    async def take():
+        return [
+            await inventory.take(ContentType.FACTS),
+            await inventory.take(ContentType.FACTS),
+            await inventory.take(ContentType.FACTS, "us"),
+            await inventory.get_stats()
+        ]
+
+    first, second, local, stats = asyncio.run(take())
+
+    assert first["title"] == "fresh"
+    assert first["ai_metadata"]["inventory_age_seconds"] == 700.0
+    assert second is None
+    assert local["title"] == "local"
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (2, 1, 1)
+    assert stats["slots"]["facts:_"]["refill_lag_seconds"] == 0.0
+
+
+def test_deficits_and_expiry(inventory, monkeypatch):
+    from src.content_pipeline import inventory as inventory_module
+    from src.core.config import ContentType
+
+    monkeypatch.setattr(inventory_module.settings, "CONTENT_TYPES", [ContentType.FACTS, ContentType.MEMES])
+    inventory.add(ContentType.FACTS, None, {"title": "a"})
+    inventory.add(ContentType.FACTS, None, {"title": "b"})
+    inventory.add(ContentType.FACTS, None, {"title": "c"})
+
+    assert inventory.redis.llen(inventory._items_key("facts:_")) == 2
+    assert inventory.deficits() == {
+        (ContentType.FACTS, "US"): 2,
+        (ContentType.MEMES, None): 2,
+        (ContentType.MEMES, "US"): 2
+    }
+
+    inventory.max_age_seconds = -1
+    assert inventory.drop_expired() == 2
+
+
+def test_plan_refill_spreads_budget_emptiest_first():
+    deficits = {"a": 1, "b": 3, "c": 2}
+
+    assert plan_refill(deficits, budget=4) == ["b", "c", "a", "b"]
+    assert plan_refill(deficits, budget=10) == ["b", "c", "a", "b", "c", "b"]
+    assert plan_refill({}, budget=5) == []
+
+
+def test_refill_budget_uses_a_share_of_the_image_rpm(monkeypatch):
+    from src.content_pipeline import inventory as inventory_module
+
+    settings = inventory_module.settings
+    monkeypatch.setattr(settings, "AI_ROUTES", {"image": ["openai:dall-e-3"]})
+    monkeypatch.setattr(settings, "AI_RPM_LIMITS", {"dall-e-3": 7})
+    monkeypatch.setattr(settings, "INVENTORY_REFILL_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(settings, "INVENTORY_REFILL_BUDGET_FRACTION", 0.5)
+    monkeypatch.setattr(settings, "INVENTORY_REFILL_MAX_PIECES", 20)
+
+    assert refill_budget() == 3
+    monkeypatch.setattr(settings, "AI_RPM_LIMITS", {})
+    assert refill_budget() == 20
@@ -0,0 +1,112 @@
+"""
+Job store: workers report progress and results, the API long-polls for them
+"""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.content_pipeline.jobs import JobStatus, JobStore
+
+
+def new_job_store() -> JobStore:
+    """Must be built inside the event loop that uses it"""
+    server = fakeredis.FakeServer()
+    store = JobStore(url="redis://unused", ttl_seconds=60)
+    store._redis = fakeredis.FakeRedis(server=server)
+    store._aredis = fakeredis.aioredis.FakeRedis(server=server)
+    return store
+
+
+def test_job_lifecycle():
+    async def scenario():
+        store = new_job_store()
+        job_id = await store.create("piece", {"content_type": "facts"}, ["script", "image"])
+
+        job = await store.get(job_id)
+        assert job["status"] == JobStatus.QUEUED.value
+        assert job["stages"] == {"script": None, "image": None}
+        assert await store.aredis.ttl(store._status_key(job_id)) == 60
+
+        store.mark_running(job_id)
+        store.record_stage(job_id, "script", {"seconds": 1.5})
+        store.complete(job_id, {"title": "Cats"})
+
+        job = await store.get(job_id)
+        assert job["status"] == JobStatus.SUCCEEDED.value
+        assert job["stages"] == {"script": {"seconds": 1.5}, "image": None}
+        assert job["result_bytes"] > 0
+        assert {"started_at", "finished_at"} <= set(job)
+        assert await store.get_result(job_id) == {"title": "Cats"}
+        assert await store.get("unknown") is None
+
+    asyncio.run(scenario())
+
+
+def test_bulk_progress_and_failure():
+    async def scenario():
+        store = new_job_store()
+        job_id = await store.create("bulk", {"count": 3}, [], total=3)
+
+        store.record_progress(job_id, completed=2, failed=1)
+        store.fail(job_id, "deadline exceeded")
+
+        job = await store.get(job_id)
+        assert job["progress"] == {"completed": 2, "failed": 1, "total": 3}
+        assert (job["status"], job["error"]) == (JobStatus.FAILED.value, "deadline exceeded")
+        assert await store.get_result(job_id) is None
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_wakes_every_waiter_on_completion():
+    async def scenario():
+        store = new_job_store()
+        job_id = await store.create("piece", {}, [])
+
+        async def finish():
+            await asyncio.sleep(0.05)
+            await asyncio.to_thread(store.complete, job_id, {"title": "Cats"})
+
+        waiters = asyncio.gather(store.wait(job_id, timeout=5), store.wait(job_id, timeout=5))
+        _, jobs = await asyncio.gather(finish(), waiters)
+        assert [job["status"] for job in jobs] == [JobStatus.SUCCEEDED.value] * 2
+
+        # Finished jobs return without waiting
+        assert (await store.wait(job_id, timeout=5))["status"] == JobStatus.SUCCEEDED.value
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_returns_the_running_job_on_timeout():
+    async def scenario():
+        store = new_job_store()
+        job_id = await store.create("piece", {}, [])
+        store.mark_running(job_id)
+
+        assert (await store.wait(job_id, timeout=0))["status"] == JobStatus.RUNNING.value
+        assert (await store.wait(job_id, timeout=1))["status"] == JobStatus.RUNNING.value
+
+    asyncio.run(scenario())
+
+
+def test_api_side_failure_is_visible():
+    async def scenario():
+        store = new_job_store()
+        job_id = await store.create("piece", {}, [])
+        await store.fail_async(job_id, "Failed to enqueue: broker down")
+        return await store.get(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == JobStatus.FAILED.value
+    assert job["error"].startswith("Failed to enqueue")
+
+
+@pytest.mark.parametrize("raw_total", [None, b"4"])
+def test_status_decoding_defaults(raw_total):
+    raw = {b"job_id": b"j", b"status": b"queued", b"created_at": b"1.0"}
+    if raw_total:
+        raw[b"total"] = raw_total
+    job = JobStore._decode_status(raw)
+    assert job["progress"]["total"] == (4 if raw_total else 1)
@@ -0,0 +1,72 @@
+"""
+Model router circuit breaker: a half-open probe always resolves
+"""
+
+import asyncio
+
+import pytest
+
+from src.ai_services.model_router import CircuitBreaker, ModelRouter
+from src.ai_services.providers import Provider
+
+
+class StubProvider(Provider):
+    name = "stub"
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def make_router():
+    router = ModelRouter(
+        providers={"stub": StubProvider()},
+        routes={"script": ["stub:model"]},
+        pricing={},
+        request_timeout=5.0,
+        cost_weight=0.0,
+        failure_threshold=1,
+        error_rate_threshold=1.0,
+        recovery_seconds=0.0
+    )
+    route = router.candidates("script")[0]
+    route.breaker.trip()
+    return router, route
+
+
+def test_bad_request_on_probe_closes_circuit():
+    router, route = make_router()
+
+    async def rejected(route):
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        asyncio.run(router.execute("script", rejected))
+    assert route.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_reopens_circuit():
+    router, route = make_router()
+
+    async def main():
+        probe = asyncio.create_task(router.execute("script", lambda route: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        assert route.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(main())
+    assert route.breaker.state == CircuitBreaker.OPEN
+    assert route.breaker.allow()
+
+
+def test_lost_probe_expires():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=0.0, probe_timeout=0.0)
+    breaker.trip()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # No outcome was ever recorded; after probe_timeout another probe is admitted
+    assert breaker.allow()
@@ -0,0 +1,144 @@
+"""
+Post scheduler: (re)scheduling never overwrites a concurrent publish
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.core.database import Base
+from src.core.models import ContentItem, ContentStatus, ContentType, Platform, Post, SocialAccount, User
+from src.scheduler.post_scheduler import PostScheduler, ScheduleConflict
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "scheduler.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), {"username": "u", "email": "u@example.com", "hashed_password": "!"})
+        conn.execute(SocialAccount.__table__.insert(), {
+            "user_id": 1, "platform": Platform.TIKTOK, "account_id": "a", "account_username": "a"
+        })
+        conn.execute(ContentItem.__table__.insert(), {"user_id": 1, "title": "t", "content_type": ContentType.FACTS})
+        conn.execute(Post.__table__.insert(), {
+            "content_item_id": 1, "social_account_id": 1, "platform": Platform.TIKTOK,
+            "status": ContentStatus.SCHEDULED, "schedule_version": 3
+        })
+    yield engine, f"sqlite+aiosqlite:///{path}"
+    engine.dispose()
+
+
+class RecordingScheduler(PostScheduler):
+    def __init__(self):
+        super().__init__(horizon_seconds=60, retry_seconds=1)
+        self.scheduled = []
+
+    def schedule(self, post_id, scheduled_at, version):
+        self.scheduled.append((post_id, version))
+        self.scheduled_on = threading.current_thread()
+
+
+def run_with_session(url, func):
+    async def main():
+        engine = create_async_engine(url)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                return await func(db)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_reschedule_bumps_version(database):
+    _, url = database
+    scheduler = RecordingScheduler()
+    scheduled_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    async def reschedule(db):
+        post = await db.get(Post, 1)
+        await scheduler.schedule_post(db, post, scheduled_at)
+        return post.schedule_version
+
+    assert run_with_session(url, reschedule) == 4
+    assert scheduler.scheduled == [(1, 4)]
+    # Queueing publishes to the broker, so it runs off the event loop thread
+    assert scheduler.scheduled_on is not threading.main_thread()
+
+
+def test_reschedule_after_publish_claim_conflicts(database):
+    engine, url = database
+    scheduler = RecordingScheduler()
+    scheduled_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+    async def reschedule(db):
+        post = await db.get(Post, 1)
+        # publish_post claims version 3 and posts between the read and the write
+        with engine.begin() as conn:
+            conn.execute(update(Post).where(Post.id == 1).values(schedule_version=4, status=ContentStatus.POSTED))
+        with pytest.raises(ScheduleConflict):
+            await scheduler.schedule_post(db, post, scheduled_at)
+
+    run_with_session(url, reschedule)
+    assert scheduler.scheduled == []
+    with engine.connect() as conn:
+        post = conn.execute(Post.__table__.select().where(Post.id == 1)).one()
+    assert (post.status, post.schedule_version) == (ContentStatus.POSTED, 4)
+
+
+def test_publish_without_platform_client_leaves_post_scheduled(database, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+
+    from src.social_platforms import publisher, tasks
+
+    engine, _ = database
+    monkeypatch.setattr(publisher.settings, "MOCK_API_CALLS", False)
+    monkeypatch.setattr(tasks, "SessionLocal", sessionmaker(bind=engine))
+
+    result = tasks.publish_post.apply(args=[1, 3]).get()
+
+    assert result["status"] == "skipped"
+    with engine.connect() as conn:
+        post = conn.execute(Post.__table__.select().where(Post.id == 1)).one()
+    assert (post.status, post.schedule_version) == (ContentStatus.SCHEDULED, 3)
+
+
+def test_cancel_while_publishing_conflicts(database, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+
+    from src.social_platforms import tasks
+
+    engine, url = database
+    with engine.begin() as conn:
+        conn.execute(update(Post).where(Post.id == 1).values(scheduled_at=datetime.now(timezone.utc)))
+    monkeypatch.setattr(tasks, "SessionLocal", sessionmaker(bind=engine))
+
+    async def cancel(db):
+        post = await db.get(Post, 1)
+        status = post.status
+        with pytest.raises(ScheduleConflict):
+            await RecordingScheduler().cancel_post(db, post)
+        return status
+
+    seen = []
+
+    def publish(post):
+        # The user cancels after the claim, while the platform call is in flight
+        seen.append(run_with_session(url, cancel))
+        return {"platform_post_id": "p1", "post_url": "https://example.com/p1"}
+
+    monkeypatch.setattr(tasks, "publish_to_platform", publish)
+
+    result = tasks.publish_post.apply(args=[1, 3]).get()
+
+    assert result["status"] == "posted"
+    assert seen == [ContentStatus.PUBLISHING]
+    with engine.connect() as conn:
+        post = conn.execute(Post.__table__.select().where(Post.id == 1)).one()
+    assert (post.status, post.schedule_version) == (ContentStatus.POSTED, 4)
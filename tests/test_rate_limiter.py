@@ -0,0 +1,101 @@
+"""
+AI rate limiter: RPM/TPM token buckets, locally and shared through Redis
+"""
+
+import asyncio
+
+import fakeredis
+import pytest
+
+from src.ai_services.rate_limiter import (
+    LocalRateLimiter, RateLimitTimeout, RedisRateLimiter, TokenBucket, estimate_tokens
+)
+
+
+def new_redis_limiter(client=None, **kwargs) -> RedisRateLimiter:
+    """Must be built inside the event loop that uses it"""
+    limiter = RedisRateLimiter(url="redis://unused", **kwargs)
+    limiter.redis = client or fakeredis.aioredis.FakeRedis()
+    limiter._acquire = limiter.redis.register_script(limiter._acquire.script)
+    return limiter
+
+
+def test_estimate_tokens_counts_prompt_and_completion():
+    assert estimate_tokens([{"content": "x" * 400}], max_tokens=50) == 150
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0.0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+    # Requests larger than the bucket only wait for it to fill
+    assert bucket.wait_time(600) == pytest.approx(60.0, abs=0.1)
+
+
+def test_local_limiter_throttles_requests_and_tokens():
+    limiter = LocalRateLimiter(rpm_limits={"m": 2}, tpm_limits={"m": 100}, max_wait_seconds=300)
+
+    async def scenario():
+        assert await limiter._try_acquire("m", 40) == 0.0
+        assert await limiter._try_acquire("m", 40) == 0.0
+        # Out of requests
+        assert await limiter._try_acquire("m", 0) == pytest.approx(30.0, abs=0.1)
+
+    asyncio.run(scenario())
+
+    limiter = LocalRateLimiter(rpm_limits={}, tpm_limits={"m": 100}, max_wait_seconds=300)
+
+    async def tokens():
+        assert await limiter._try_acquire("m", 90) == 0.0
+        # Out of tokens until the estimate is settled against the real usage
+        assert await limiter._try_acquire("m", 50) > 0
+        await limiter.settle("m", estimated_tokens=90, actual_tokens=20)
+        assert await limiter._try_acquire("m", 50) == 0.0
+
+    asyncio.run(tokens())
+
+
+def test_limiter_gives_up_past_max_wait():
+    limiter = LocalRateLimiter(rpm_limits={"m": 1}, tpm_limits={}, max_wait_seconds=5)
+
+    async def scenario():
+        await limiter.acquire("m")
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire("m")
+        # Unlimited models never wait
+        await limiter.acquire("other", tokens=10 ** 6)
+
+    asyncio.run(scenario())
+
+
+def test_redis_limiter_shares_one_budget():
+    async def scenario():
+        first = new_redis_limiter(rpm_limits={"m": 2}, tpm_limits={"m": 100}, max_wait_seconds=300)
+        second = new_redis_limiter(first.redis, rpm_limits={"m": 2}, tpm_limits={"m": 100}, max_wait_seconds=300)
+
+        assert await first._try_acquire("m", 10) == 0.0
+        assert await second._try_acquire("m", 10) == 0.0
+        assert await first._try_acquire("m", 10) == pytest.approx(30.0, abs=0.1)
+
+        # Tokens settle into the shared bucket as well
+        assert await second._try_acquire("other", 0) == 0.0
+        await first.settle("m", estimated_tokens=10, actual_tokens=30)
+        level = float(await first.redis.hget(first._keys("m")[1], "level"))
+        assert level == pytest.approx(60.0, abs=0.1)
+
+    asyncio.run(scenario())
+
+
+def test_redis_limiter_falls_back_to_local_buckets():
+    async def scenario():
+        limiter = new_redis_limiter(rpm_limits={"m": 1}, tpm_limits={}, max_wait_seconds=300)
+
+        async def unavailable(**kwargs):
+            raise ConnectionError("redis down")
+
+        limiter._acquire = unavailable
+        assert await limiter._try_acquire("m", 0) == 0.0
+        assert await limiter._try_acquire("m", 0) > 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,29 @@
+"""
+Payload serialization: every value round-trips whatever PAYLOAD_SERIALIZER is
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import serialization
+from src.core.serialization import JSON, MSGPACK, ORJSON, dumps_payload, loads_payload
+
+pytest.importorskip("msgpack")
+
+VALUES = [123, 91, -5, 1.5, "text", "", True, None, [1, 2], {"views": 10, "tags": ["a"]}]
+
+
+@pytest.mark.parametrize("name", [JSON, ORJSON, MSGPACK])
+@pytest.mark.parametrize("value", VALUES)
+def test_payload_round_trips(monkeypatch, name, value):
+    if name not in serialization.available_serializers():
+        pytest.skip(f"{name} is not installed")
+    monkeypatch.setattr(serialization, "settings", SimpleNamespace(PAYLOAD_SERIALIZER=name))
+
+    assert loads_payload(dumps_payload(value)) == value
+
+
+def test_reads_payloads_written_before_the_marker():
+    assert loads_payload(b'{"views": 10}') == {"views": 10}
+    assert loads_payload(serialization.msgpack_dumps({"views": 10})) == {"views": 10}
@@ -0,0 +1,148 @@
+"""
+Single-flight: concurrent identical calls share one execution, in-process and across processes
+"""
+
+import asyncio
+
+import fakeredis
+import pytest
+import redis.asyncio as aioredis
+
+from src.core.config import SingleFlightBackend
+from src.core.singleflight import SingleFlight, make_flight_key
+
+
+def redis_flight(client) -> SingleFlight:
+    flight = SingleFlight("test", backend=SingleFlightBackend.REDIS, lock_ttl_seconds=10)
+    flight._redis = client
+    return flight
+
+
+def test_flight_key_normalizes_strings():
+    assert make_flight_key("Cats  in\tSpace", 1) == make_flight_key(" cats in space ", 1)
+    assert make_flight_key("cats", 1) != make_flight_key("cats", 2)
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"tags": ["a"]}
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("k", work) for _ in range(3)])
+
+    results = asyncio.run(scenario())
+
+    assert calls == [1]
+    assert results == [{"tags": ["a"]}] * 3
+    # Followers get copies they can modify
+    assert results[1] is not results[0]
+    assert (flight.leaders, flight.coalesced) == (1, 2)
+
+
+def test_leader_failure_reaches_every_waiter():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("k", work) for _ in range(2)], return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(scenario())] == [ValueError, ValueError]
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_work_is_cancelled_only_when_every_waiter_leaves():
+    flight = SingleFlight("test")
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return 1
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 1
+
+    asyncio.run(scenario())
+    assert finished == [1]
+
+
+def test_follower_in_another_process_waits_for_the_leader():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        leader, follower = redis_flight(client), redis_flight(client)
+        started, release = asyncio.Event(), asyncio.Event()
+        calls = []
+
+        async def lead():
+            started.set()
+            await release.wait()
+            return {"v": 1}
+
+        async def follow():
+            calls.append(1)
+            return {"v": 2}
+
+        leading = asyncio.ensure_future(leader.do("k", lead))
+        await started.wait()
+        following = asyncio.ensure_future(follower.do("k", follow))
+        await asyncio.sleep(0.05)
+        release.set()
+
+        assert await leading == {"v": 1}
+        assert await following == {"v": 1}
+        assert calls == []
+        assert follower.remote_hits == 1
+        assert await client.get(leader._lock_key("k")) is None
+
+    asyncio.run(scenario())
+
+
+def test_follower_runs_the_work_when_the_leader_fails():
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        leader, follower = redis_flight(client), redis_flight(client)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def lead():
+            started.set()
+            await release.wait()
+            raise ValueError("boom")
+
+        async def follow():
+            return {"v": 2}
+
+        leading = asyncio.ensure_future(leader.do("k", lead))
+        await started.wait()
+        following = asyncio.ensure_future(follower.do("k", follow))
+        await asyncio.sleep(0.05)
+        release.set()
+
+        with pytest.raises(ValueError):
+            await leading
+        assert await following == {"v": 2}
+        assert follower.fallbacks == 1
+
+    asyncio.run(scenario())
+
+
+def test_runs_locally_when_redis_is_unavailable():
+    class Unavailable:
+        async def set(self, *args, **kwargs):
+            raise aioredis.ConnectionError("redis down")
+
+    async def work():
+        return {"v": 1}
+
+    assert asyncio.run(redis_flight(Unavailable()).do("k", work)) == {"v": 1}